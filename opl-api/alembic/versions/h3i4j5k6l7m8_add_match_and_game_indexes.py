@@ -0,0 +1,54 @@
+"""add match and game indexes
+
+Revision ID: h3i4j5k6l7m8
+Revises: g2h3i4j5k6l7
+Create Date: 2026-10-17
+
+Composite indexes for the player/date query paths used by get_matches, get_games,
+rescore_match, update_match and send_match_reminders.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = 'h3i4j5k6l7m8'
+down_revision: str | None = 'g2h3i4j5k6l7'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_matches_deleted_session_date', 'matches', ['deleted', 'session_id', 'scheduled_date']
+    )
+    op.create_index('ix_matches_division_date', 'matches', ['division_id', 'scheduled_date'])
+    op.create_index('ix_matches_player1_completed', 'matches', ['player1_id', 'completed'])
+    op.create_index('ix_matches_player2_completed', 'matches', ['player2_id', 'completed'])
+    op.create_index(
+        'ix_matches_reminder_due',
+        'matches',
+        ['scheduled_date'],
+        postgresql_where=sa.text('completed = false AND reminder_sent = false'),
+        sqlite_where=sa.text('completed = 0 AND reminder_sent = 0'),
+    )
+
+    op.create_index('ix_games_match_id', 'games', ['match_id'])
+    op.create_index('ix_games_winner_played', 'games', ['winner_id', 'played_date'])
+    op.create_index('ix_games_loser_played', 'games', ['loser_id', 'played_date'])
+    op.create_index('ix_games_played_date', 'games', ['played_date', 'game_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_games_played_date', table_name='games')
+    op.drop_index('ix_games_loser_played', table_name='games')
+    op.drop_index('ix_games_winner_played', table_name='games')
+    op.drop_index('ix_games_match_id', table_name='games')
+
+    op.drop_index('ix_matches_reminder_due', table_name='matches')
+    op.drop_index('ix_matches_player2_completed', table_name='matches')
+    op.drop_index('ix_matches_player1_completed', table_name='matches')
+    op.drop_index('ix_matches_division_date', table_name='matches')
+    op.drop_index('ix_matches_deleted_session_date', table_name='matches')
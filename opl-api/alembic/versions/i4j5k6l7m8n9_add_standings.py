@@ -0,0 +1,44 @@
+"""add standings
+
+Revision ID: i4j5k6l7m8n9
+Revises: h3i4j5k6l7m8
+Create Date: 2026-10-17
+
+Materialized per-player standings, updated as matches complete. Backfill existing
+seasons with `python scripts/rebuild_standings.py`.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = 'i4j5k6l7m8n9'
+down_revision: str | None = 'h3i4j5k6l7m8'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'standings',
+        sa.Column(
+            'session_id', sa.Integer(), sa.ForeignKey('sessions.session_id'), primary_key=True
+        ),
+        sa.Column(
+            'division_id', sa.Integer(), sa.ForeignKey('divisions.division_id'), primary_key=True
+        ),
+        sa.Column('player_id', sa.Integer(), sa.ForeignKey('players.player_id'), primary_key=True),
+        sa.Column('points', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('match_wins', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('match_losses', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('shutouts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('hill_losses', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('games_won', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('games_lost', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('standings')
@@ -0,0 +1,25 @@
+"""add messages created index
+
+Revision ID: j5k6l7m8n9o0
+Revises: i4j5k6l7m8n9
+Create Date: 2026-10-17
+
+Backs the keyset-paginated admin message listing, ordered by (created_at, message_id).
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = 'j5k6l7m8n9o0'
+down_revision: str | None = 'i4j5k6l7m8n9'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_messages_created', 'messages', ['created_at', 'message_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_created', table_name='messages')
@@ -0,0 +1,30 @@
+"""add match score_version
+
+Revision ID: k6l7m8n9o0p1
+Revises: j5k6l7m8n9o0
+Create Date: 2026-10-17
+
+Version counter for a match's score-submission state, used as the ETag of the
+polled GET /matches/{id}/score/ endpoint.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = 'k6l7m8n9o0p1'
+down_revision: str | None = 'j5k6l7m8n9o0'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'matches', sa.Column('score_version', sa.Integer(), nullable=False, server_default='0')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('matches', 'score_version')
@@ -0,0 +1,27 @@
+"""add message_recipients player/read index
+
+Revision ID: l7m8n9o0p1q2
+Revises: k6l7m8n9o0p1
+Create Date: 2026-10-17
+
+Backs the player inbox join and GET /messages/unread-count/.
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = 'l7m8n9o0p1q2'
+down_revision: str | None = 'k6l7m8n9o0p1'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_message_recipients_player_read', 'message_recipients', ['player_id', 'read_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_message_recipients_player_read', table_name='message_recipients')
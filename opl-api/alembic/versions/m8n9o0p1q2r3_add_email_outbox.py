@@ -0,0 +1,44 @@
+"""add email_outbox
+
+Revision ID: m8n9o0p1q2r3
+Revises: l7m8n9o0p1q2
+Create Date: 2026-10-17
+
+Persistent queue of outbound emails, drained by the scheduler's outbox worker.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = 'm8n9o0p1q2r3'
+down_revision: str | None = 'l7m8n9o0p1q2'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'email_outbox',
+        sa.Column('email_id', sa.Integer(), nullable=False),
+        sa.Column('to_address', sa.String(), nullable=False),
+        sa.Column('subject', sa.String(), nullable=False),
+        sa.Column('html', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('email_id'),
+    )
+    op.create_index(
+        'ix_email_outbox_status_next_attempt', 'email_outbox', ['status', 'next_attempt_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_status_next_attempt', table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,50 @@
+"""add scheduler_locks and scheduler_job_runs
+
+Revision ID: n9o0p1q2r3s4
+Revises: m8n9o0p1q2r3
+Create Date: 2026-10-17
+
+Job leases so only one API instance runs each scheduled tick, and a log of job
+runtimes and outcomes.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = 'n9o0p1q2r3s4'
+down_revision: str | None = 'm8n9o0p1q2r3'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scheduler_locks',
+        sa.Column('job_id', sa.String(), nullable=False),
+        sa.Column('holder', sa.String(), nullable=False),
+        sa.Column('locked_until', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('job_id'),
+    )
+    op.create_table(
+        'scheduler_job_runs',
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.String(), nullable=False),
+        sa.Column('holder', sa.String(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('duration_ms', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('run_id'),
+    )
+    op.create_index(
+        'ix_scheduler_job_runs_job_started', 'scheduler_job_runs', ['job_id', 'started_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scheduler_job_runs_job_started', table_name='scheduler_job_runs')
+    op.drop_table('scheduler_job_runs')
+    op.drop_table('scheduler_locks')
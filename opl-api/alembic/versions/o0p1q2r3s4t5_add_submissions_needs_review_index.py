@@ -0,0 +1,34 @@
+"""add partial index for submissions awaiting review
+
+Revision ID: o0p1q2r3s4t5
+Revises: n9o0p1q2r3s4
+Create Date: 2026-10-17
+
+Lets the hourly escalate_score_mismatches job find stale needs_review
+submissions without scanning the whole submissions table.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = 'o0p1q2r3s4t5'
+down_revision: str | None = 'n9o0p1q2r3s4'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_match_score_submissions_needs_review',
+        'match_score_submissions',
+        ['status', 'needs_review_since'],
+        postgresql_where=sa.text("status = 'needs_review'"),
+        sqlite_where=sa.text("status = 'needs_review'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_match_score_submissions_needs_review', table_name='match_score_submissions')
@@ -0,0 +1,42 @@
+"""add player_blackouts
+
+Revision ID: p1q2r3s4t5u6
+Revises: o0p1q2r3s4t5
+Create Date: 2026-10-17
+
+Date ranges a player can't play, used by the round robin schedule optimizer.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = 'p1q2r3s4t5u6'
+down_revision: str | None = 'o0p1q2r3s4t5'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'player_blackouts',
+        sa.Column('blackout_id', sa.Integer(), nullable=False),
+        sa.Column('player_id', sa.Integer(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('reason', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['player_id'], ['players.player_id']),
+        sa.PrimaryKeyConstraint('blackout_id'),
+    )
+    op.create_index(
+        'ix_player_blackouts_player_dates',
+        'player_blackouts',
+        ['player_id', 'start_date', 'end_date'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_player_blackouts_player_dates', table_name='player_blackouts')
+    op.drop_table('player_blackouts')
@@ -0,0 +1,29 @@
+"""add sessions.weight_brackets
+
+Revision ID: q2r3s4t5u6v7
+Revises: p1q2r3s4t5u6
+Create Date: 2026-10-17
+
+Per-session match weight brackets; NULL keeps the league default table.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = 'q2r3s4t5u6v7'
+down_revision: str | None = 'p1q2r3s4t5u6'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'sessions', sa.Column('weight_brackets', sa.JSON(none_as_null=True), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('sessions', 'weight_brackets')
@@ -0,0 +1,29 @@
+"""add users.token_version
+
+Revision ID: r3s4t5u6v7w8
+Revises: q2r3s4t5u6v7
+Create Date: 2026-10-17
+
+Bumped to revoke a user's outstanding tokens; claims-based tokens carry it.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = 'r3s4t5u6v7w8'
+down_revision: str | None = 'q2r3s4t5u6v7'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
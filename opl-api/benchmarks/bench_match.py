@@ -0,0 +1,15 @@
+import pytest
+
+from routers.match import GameInput, _validate_games_for_race
+
+
+def _games(race, loser_wins):
+    return [GameInput(winner_id=1, loser_id=2, balls_remaining=3)] * race + [
+        GameInput(winner_id=2, loser_id=1, balls_remaining=3)
+    ] * loser_wins
+
+
+@pytest.mark.parametrize('race', [3, 5, 7])
+def test_validate_games_for_race(benchmark, race):
+    games = _games(race, race - 1)
+    benchmark(_validate_games_for_race, games, race)
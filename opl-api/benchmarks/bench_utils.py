@@ -0,0 +1,38 @@
+import random
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from utils import calculate_rating_change, get_match_weight, get_match_weights, schedule_round_robin
+
+RATING_PAIRS = [
+    (random.Random(i).randint(300, 900), random.Random(-i).randint(300, 900)) for i in range(1000)
+]
+
+
+@pytest.mark.parametrize('size', [8, 16, 64])
+def test_schedule_round_robin(benchmark, size):
+    players = [SimpleNamespace(player_id=i + 1, rating=400 + (i * 37) % 500) for i in range(size)]
+    matches = benchmark(schedule_round_robin, players, datetime(2025, 1, 6), 1, 1)
+    assert len(matches) == size * (size - 1)
+
+
+def test_get_match_weight(benchmark):
+    def run():
+        for r1, r2 in RATING_PAIRS:
+            get_match_weight(r1, r2)
+
+    benchmark(run)
+
+
+def test_get_match_weights_batch(benchmark):
+    assert len(benchmark(get_match_weights, RATING_PAIRS)) == len(RATING_PAIRS)
+
+
+def test_calculate_rating_change(benchmark):
+    def run():
+        for n in range(1000):
+            calculate_rating_change(n % 80, (n * 7) % 80, n % 9)
+
+    benchmark(run)
@@ -0,0 +1,6 @@
+"""pytest-benchmark microbenchmarks; run with ``make bench`` (files are bench_*.py)."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
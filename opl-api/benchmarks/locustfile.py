@@ -0,0 +1,126 @@
+"""Load test for the API hot paths against a synthetic league.
+
+Each simulated user logs in as a player with a match this week (from the manifest
+written by benchmarks/synthetic.py) and mixes the requests players actually make:
+their schedule and their division's week (GET /matches/), standings
+(GET /matches/scores/), their inbox (GET /messages/) and, less often, submitting
+or correcting their score (POST /matches/{id}/score/). Only player 1 of each match
+submits, so submissions stay pending and every POST takes the full write path.
+
+Run it against an API serving the generated database, e.g. via ``make bench-load``
+(SQLite) or ``make bench-load BENCH_DATABASE_URL=postgresql://localhost/opl_bench``.
+Per-endpoint latency percentiles and throughput are written to OPL_BENCH_RESULTS as
+JSON when the run ends.
+
+Usage:
+    OPL_BENCH_MANIFEST=benchmarks/results/league.json OPL_BENCH_RESULTS=benchmarks/results/load.json \\
+        locust -f benchmarks/locustfile.py --headless -u 50 -r 10 -t 60s --host http://127.0.0.1:8001
+"""
+
+import json
+import os
+import random
+import sys
+from datetime import UTC, datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from locust import HttpUser, between, events, task
+
+from services.auth import create_jwt
+
+MANIFEST = Path(os.environ.get('OPL_BENCH_MANIFEST', 'benchmarks/results/league.json'))
+RESULTS = os.environ.get('OPL_BENCH_RESULTS')
+# Recorded with the results so SQLite and Postgres runs can be told apart
+DATABASE_LABEL = os.environ.get('OPL_BENCH_DATABASE', 'sqlite')
+PERCENTILES = (0.5, 0.95, 0.99)
+
+_open_matches = json.loads(MANIFEST.read_text())['open_matches'] if MANIFEST.exists() else []
+
+
+class Player(HttpUser):
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        if not _open_matches:
+            raise RuntimeError(f'No open matches in {MANIFEST}; run benchmarks/synthetic.py first')
+        self.match = random.choice(_open_matches)
+        user = SimpleNamespace(
+            user_id=self.match['user_id'],
+            email=f'user{self.match["user_id"]}@bench.test',
+            is_admin=False,
+            player_id=self.match['player1_id'],
+            token_version=0,
+        )
+        self.client.headers['Authorization'] = f'Bearer {create_jwt(user)}'
+
+    @task(5)
+    def my_matches(self):
+        self.client.get(
+            f'/matches/?player_id={self.match["player1_id"]}&limit=50', name='/matches/?player_id'
+        )
+
+    @task(3)
+    def division_matches(self):
+        m = self.match
+        self.client.get(
+            f'/matches/?session_id={m["session_id"]}&division_id={m["division_id"]}&limit=100',
+            name='/matches/?division_id',
+        )
+
+    @task(3)
+    def standings(self):
+        self.client.get(
+            f'/matches/scores/?session_id={self.match["session_id"]}', name='/matches/scores/'
+        )
+
+    @task(3)
+    def inbox(self):
+        self.client.get('/messages/?limit=20', name='/messages/')
+
+    @task(1)
+    def submit_score(self):
+        me, opponent = self.match['player1_id'], self.match['player2_id']
+        losses = random.randint(0, 2)
+        games = [
+            {'winner_id': me, 'loser_id': opponent, 'balls_remaining': random.randint(1, 8)}
+        ] * 3
+        games += [
+            {'winner_id': opponent, 'loser_id': me, 'balls_remaining': random.randint(1, 8)}
+        ] * losses
+        self.client.post(
+            f'/matches/{self.match["match_id"]}/score/', json=games, name='/matches/{id}/score/'
+        )
+
+
+@events.test_stop.add_listener
+def write_results(environment, **_kwargs):
+    if not RESULTS:
+        return
+    stats = environment.stats
+
+    def summary(entry):
+        return {
+            'name': entry.name,
+            'method': entry.method,
+            'requests': entry.num_requests,
+            'failures': entry.num_failures,
+            'rps': round(entry.total_rps, 2),
+            'mean_ms': round(entry.avg_response_time, 2),
+            **{f'p{round(p * 100)}_ms': entry.get_response_time_percentile(p) for p in PERCENTILES},
+        }
+
+    report = {
+        'database': DATABASE_LABEL,
+        'host': environment.host,
+        'finished_at': datetime.now(UTC).isoformat(),
+        'users': environment.parsed_options.num_users if environment.parsed_options else None,
+        'endpoints': [
+            summary(e) for e in sorted(stats.entries.values(), key=lambda e: (e.name, e.method))
+        ],
+        'total': summary(stats.total),
+    }
+    Path(RESULTS).parent.mkdir(parents=True, exist_ok=True)
+    Path(RESULTS).write_text(json.dumps(report, indent=2))
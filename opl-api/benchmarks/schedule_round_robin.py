@@ -0,0 +1,115 @@
+"""Benchmark round robin scheduling for a large league.
+
+Schedules DIVISIONS divisions of PLAYERS players each as a double round robin,
+first into an empty session and then again as a reschedule (which also deletes
+the previous unplayed matches), and reports the time for each step. A final
+reschedule runs the schedule optimizer with --time-budget seconds on top. Runs the
+same code path as POST /matches/schedule-round-robin/ against a scratch
+database, never the configured one.
+
+Usage:
+    python benchmarks/schedule_round_robin.py [--divisions 10] [--players 64] [--database-url URL] [--time-budget 1.0]
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import Response
+from sqlalchemy import func, insert
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from models import Division, DivisionPlayer, Match, Player
+from models import Session as OPLSession
+from routers.match import ScheduleInput, schedule_round_robin
+from utils import round_robin_rows
+
+
+def seed(session: Session, divisions: int, players: int) -> int:
+    opl_session = OPLSession(name='Benchmark')
+    session.add(opl_session)
+    session.add_all(Division(name=f'Division {d + 1}') for d in range(divisions))
+    session.execute(
+        insert(Player),
+        [
+            {
+                'first_name': f'Player{i}',
+                'last_name': 'Bench',
+                'rating': 400 + (i * 37) % 500,
+                'games_played': i % 40,
+                'phone': '555-0000',
+                'email': f'p{i}@bench.test',
+            }
+            for i in range(divisions * players)
+        ],
+    )
+    session.flush()
+    division_ids = session.exec(select(Division.division_id).order_by(Division.division_id)).all()
+    player_ids = session.exec(select(Player.player_id).order_by(Player.player_id)).all()
+    session.execute(
+        insert(DivisionPlayer),
+        [
+            {'division_id': division_ids[i // players], 'player_id': pid}
+            for i, pid in enumerate(player_ids)
+        ],
+    )
+    session.commit()
+    return opl_session.session_id
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f'  {label:<28} {(time.perf_counter() - start) * 1000:8.1f} ms')
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark round robin scheduling')
+    parser.add_argument('--divisions', type=int, default=10)
+    parser.add_argument('--players', type=int, default=64, help='Players per division')
+    parser.add_argument(
+        '--database-url', default='sqlite://', help='Scratch database (tables are created)'
+    )
+    parser.add_argument(
+        '--time-budget', type=float, default=1.0, help='Optimizer seconds for the optimized run'
+    )
+    args = parser.parse_args()
+
+    engine = (
+        create_engine(args.database_url, poolclass=StaticPool)
+        if args.database_url == 'sqlite://'
+        else create_engine(args.database_url)
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session_id = seed(session, args.divisions, args.players)
+        body = ScheduleInput(
+            session_id=session_id, start_date=datetime(2025, 1, 6), optimizer='shuffle'
+        )
+        optimized = body.model_copy(update={'optimizer': 'anneal', 'time_budget': args.time_budget})
+        players = session.exec(select(Player).limit(args.players)).all()
+
+        print(f'{args.divisions} divisions x {args.players} players, double round robin')
+        timed(
+            'generate one division',
+            lambda: round_robin_rows(players, body.start_date, session_id, 1),
+        )
+        scheduled = timed(
+            'schedule (empty session)',
+            lambda: schedule_round_robin(body, Response(), session, None),
+        )
+        timed('reschedule', lambda: schedule_round_robin(body, Response(), session, None))
+        response = Response()
+        timed(
+            'reschedule, optimized',
+            lambda: schedule_round_robin(optimized, response, session, None),
+        )
+        print(f'  schedule cost: {response.headers["X-Schedule-Cost"]}')
+        stored = session.exec(select(func.count()).select_from(Match)).one()
+        print(f'  {len(scheduled)} matches scheduled, {stored} stored')
@@ -0,0 +1,349 @@
+"""Generate a synthetic league at production-like scale for benchmarks.
+
+The defaults produce 10k players, 200 sessions and about 1M games. Sessions start
+SESSION_SPACING_WEEKS apart and each plays a double round robin in divisions of
+DIVISION_SIZE. Every match scheduled before the current week is completed with a
+random race-to-3 result, in date order, with ratings carried forward exactly as
+complete_match would (until the game budget runs out). Matches from the current
+week on are left open, so the latest sessions are mid-season. Each player gets a
+linked user account, so load tests can log in as any player and submit scores.
+
+Rows go in through chunked Core executemany inserts. Standings are rebuilt from
+the completed matches. A manifest of the users, sessions and open matches is
+returned for the load test.
+
+Usage:
+    python benchmarks/synthetic.py --database-url URL [--players 10000] [--sessions 200] [--games 1000000] [--manifest PATH]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import bindparam, insert, update
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from models import (
+    Division,
+    DivisionPlayer,
+    Game,
+    Match,
+    Message,
+    MessageRecipient,
+    Player,
+    User,
+)
+from models import Session as OPLSession
+from services.standings import rebuild_standings
+from utils import calculate_rating_change, get_match_weights, round_robin_pairings, round_robin_rows
+
+DIVISION_SIZE = 16
+SESSION_SPACING_WEEKS = 4
+# Mean games in a race to 3 between evenly matched players
+GAMES_PER_MATCH = 4.125
+CHUNK_SIZE = 20_000
+ADMIN_EMAIL = 'admin@bench.test'
+
+
+def _insert(session: Session, table, rows: list[dict]) -> None:
+    for i in range(0, len(rows), CHUNK_SIZE):
+        session.execute(insert(table), rows[i : i + CHUNK_SIZE])
+
+
+def _ids(session: Session, column) -> list[int]:
+    return session.exec(select(column).order_by(column)).all()
+
+
+def generate_league(
+    session: Session,
+    players: int = 10_000,
+    sessions: int = 200,
+    games: int = 1_000_000,
+    seed: int = 0,
+) -> dict:
+    """Fill an empty database with a synthetic league; returns the load-test manifest."""
+    rng = random.Random(seed)
+    random.seed(seed)  # round_robin_rows shuffles with the module RNG
+    now = datetime.utcnow()
+    this_monday = (now - timedelta(days=now.weekday())).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    matches_per_division = len(round_robin_pairings(DIVISION_SIZE, double=True))
+    divisions_per_session = max(
+        1, round(games / (GAMES_PER_MATCH * sessions * matches_per_division))
+    )
+
+    _insert(
+        session,
+        Player.__table__,
+        [
+            {
+                'first_name': f'Player{i}',
+                'last_name': 'Bench',
+                'rating': rng.randint(400, 800),
+                'games_played': 0,
+                'phone': '555-0000',
+                'email': f'p{i}@bench.test',
+                'email_notifications': False,
+                'match_reminders': False,
+                'deleted': False,
+            }
+            for i in range(players)
+        ],
+    )
+    player_rows = session.exec(
+        select(Player.player_id, Player.rating).order_by(Player.player_id)
+    ).all()
+    player_ids = [row.player_id for row in player_rows]
+    rating = {row.player_id: row.rating for row in player_rows}
+    played = dict.fromkeys(player_ids, 0)
+    _insert(
+        session,
+        User.__table__,
+        [{'email': ADMIN_EMAIL, 'is_admin': True, 'player_id': None}]
+        + [
+            {'email': f'p{i}@bench.test', 'is_admin': False, 'player_id': pid}
+            for i, pid in enumerate(player_ids)
+        ],
+    )
+
+    # Sessions, each with its divisions and their double round robins
+    first_start = this_monday - timedelta(weeks=SESSION_SPACING_WEEKS * sessions)
+    _insert(
+        session,
+        OPLSession.__table__,
+        [
+            {
+                'name': f'Session {s + 1}',
+                'match_time': '19:00',
+                'dues': 10,
+                'active': True,
+                'deleted': False,
+            }
+            for s in range(sessions)
+        ],
+    )
+    session_ids = _ids(session, OPLSession.session_id)
+    _insert(
+        session,
+        Division.__table__,
+        [
+            {
+                'name': f'S{s + 1} Division {d + 1}',
+                'day_of_week': rng.randint(0, 4),
+                'active': True,
+                'deleted': False,
+            }
+            for s in range(sessions)
+            for d in range(divisions_per_session)
+        ],
+    )
+    division_rows = session.exec(
+        select(Division.division_id, Division.day_of_week).order_by(Division.division_id)
+    ).all()
+
+    memberships, matches = [], []
+    for d, division in enumerate(division_rows):
+        s = d // divisions_per_session
+        members = rng.sample(player_ids, DIVISION_SIZE)
+        memberships += [{'division_id': division.division_id, 'player_id': pid} for pid in members]
+        start = first_start + timedelta(
+            weeks=SESSION_SPACING_WEEKS * s, days=division.day_of_week, hours=19
+        )
+        matches += round_robin_rows(
+            [SimpleNamespace(player_id=pid, rating=rating[pid]) for pid in members],
+            start,
+            session_ids[s],
+            division.division_id,
+        )
+    _insert(session, DivisionPlayer.__table__, memberships)
+
+    # Play every past match in date order until the game budget runs out
+    matches.sort(key=lambda m: m['scheduled_date'])
+    game_rows = []
+    # Games get strictly increasing played_dates, so a replay in (played_date, game_id)
+    # order sees the same sequence even for players in two divisions on one night
+    clock = datetime.min
+    for m in matches:
+        m.update(
+            winner_id=None, loser_id=None, reminder_sent=False, deleted=False, score_status=None
+        )
+        if m['is_bye'] or m['scheduled_date'] >= this_monday or len(game_rows) >= games:
+            continue
+        p1, p2 = m['player1_id'], m['player2_id']
+        m['player1_rating'], m['player2_rating'] = rating[p1], rating[p2]
+        wins = {p1: 0, p2: 0}
+        while max(wins.values()) < m['race']:
+            winner, loser = (p1, p2) if rng.random() < 0.5 else (p2, p1)
+            balls = rng.randint(1, 8)
+            clock = max(
+                clock + timedelta(seconds=1),
+                m['scheduled_date'] + timedelta(minutes=10 * sum(wins.values())),
+            )
+            winner_change, loser_change = calculate_rating_change(
+                played[winner], played[loser], balls
+            )
+            game_rows.append(
+                {
+                    'winner_id': winner,
+                    'loser_id': loser,
+                    'winner_rating': rating[winner],
+                    'loser_rating': rating[loser],
+                    'winner_rating_change': winner_change,
+                    'loser_rating_change': loser_change,
+                    'balls_remaining': balls,
+                    'played_date': clock,
+                    'match': m,
+                }
+            )
+            rating[winner] += winner_change
+            rating[loser] += loser_change
+            played[winner] += 1
+            played[loser] += 1
+            wins[winner] += 1
+        m['winner_id'], m['loser_id'] = (p1, p2) if wins[p1] > wins[p2] else (p2, p1)
+        m['completed'] = True
+
+    # Weights follow the ratings the match was (or will be) played at
+    for m in matches:
+        if not m['completed']:
+            m['player1_rating'] = rating[m['player1_id']]
+            m['player2_rating'] = rating.get(m['player2_id'])
+    pairs = [m for m in matches if not m['is_bye']]
+    for m, (w1, w2) in zip(
+        pairs,
+        get_match_weights((m['player1_rating'], m['player2_rating']) for m in pairs),
+        strict=True,
+    ):
+        m['player1_weight'], m['player2_weight'] = w1, w2
+
+    # The database starts empty, so ids follow insertion order
+    _insert(session, Match.__table__, matches)
+    for m, match_id in zip(matches, _ids(session, Match.match_id), strict=True):
+        m['match_id'] = match_id
+    for g in game_rows:
+        g['match_id'] = g.pop('match')['match_id']
+    _insert(session, Game.__table__, game_rows)
+
+    session.execute(
+        update(Player.__table__)
+        .where(Player.__table__.c.player_id == bindparam('pid'))
+        .values(rating=bindparam('rating'), games_played=bindparam('played')),
+        [{'pid': pid, 'rating': rating[pid], 'played': played[pid]} for pid in player_ids],
+    )
+    for session_id in session_ids:
+        rebuild_standings(session, session_id)
+
+    # A few broadcasts per session and a direct message for a slice of players
+    admin_id = session.exec(select(User.user_id).where(User.email == ADMIN_EMAIL)).one()
+    _insert(
+        session,
+        Message.__table__,
+        [
+            {
+                'subject': f'Session {s + 1} update {k + 1}',
+                'body': 'Tables are reserved from 7pm.',
+                'sender_id': admin_id,
+                'recipient_type': 'league' if k == 0 else 'division',
+                'recipient_id': None
+                if k == 0
+                else division_rows[
+                    s * divisions_per_session + k % divisions_per_session
+                ].division_id,
+                'created_at': first_start + timedelta(weeks=SESSION_SPACING_WEEKS * s, days=k),
+            }
+            for s in range(sessions)
+            for k in range(3)
+        ],
+    )
+    direct = rng.sample(player_ids, min(len(player_ids), players // 5))
+    _insert(
+        session,
+        Message.__table__,
+        [
+            {
+                'subject': 'Dues reminder',
+                'body': 'Please settle your dues before the next match.',
+                'sender_id': admin_id,
+                'recipient_type': 'player',
+                'recipient_id': None,
+                'created_at': now - timedelta(days=rng.randint(0, 60)),
+            }
+            for _ in direct
+        ],
+    )
+    message_ids = _ids(session, Message.message_id)[-len(direct) :] if direct else []
+    _insert(
+        session,
+        MessageRecipient.__table__,
+        [
+            {'message_id': mid, 'player_id': pid, 'read_at': None}
+            for mid, pid in zip(message_ids, direct, strict=True)
+        ],
+    )
+    session.commit()
+
+    users = dict(
+        session.exec(select(User.player_id, User.user_id).where(User.player_id.is_not(None))).all()
+    )
+    week_end = this_monday + timedelta(days=7)
+    open_matches = [
+        {
+            'match_id': m['match_id'],
+            'session_id': m['session_id'],
+            'division_id': m['division_id'],
+            'user_id': users[m['player1_id']],
+            'player1_id': m['player1_id'],
+            'player2_id': m['player2_id'],
+        }
+        for m in matches
+        if not m['is_bye'] and not m['completed'] and this_monday <= m['scheduled_date'] < week_end
+    ]
+    return {
+        'players': len(player_ids),
+        'sessions': len(session_ids),
+        'divisions': len(division_rows),
+        'matches': len(matches),
+        'games': len(game_rows),
+        'admin_user_id': admin_id,
+        'session_ids': session_ids,
+        'division_ids': [d.division_id for d in division_rows],
+        'open_matches': open_matches,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic OPL league')
+    parser.add_argument(
+        '--database-url', required=True, help='Empty scratch database; tables are created'
+    )
+    parser.add_argument('--players', type=int, default=10_000)
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--games', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--manifest',
+        default='benchmarks/results/league.json',
+        help='Where to write the load-test manifest',
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    SQLModel.metadata.create_all(engine)
+    start = time.perf_counter()
+    with Session(engine) as session:
+        manifest = generate_league(session, args.players, args.sessions, args.games, args.seed)
+    Path(args.manifest).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.manifest).write_text(json.dumps(manifest))
+    print(
+        f'{manifest["players"]} players, {manifest["sessions"]} sessions, {manifest["divisions"]} divisions, '
+        f'{manifest["matches"]} matches, {manifest["games"]} games, {len(manifest["open_matches"])} open this week '
+        f'in {time.perf_counter() - start:.1f} s; manifest at {args.manifest}'
+    )
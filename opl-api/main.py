@@ -6,6 +6,7 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from routers.admin import router as admin_router
 from routers.auth import router as auth_router
 from routers.contact import router as contact_router
 from routers.division import router as division_router
@@ -13,10 +14,18 @@ from routers.game import router as game_router
 from routers.join import router as join_router
 from routers.match import router as match_router
 from routers.message import router as message_router
+from routers.metrics import router as metrics_router
 from routers.payment import router as payment_router
 from routers.player import router as player_router
 from routers.session import router as session_router
 from services.auth import DEMO_MODE, JWT_ALGORITHM, JWT_SECRET
+from services.database import async_engine
+from services.etag import ETagMiddleware
+from services.instrumentation import RequestStatsMiddleware
+from services.match_updates import MATCHES_UPDATED_HEADER
+from services.pagination import NEXT_CURSOR_HEADER
+from services.response_cache import start_cache_listener, stop_cache_listener
+from services.schedule_optimizer import SCHEDULE_COST_HEADER
 from services.scheduler import start_scheduler, stop_scheduler
 
 ALLOWED_ORIGINS = os.environ.get(
@@ -28,19 +37,26 @@ ALLOWED_ORIGINS = os.environ.get(
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     start_scheduler()
+    start_cache_listener()
     yield
+    stop_cache_listener()
     stop_scheduler()
+    await async_engine.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
 
+app.add_middleware(ETagMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, SCHEDULE_COST_HEADER, MATCHES_UPDATED_HEADER],
 )
+# Outermost, so Server-Timing covers the other middleware too
+app.add_middleware(RequestStatsMiddleware)
 
 if DEMO_MODE:
     @app.middleware("http")
@@ -59,6 +75,7 @@ if DEMO_MODE:
                     pass
         return await call_next(request)
 
+app.include_router(admin_router)
 app.include_router(auth_router)
 app.include_router(player_router)
 app.include_router(match_router)
@@ -69,6 +86,7 @@ app.include_router(payment_router)
 app.include_router(contact_router)
 app.include_router(join_router)
 app.include_router(session_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 def read_root():
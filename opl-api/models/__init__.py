@@ -1,17 +1,23 @@
+from models.blackout import PlayerBlackout
 from models.division import Division, DivisionPlayer
+from models.email_outbox import EmailOutbox
 from models.game import Game
 from models.match import Match
 from models.message import Message, MessageRecipient
 from models.payment import Payment
 from models.player import Player
+from models.scheduler import JobRun, SchedulerLock
 from models.score_submission import MatchScoreSubmission, ScoreSubmissionResponse
 from models.session import Session, SessionResponse
+from models.standing import Standing
 from models.user import User
 
 __all__ = [
     "Division",
     "DivisionPlayer",
+    "EmailOutbox",
     "Game",
+    "JobRun",
     "Match",
     "MatchScoreSubmission",
     "ScoreSubmissionResponse",
@@ -19,7 +25,10 @@ __all__ = [
     "MessageRecipient",
     "Payment",
     "Player",
+    "PlayerBlackout",
+    "SchedulerLock",
     "Session",
     "SessionResponse",
+    "Standing",
     "User",
 ]
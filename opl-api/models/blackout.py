@@ -0,0 +1,18 @@
+from datetime import date
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+# Dates a player can't play; the round robin optimizer schedules around them
+class PlayerBlackout(SQLModel, table=True):
+    __tablename__ = 'player_blackouts'
+    __table_args__ = (
+        Index('ix_player_blackouts_player_dates', 'player_id', 'start_date', 'end_date'),
+    )
+    blackout_id: int | None = Field(primary_key=True)
+    player_id: int = Field(foreign_key='players.player_id')
+    # Inclusive range; a single day has start_date == end_date
+    start_date: date
+    end_date: date
+    reason: str | None = Field(default=None)
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+# One outbound email to one address, drained by services/email_outbox.py
+class EmailOutbox(SQLModel, table=True):
+    __tablename__ = 'email_outbox'
+    __table_args__ = (Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),)
+    email_id: int | None = Field(primary_key=True)
+    to_address: str
+    subject: str
+    # Rendered HTML, so a broadcast is rendered once rather than per recipient
+    html: str
+    # "pending" | "sending" | "sent" | "failed"
+    status: str = Field(default='pending')
+    attempts: int = Field(default=0)
+    # When a pending row is next due; for a "sending" row, when its claim lapses
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    last_error: str | None = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: datetime | None = Field(default=None)
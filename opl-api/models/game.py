@@ -1,12 +1,18 @@
 from datetime import datetime
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class Game(SQLModel, table=True):
     __tablename__ = "games"
+    __table_args__ = (
+        Index("ix_games_winner_played", "winner_id", "played_date"),
+        Index("ix_games_loser_played", "loser_id", "played_date"),
+        Index("ix_games_played_date", "played_date", "game_id"),
+    )
     game_id: int | None = Field(primary_key=True)
-    match_id: int = Field(foreign_key="matches.match_id")
+    match_id: int = Field(foreign_key="matches.match_id", index=True)
     winner_id: int = Field(foreign_key="players.player_id")
     loser_id: int = Field(foreign_key="players.player_id")
     winner_rating: int
@@ -1,10 +1,24 @@
 from datetime import datetime
 
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel
 
 
 class Match(SQLModel, table=True):
     __tablename__ = "matches"
+    __table_args__ = (
+        Index("ix_matches_deleted_session_date", "deleted", "session_id", "scheduled_date"),
+        Index("ix_matches_division_date", "division_id", "scheduled_date"),
+        Index("ix_matches_player1_completed", "player1_id", "completed"),
+        Index("ix_matches_player2_completed", "player2_id", "completed"),
+        # Only upcoming matches still waiting on a reminder (send_match_reminders)
+        Index(
+            "ix_matches_reminder_due",
+            "scheduled_date",
+            postgresql_where=text("completed = false AND reminder_sent = false"),
+            sqlite_where=text("completed = 0 AND reminder_sent = 0"),
+        ),
+    )
     match_id: int | None = Field(primary_key=True)
     session_id: int | None = Field(default=None, foreign_key="sessions.session_id")
     division_id: int = Field(foreign_key="divisions.division_id")
@@ -26,3 +40,6 @@ class Match(SQLModel, table=True):
     deleted: bool = Field(default=False)
     # "pending" | "confirmed" | "disputed" | None
     score_status: str | None = Field(default=None)
+    # Bumped whenever a score submission or score_status changes; backs the ETag
+    # on GET /matches/{id}/score/ so polling clients can revalidate cheaply
+    score_version: int = Field(default=0)
@@ -1,10 +1,14 @@
 from datetime import datetime
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class Message(SQLModel, table=True):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_created", "created_at", "message_id"),
+    )
     message_id: int | None = Field(primary_key=True, index=True)
     subject: str
     body: str
@@ -16,6 +20,10 @@ class Message(SQLModel, table=True):
 
 class MessageRecipient(SQLModel, table=True):
     __tablename__ = "message_recipients"
+    __table_args__ = (
+        # Inbox read state and the unread badge count
+        Index("ix_message_recipients_player_read", "player_id", "read_at"),
+    )
     id: int | None = Field(primary_key=True)
     message_id: int = Field(foreign_key="messages.message_id")
     player_id: int = Field(foreign_key="players.player_id")
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+# Lease on a scheduled job; the holder runs it until locked_until passes
+class SchedulerLock(SQLModel, table=True):
+    __tablename__ = 'scheduler_locks'
+    job_id: str = Field(primary_key=True)
+    # "<machine>:<pid>" of the instance that last took the lease
+    holder: str
+    locked_until: datetime
+
+
+# One execution of a scheduled job, for runtime and failure tracking
+class JobRun(SQLModel, table=True):
+    __tablename__ = 'scheduler_job_runs'
+    __table_args__ = (Index('ix_scheduler_job_runs_job_started', 'job_id', 'started_at'),)
+    run_id: int | None = Field(primary_key=True)
+    job_id: str
+    holder: str
+    started_at: datetime
+    duration_ms: int
+    # "ok" | "error"
+    status: str
+    error: str | None = Field(default=None)
@@ -1,11 +1,22 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel
 
 
 class MatchScoreSubmission(SQLModel, table=True):
     __tablename__ = "match_score_submissions"
+    __table_args__ = (
+        # Only submissions awaiting review (escalate_score_mismatches)
+        Index(
+            "ix_match_score_submissions_needs_review",
+            "status",
+            "needs_review_since",
+            postgresql_where=text("status = 'needs_review'"),
+            sqlite_where=text("status = 'needs_review'"),
+        ),
+    )
     submission_id: int | None = Field(primary_key=True)
     match_id: int = Field(foreign_key="matches.match_id", index=True)
     submitted_by_player_id: int = Field(foreign_key="players.player_id")
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from sqlalchemy import JSON, Column
 from sqlmodel import Field, SQLModel
 
 
@@ -10,6 +11,9 @@ class Session(SQLModel, table=True):
     dues: int = Field(default=10)  # dues in dollars; 0 = no dues
     active: bool = Field(default=True)
     deleted: bool = Field(default=False)
+    # Match weight brackets, [[max_diff, high, low], ..., [null, high, low]];
+    # None = league default (utils.WEIGHT_BRACKETS)
+    weight_brackets: list[list[int | None]] | None = Field(default=None, sa_column=Column(JSON(none_as_null=True)))
 
 
 class SessionResponse(BaseModel):
@@ -19,5 +23,6 @@ class SessionResponse(BaseModel):
     dues: int
     active: bool
     deleted: bool
+    weight_brackets: list[list[int | None]] | None = None
     start_date: str | None = None
     end_date: str | None = None
@@ -0,0 +1,17 @@
+from sqlmodel import Field, SQLModel
+
+
+# Running 3/2/1 standings per player, maintained as matches are completed
+class Standing(SQLModel, table=True):
+    __tablename__ = 'standings'
+    session_id: int = Field(foreign_key='sessions.session_id', primary_key=True)
+    division_id: int = Field(foreign_key='divisions.division_id', primary_key=True)
+    player_id: int = Field(foreign_key='players.player_id', primary_key=True)
+    points: int = Field(default=0)
+    match_wins: int = Field(default=0)
+    match_losses: int = Field(default=0)
+    shutouts: int = Field(default=0)
+    # Matches lost after reaching the hill (one game short of the race), worth 1pt
+    hill_losses: int = Field(default=0)
+    games_won: int = Field(default=0)
+    games_lost: int = Field(default=0)
@@ -10,3 +10,5 @@ class User(SQLModel, table=True):
     picture: str | None = Field(default=None)
     is_admin: bool = Field(default=False)
     player_id: int | None = Field(default=None, foreign_key="players.player_id")
+    # Bumped by revoke_tokens; tokens carrying an older version are rejected
+    token_version: int = Field(default=0)
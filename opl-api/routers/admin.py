@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlmodel import Session
+
+from models import User
+from services.auth import require_admin, user_cache_stats
+from services.database import get_session, pool_stats
+from services.email_outbox import outbox_stats
+from services.job_lock import job_stats
+from services.rating_simulator import load_snapshot, simulate, simulation_report
+from services.response_cache import response_cache_stats
+from utils import RATING_K_BASE, RATING_K_DECAY, KFactorTable
+
+
+class RatingSimulationInput(BaseModel):
+    k_base: float = RATING_K_BASE
+    k_decay: float = RATING_K_DECAY
+    # Trajectories for these players; omit for every player with games
+    player_ids: list[int] | None = None
+
+
+router = APIRouter(prefix='/admin')
+
+
+@router.get('/stats/')
+def get_stats(_admin: User = Depends(require_admin)):
+    """Operational counters for sizing and tuning the API."""
+    return {
+        'auth_cache': user_cache_stats(),
+        'db_pool': pool_stats(),
+        'response_cache': response_cache_stats(),
+    }
+
+
+@router.get('/email-outbox/')
+def get_email_outbox(
+    session: Session = Depends(get_session), _admin: User = Depends(require_admin)
+):
+    """Outbound email queue depth by status."""
+    return outbox_stats(session)
+
+
+@router.get('/jobs/')
+def get_jobs(session: Session = Depends(get_session), _admin: User = Depends(require_admin)):
+    """Current lease holder and last run of each scheduled job."""
+    return job_stats(session)
+
+
+@router.post('/rating-simulation/')
+def simulate_ratings(
+    body: RatingSimulationInput,
+    session: Session = Depends(get_session),
+    _admin: User = Depends(require_admin),
+):
+    """Replay every game under another K-factor formula; nothing is written."""
+    try:
+        k_factors = KFactorTable(body.k_base, body.k_decay)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return simulation_report(simulate(load_snapshot(session), k_factors), body.player_ids)
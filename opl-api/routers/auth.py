@@ -12,6 +12,7 @@ from services.auth import (
     DEMO_PLAYER_EMAIL,
     create_jwt,
     get_current_user,
+    invalidate_user,
     verify_google_token,
 )
 from services.database import get_session
@@ -64,6 +65,7 @@ def login(request: LoginRequest, session: Session = Depends(get_session)):
 
     session.commit()
     session.refresh(user)
+    invalidate_user(user.user_id)
 
     token = create_jwt(user)
     return LoginResponse(token=token, user=user)
@@ -89,5 +91,6 @@ def demo_login(request: DemoLoginRequest, session: Session = Depends(get_session
 
 
 @router.get("/me", response_model=User)
-def get_me(user: User = Depends(get_current_user)):
-    return user
+def get_me(user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    # The cached/claims-based user may lack profile fields, so read the row fresh
+    return session.get(User, user.user_id) or user
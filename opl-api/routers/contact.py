@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, field_validator
+from sqlmodel import Session
 
-from services.email_service import send_email
+from services.database import get_session
+from services.email_outbox import enqueue_email
 from services.recaptcha import verify_recaptcha
 
 router = APIRouter(prefix="/contact", tags=["contact"])
@@ -30,7 +32,7 @@ class ContactRequest(BaseModel):
 
 
 @router.post("/")
-async def submit_contact(data: ContactRequest):
+async def submit_contact(data: ContactRequest, session: Session = Depends(get_session)):
     if not await verify_recaptcha(data.recaptcha_token):
         raise HTTPException(status_code=400, detail="reCAPTCHA verification failed")
 
@@ -39,5 +41,6 @@ async def submit_contact(data: ContactRequest):
 - **Reason:** {data.reason}
 - **Message:** {data.message}
 """
-    await send_email(["support@csopl.com"], f"Contact Form - {data.reason}", body)
+    enqueue_email(session, ["support@csopl.com"], f"Contact Form - {data.reason}", body)
+    session.commit()
     return {"message": "Your message has been sent successfully."}
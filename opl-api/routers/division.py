@@ -1,13 +1,14 @@
 
-from datetime import timedelta
-
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
+from sqlalchemy import delete
 from sqlmodel import Session, select
 
-from models import Division, DivisionPlayer, Match, Player, User
+from models import Division, DivisionPlayer, Match, Player, Standing, User
 from services.auth import get_current_user, require_admin
 from services.database import get_session
+from services.match_updates import MATCHES_UPDATED_HEADER, set_match_weekday, soft_delete_matches
+from services.response_cache import DIVISIONS, cached, mark_stale
 
 
 class DivisionUpdate(BaseModel):
@@ -23,10 +24,13 @@ router = APIRouter(
 
 @router.get("/", response_model=list[Division])
 def get_divisions(active: bool | None = None, session: Session = Depends(get_session), _user: User = Depends(get_current_user)):
-    query = select(Division).where(Division.deleted == False)  # noqa: E712
-    if active is not None:
-        query = query.where(Division.active == active)
-    return session.exec(query).all()
+    def load():
+        query = select(Division).where(Division.deleted == False)  # noqa: E712
+        if active is not None:
+            query = query.where(Division.active == active)
+        return [Division.model_validate(d.model_dump()) for d in session.exec(query)]
+
+    return cached(DIVISIONS, active, load)
 
 
 @router.get("/{division_id}/", response_model=Division)
@@ -40,13 +44,14 @@ def get_division(division_id: int, session: Session = Depends(get_session), _use
 @router.post("/", response_model=Division)
 def create_division(division: Division, session: Session = Depends(get_session), _admin: User = Depends(require_admin)):
     session.add(division)
+    mark_stale(session, DIVISIONS)
     session.commit()
     session.refresh(division)
     return division
 
 
 @router.put("/{division_id}/", response_model=Division)
-def update_division(division_id: int, body: DivisionUpdate, session: Session = Depends(get_session), _admin: User = Depends(require_admin)):
+def update_division(division_id: int, body: DivisionUpdate, response: Response, session: Session = Depends(get_session), _admin: User = Depends(require_admin)):
     db_division = session.get(Division, division_id)
     if not db_division or db_division.deleted:
         raise HTTPException(status_code=404, detail="Division not found")
@@ -55,25 +60,13 @@ def update_division(division_id: int, body: DivisionUpdate, session: Session = D
     db_division.day_of_week = body.day_of_week
     db_division.active = body.active
 
+    updated = 0
     if body.update_existing_matches:
-        matches = session.exec(
-            select(Match).where(
-                Match.division_id == division_id,
-                Match.completed == False,  # noqa: E712
-                Match.deleted == False,  # noqa: E712
-            )
-        ).all()
-        for m in matches:
-            monday = m.scheduled_date - timedelta(days=m.scheduled_date.weekday())
-            if body.day_of_week is None:
-                m.is_weekly = True
-                m.scheduled_date = monday
-            else:
-                m.is_weekly = False
-                m.scheduled_date = monday + timedelta(days=body.day_of_week)
-            session.add(m)
+        updated = set_match_weekday(session, division_id, body.day_of_week)
+    response.headers[MATCHES_UPDATED_HEADER] = str(updated)
 
     session.add(db_division)
+    mark_stale(session, DIVISIONS)
     session.commit()
     session.refresh(db_division)
     return db_division
@@ -143,12 +136,9 @@ def delete_division(division_id: int, session: Session = Depends(get_session), _
         raise HTTPException(status_code=404, detail="Division not found")
     db_division.deleted = True
     session.add(db_division)
+    mark_stale(session, DIVISIONS)
     # Cascade: soft-delete all matches for this division
-    matches = session.exec(
-        select(Match).where(Match.division_id == division_id, Match.deleted == False)  # noqa: E712
-    ).all()
-    for m in matches:
-        m.deleted = True
-        session.add(m)
+    matches = soft_delete_matches(session, Match.division_id == division_id)
+    standings = session.execute(delete(Standing).where(Standing.division_id == division_id)).rowcount
     session.commit()
-    return {"ok": True}
+    return {"ok": True, "matches_deleted": matches, "standings_deleted": standings}
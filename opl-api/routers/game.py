@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from models import Game, User
+from models import Game, Match, User
 from services.auth import get_current_user, require_admin
-from services.database import get_session
+from services.database import get_async_session, get_session
+from services.pagination import MAX_PAGE_SIZE, keyset, page
+from services.standings import record_match, revert_stored_match
 
 router = APIRouter(
     prefix="/games"
@@ -11,17 +14,20 @@ router = APIRouter(
 
 
 @router.get("/", response_model=list[Game])
-def get_games(
+async def get_games(
+    response: Response,
     game_id: int | None = None,
     match_id: int | None = None,
     player_id: int | None = None,
-    session: Session = Depends(get_session),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    session: AsyncSession = Depends(get_async_session),
     _user: User = Depends(get_current_user),
 ):
     if game_id is None and match_id is None and player_id is None:
         raise HTTPException(status_code=422, detail="At least one of game_id, match_id, or player_id is required")
 
-    query = select(Game).order_by(Game.played_date)
+    query = select(Game)
     if game_id is not None:
         query = query.where(Game.game_id == game_id)
     if match_id is not None:
@@ -29,7 +35,8 @@ def get_games(
     if player_id is not None:
         query = query.where((Game.winner_id == player_id) | (Game.loser_id == player_id))
 
-    return session.exec(query).all()
+    query = keyset(query, Game.played_date, Game.game_id, limit, after)
+    return page((await session.exec(query)).all(), limit, response, "played_date", "game_id")
 
 
 @router.put("/{game_id}/", response_model=Game)
@@ -37,9 +44,18 @@ def update_game(game_id: int, game: Game, session: Session = Depends(get_session
     db_game = session.get(Game, game_id)
     if not db_game:
         raise HTTPException(status_code=404, detail="Game not found")
+
+    # Editing a game can flip the match result, so re-derive the standings around it
+    db_match = session.get(Match, db_game.match_id)
+    if db_match:
+        revert_stored_match(session, db_match)
     for key, value in game.model_dump(exclude={"game_id"}).items():
         setattr(db_game, key, value)
     session.add(db_game)
+    session.flush()
+    if db_match and db_match.completed:
+        winner_ids = session.exec(select(Game.winner_id).where(Game.match_id == db_match.match_id)).all()
+        record_match(session, db_match, list(winner_ids))
     session.commit()
     session.refresh(db_game)
     return db_game
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, EmailStr, field_validator
+from sqlmodel import Session
 
-from services.email_service import send_email
+from services.database import get_session
+from services.email_outbox import enqueue_email
 from services.recaptcha import verify_recaptcha
 
 router = APIRouter(prefix="/join", tags=["join"])
@@ -28,7 +30,7 @@ class JoinRequest(BaseModel):
 
 
 @router.post("/")
-async def submit_join_request(data: JoinRequest):
+async def submit_join_request(data: JoinRequest, session: Session = Depends(get_session)):
     if not await verify_recaptcha(data.recaptcha_token):
         raise HTTPException(status_code=400, detail="reCAPTCHA verification failed")
 
@@ -39,5 +41,6 @@ async def submit_join_request(data: JoinRequest):
 - **Phone:** {data.phone}
 - **Preferred Nights:** {', '.join(data.nights)}
 """
-    await send_email(["joincsopl@csopl.com"], "New Join Request - CSOPL", body)
+    enqueue_email(session, ["joincsopl@csopl.com"], "New Join Request - CSOPL", body)
+    session.commit()
     return {"message": "Your request has been submitted successfully."}
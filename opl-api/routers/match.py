@@ -1,15 +1,32 @@
 import json
 import os
 from datetime import date as date_type
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, func, insert, or_
 from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from models import Division, DivisionPlayer, Game, Match, MatchScoreSubmission, Message, MessageRecipient, Player, ScoreSubmissionResponse, Session, User
+from models import Division, DivisionPlayer, Game, Match, MatchScoreSubmission, Message, MessageRecipient, Player, ScoreSubmissionResponse, Session, Standing, User
 from services.auth import get_current_user, require_admin
-from services.database import get_session
+from services.database import get_async_session, get_session
+from services.etag import CACHE_CONTROL, etag_matches, make_etag
+from services.pagination import MAX_PAGE_SIZE, keyset, page
+from services.response_cache import SESSIONS, mark_stale
+from services.schedule_optimizer import (
+    ENGINES,
+    SCHEDULE_COST_HEADER,
+    SCHEDULE_OPTIMIZER_MAX_SECONDS,
+    SCHEDULE_OPTIMIZER_SECONDS,
+    format_cost,
+    load_blackouts,
+    optimize_schedule,
+    previous_session_history,
+    schedule_problem,
+)
+from services.scoring import complete_match, propagate_ratings
+from services.standings import record_match, revert_match, revert_stored_match
 
 
 class GameInput(SQLModel):
@@ -23,6 +40,10 @@ class ScheduleInput(SQLModel):
     start_date: datetime
     double: bool = True
     race: int = 3
+    # Scheduling engine from services.schedule_optimizer.ENGINES
+    optimizer: str = "anneal"
+    # Search seconds across all divisions; defaults to SCHEDULE_OPTIMIZER_SECONDS
+    time_budget: float | None = None
 
 
 class PlayerScore(SQLModel):
@@ -36,7 +57,8 @@ router = APIRouter(
 
 
 @router.get("/", response_model=list[Match])
-def get_matches(
+async def get_matches(
+    response: Response,
     start_date: date_type | None = None,
     end_date: date_type | None = None,
     player_id: int | None = None,
@@ -44,7 +66,9 @@ def get_matches(
     session_id: int | None = None,
     division_id: int | None = None,
     completed: bool | None = None,
-    session: Session = Depends(get_session),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    session: AsyncSession = Depends(get_async_session),
     _user: User = Depends(get_current_user),
 ):
     if start_date is None and player_id is None and match_id is None and session_id is None and division_id is None:
@@ -59,118 +83,124 @@ def get_matches(
         query = query.where(Match.division_id == division_id)
     if player_id is not None:
         query = query.where(or_(Match.player1_id == player_id, Match.player2_id == player_id))
+    # Compare the raw column against day boundaries so the scheduled_date indexes apply
     if start_date is not None:
-        query = query.where(func.date(Match.scheduled_date) >= start_date)
+        query = query.where(Match.scheduled_date >= datetime.combine(start_date, time.min))
     if end_date is not None:
-        query = query.where(func.date(Match.scheduled_date) <= end_date)
+        query = query.where(Match.scheduled_date < datetime.combine(end_date + timedelta(days=1), time.min))
     if completed is not None:
         query = query.where(Match.completed == completed)
 
-    return session.exec(query.order_by(Match.scheduled_date)).all()
+    query = keyset(query, Match.scheduled_date, Match.match_id, limit, after)
+    return page((await session.exec(query)).all(), limit, response, "scheduled_date", "match_id")
 
 
 @router.get("/scores/", response_model=list[PlayerScore])
-def get_scores(
+async def get_scores(
     session_id: int,
     division_id: int | None = None,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     _user: User = Depends(get_current_user),
 ):
-    query = select(Match).where(Match.session_id == session_id, Match.completed, Match.deleted == False)  # noqa: E712
+    # Standings are maintained incrementally as matches complete (services/standings.py)
+    points = func.sum(Standing.points)
+    query = (
+        select(Standing.player_id, points)
+        .where(Standing.session_id == session_id)
+        .group_by(Standing.player_id)
+        .having(points > 0)
+    )
     if division_id is not None:
-        query = query.where(Match.division_id == division_id)
-    matches = session.exec(query).all()
-    match_ids = [m.match_id for m in matches]
-    if not match_ids:
-        return []
-
-    games = session.exec(select(Game).where(Game.match_id.in_(match_ids))).all()
-
-    # Group game wins by match and player
-    match_player_wins: dict[int, dict[int, int]] = {}
-    for game in games:
-        wins = match_player_wins.setdefault(game.match_id, {})
-        wins[game.winner_id] = wins.get(game.winner_id, 0) + 1
-
-    # Calculate scores per match (race-agnostic):
-    # - Shutout (loser won 0 games): winner gets 3pts
-    # - Non-shutout: winner gets 2pts
-    # - Loser reached the hill (1 game from winning): loser gets 1pt
-    player_scores: dict[int, int] = {}
-    for wins_by_player in match_player_wins.values():
-        sorted_players = sorted(wins_by_player.items(), key=lambda x: x[1], reverse=True)
-        winner_id, winner_wins = sorted_players[0]
-        loser_wins = sorted_players[1][1] if len(sorted_players) > 1 else 0
-
-        if loser_wins == 0:
-            player_scores[winner_id] = player_scores.get(winner_id, 0) + 3
-        else:
-            player_scores[winner_id] = player_scores.get(winner_id, 0) + 2
-            if loser_wins == winner_wins - 1:
-                loser_id = sorted_players[1][0]
-                player_scores[loser_id] = player_scores.get(loser_id, 0) + 1
-
-    return [PlayerScore(player_id=pid, score=s) for pid, s in player_scores.items()]
+        query = query.where(Standing.division_id == division_id)
+
+    return [PlayerScore(player_id=pid, score=score) for pid, score in (await session.exec(query)).all()]
 
 
 @router.post("/schedule-round-robin/", response_model=list[Match])
 def schedule_round_robin(
     body: ScheduleInput,
+    response: Response,
     session: Session = Depends(get_session),
     _admin: User = Depends(require_admin),
 ):
+    """Replace the session's unplayed matches with a fresh round robin per division.
+
+    Each division's schedule comes from the chosen optimizer engine, which works
+    around player blackouts, home/away balance carried over from the previous
+    session, bye balance and repeat opponents. The summed objective is returned
+    in the X-Schedule-Cost header.
+
+    One DELETE for the old matches, one query for every division's players and one
+    bulk INSERT ... RETURNING for the new schedule, however large the league.
+    """
     from models import Session as SessionModel
-    from utils import schedule_round_robin as generate_schedule
+    from utils import WeightTable, round_robin_rows
 
+    if body.optimizer not in ENGINES:
+        raise HTTPException(status_code=422, detail=f"Unknown optimizer '{body.optimizer}'; expected one of: {', '.join(ENGINES)}")
     opl_session = session.get(SessionModel, body.session_id)
     if not opl_session:
         raise HTTPException(status_code=404, detail=f"Session {body.session_id} not found")
 
     # Delete uncompleted matches for this session
-    old_matches = session.exec(
-        select(Match).where(Match.session_id == body.session_id, Match.completed == False)  # noqa: E712
-    ).all()
-    for m in old_matches:
-        session.delete(m)
+    session.execute(
+        delete(Match).where(Match.session_id == body.session_id, Match.completed == False)  # noqa: E712
+    )
 
     # Schedule matches for each active, non-deleted division
     divisions = session.exec(
         select(Division).where(Division.active, Division.deleted == False)  # noqa: E712
     ).all()
-    all_matches = []
-    for division in divisions:
-        players = session.exec(
-            select(Player)
-            .join(DivisionPlayer, Player.player_id == DivisionPlayer.player_id)
-            .where(DivisionPlayer.division_id == division.division_id)
-            .where(Player.deleted == False)  # noqa: E712
-        ).all()
-        if not players:
-            continue
-        is_weekly = division.day_of_week is None
-        if is_weekly:
-            # Snap to Monday of the start week
-            div_start_date = body.start_date - timedelta(days=body.start_date.weekday())
-        else:
-            # Snap to the correct day of week within the start week
-            monday = body.start_date - timedelta(days=body.start_date.weekday())
-            div_start_date = monday + timedelta(days=division.day_of_week)
-        matches = generate_schedule(players, div_start_date, body.session_id, division.division_id, double=body.double, is_weekly=is_weekly, race=body.race)
-        all_matches.extend(matches)
-
-    if not all_matches:
+    members: dict[int, list[Player]] = {}
+    for division_id, player in session.exec(
+        select(DivisionPlayer.division_id, Player)
+        .join(Player, Player.player_id == DivisionPlayer.player_id)
+        .where(DivisionPlayer.division_id.in_([d.division_id for d in divisions]))
+        .where(Player.deleted == False)  # noqa: E712
+        .order_by(DivisionPlayer.division_id, Player.player_id)
+    ).all():
+        members.setdefault(division_id, []).append(player)
+    divisions = [d for d in divisions if members.get(d.division_id)]
+    if not divisions:
         raise HTTPException(status_code=404, detail="No players found in any division")
 
-    session.add_all(all_matches)
+    monday = body.start_date - timedelta(days=body.start_date.weekday())
+    weights = WeightTable.from_json(opl_session.weight_brackets)
+    history = previous_session_history(session, body.session_id)
+    blackouts = load_blackouts(session, [p.player_id for ps in members.values() for p in ps], monday.date())
+    budget = SCHEDULE_OPTIMIZER_SECONDS if body.time_budget is None else body.time_budget
+    seconds = min(max(budget, 0.0), SCHEDULE_OPTIMIZER_MAX_SECONDS) / len(divisions)
+
+    rows = []
+    total_cost: dict[str, float] = {}
+    for division in divisions:
+        players = members[division.division_id]
+        is_weekly = division.day_of_week is None
+        # Weekly divisions start on the Monday of the start week, others on their day
+        div_start_date = monday if is_weekly else monday + timedelta(days=division.day_of_week)
+        problem = schedule_problem(players, div_start_date, double=body.double, is_weekly=is_weekly, blackouts=blackouts, history=history)
+        table, cost = optimize_schedule(problem, engine=body.optimizer, seconds=seconds)
+        for term, value in cost.items():
+            total_cost[term] = total_cost.get(term, 0.0) + value
+        rows.extend(round_robin_rows(players, div_start_date, body.session_id, division.division_id, double=body.double, is_weekly=is_weekly, race=body.race, table=table, weights=weights))
+
+    # Core insert on the table: skips the ORM bulk path, and the returned rows are
+    # plain mappings, so nothing is refreshed after the commit
+    matches = session.execute(
+        insert(Match.__table__).returning(*Match.__table__.columns),
+        rows,
+    ).mappings().all()
+    # New matches can move the sessions' start and end dates
+    mark_stale(session, SESSIONS)
     session.commit()
-    for match in all_matches:
-        session.refresh(match)
-    return all_matches
+    response.headers[SCHEDULE_COST_HEADER] = format_cost(total_cost)
+    return matches
 
 
 @router.post("/", response_model=Match)
 def create_match(match: Match, session: Session = Depends(get_session), _admin: User = Depends(require_admin)):
     session.add(match)
+    mark_stale(session, SESSIONS)
     session.commit()
     session.refresh(match)
     return match
@@ -184,80 +214,7 @@ def update_match(match_id: int, games: list[GameInput], session: Session = Depen
 
     _validate_games_for_race(games, db_match.race)
 
-    from utils import calculate_rating_change, get_match_weight
-
-    player1 = session.get(Player, db_match.player1_id)
-    player2 = session.get(Player, db_match.player2_id)
-    db_match.player1_rating = player1.rating if player1 else db_match.player1_rating
-    db_match.player2_rating = player2.rating if player2 else db_match.player2_rating
-
-    # Recalculate weights to match the actual ratings at play time
-    if player1 and player2:
-        w1, w2 = get_match_weight(player1.rating, player2.rating)
-        db_match.player1_weight = w1
-        db_match.player2_weight = w2
-
-    for game_input in games:
-        winner = session.get(Player, game_input.winner_id)
-        loser = session.get(Player, game_input.loser_id)
-
-        winner_change, loser_change = calculate_rating_change(
-            winner.games_played, loser.games_played, game_input.balls_remaining
-        )
-
-        session.add(Game(
-            match_id=match_id,
-            winner_id=game_input.winner_id,
-            loser_id=game_input.loser_id,
-            winner_rating=winner.rating,
-            loser_rating=loser.rating,
-            winner_rating_change=winner_change,
-            loser_rating_change=loser_change,
-            balls_remaining=game_input.balls_remaining,
-            played_date=datetime.now(),
-        ))
-
-        winner.rating += winner_change
-        loser.rating += loser_change
-        winner.games_played += 1
-        loser.games_played += 1
-
-    # Determine match winner by counting game wins
-    game_wins: dict[int, int] = {}
-    for game_input in games:
-        game_wins[game_input.winner_id] = game_wins.get(game_input.winner_id, 0) + 1
-    if game_wins:
-        db_match.winner_id = max(game_wins, key=game_wins.get)
-        db_match.loser_id = (
-            db_match.player2_id if db_match.winner_id == db_match.player1_id else db_match.player1_id
-        )
-
-    db_match.completed = True
-    session.add(db_match)
-
-    # Update ratings in uncompleted, non-deleted matches for both players
-    uncompleted_matches = session.exec(
-        select(Match).where(
-            not Match.completed,
-            Match.deleted == False,  # noqa: E712
-            or_(
-                Match.player1_id == player1.player_id,
-                Match.player2_id == player1.player_id,
-                Match.player1_id == player2.player_id,
-                Match.player2_id == player2.player_id,
-            )
-        )
-    ).all()
-
-    for m in uncompleted_matches:
-        if m.player1_id == player1.player_id:
-            m.player1_rating = player1.rating
-        if m.player2_id == player1.player_id:
-            m.player2_rating = player1.rating
-        if m.player1_id == player2.player_id:
-            m.player1_rating = player2.rating
-        if m.player2_id == player2.player_id:
-            m.player2_rating = player2.rating
+    complete_match(session, db_match, games, datetime.now())
 
     session.commit()
     session.refresh(db_match)
@@ -274,72 +231,19 @@ def rescore_match(match_id: int, games: list[GameInput], session: Session = Depe
 
     _validate_games_for_race(games, db_match.race)
 
-    from utils import calculate_rating_change
+    from services.rating_replay import replay_rescored_match
 
     # Get existing games for this match ordered by game_id
     old_games = session.exec(select(Game).where(Game.match_id == match_id).order_by(Game.game_id)).all()
     if not old_games:
         raise HTTPException(status_code=400, detail="No games found for this match")
 
-    # Use the earliest played_date so rescored games keep their original timestamp
-    original_played_date = min(g.played_date for g in old_games)
+    revert_match(session, db_match, [g.winner_id for g in old_games])
 
-    # Collect the two match players
-    match_player_ids = {db_match.player1_id, db_match.player2_id}
-
-    # Find all subsequent games (any match) involving either player, ordered chronologically
-    subsequent_games = session.exec(
-        select(Game)
-        .where(Game.match_id != match_id)
-        .where(Game.played_date > original_played_date)
-        .where(or_(Game.winner_id.in_(match_player_ids), Game.loser_id.in_(match_player_ids)))
-        .order_by(Game.played_date, Game.game_id)
-    ).all()
-
-    # Reverse subsequent games (reverse order) to unwind their rating/games_played changes
-    for g in reversed(subsequent_games):
-        winner = session.get(Player, g.winner_id)
-        loser = session.get(Player, g.loser_id)
-        winner.rating -= g.winner_rating_change
-        loser.rating -= g.loser_rating_change
-        winner.games_played -= 1
-        loser.games_played -= 1
-
-    # Reverse this match's games (reverse order)
-    for g in reversed(old_games):
-        winner = session.get(Player, g.winner_id)
-        loser = session.get(Player, g.loser_id)
-        winner.rating -= g.winner_rating_change
-        loser.rating -= g.loser_rating_change
-        winner.games_played -= 1
-        loser.games_played -= 1
-        session.delete(g)
-
-    # Apply new games
-    for game_input in games:
-        winner = session.get(Player, game_input.winner_id)
-        loser = session.get(Player, game_input.loser_id)
-
-        winner_change, loser_change = calculate_rating_change(
-            winner.games_played, loser.games_played, game_input.balls_remaining
-        )
-
-        session.add(Game(
-            match_id=match_id,
-            winner_id=game_input.winner_id,
-            loser_id=game_input.loser_id,
-            winner_rating=winner.rating,
-            loser_rating=loser.rating,
-            winner_rating_change=winner_change,
-            loser_rating_change=loser_change,
-            balls_remaining=game_input.balls_remaining,
-            played_date=original_played_date,
-        ))
-
-        winner.rating += winner_change
-        loser.rating += loser_change
-        winner.games_played += 1
-        loser.games_played += 1
+    # Swap in the new games and replay every later game in the league, so opponents
+    # whose ratings shift transitively are recomputed too
+    replay = replay_rescored_match(session, match_id, list(old_games), games)
+    propagate_ratings(session, replay.ratings)
 
     # Update match winner/loser
     game_wins: dict[int, int] = {}
@@ -352,28 +256,7 @@ def rescore_match(match_id: int, games: list[GameInput], session: Session = Depe
         )
 
     session.add(db_match)
-
-    # Re-apply subsequent games with recalculated rating changes
-    for g in subsequent_games:
-        winner = session.get(Player, g.winner_id)
-        loser = session.get(Player, g.loser_id)
-
-        winner_change, loser_change = calculate_rating_change(
-            winner.games_played, loser.games_played, g.balls_remaining
-        )
-
-        g.winner_rating = winner.rating
-        g.loser_rating = loser.rating
-        g.winner_rating_change = winner_change
-        g.loser_rating_change = loser_change
-
-        winner.rating += winner_change
-        loser.rating += loser_change
-        winner.games_played += 1
-        loser.games_played += 1
-
-        session.add(g)
-
+    record_match(session, db_match, [g.winner_id for g in games])
     session.commit()
     session.refresh(db_match)
     return db_match
@@ -427,17 +310,29 @@ def _match_week_bounds(scheduled_date: datetime) -> tuple[datetime, datetime]:
 
 
 @router.get("/{match_id}/score/", response_model=ScoreSubmissionResponse)
-def get_match_score(
+async def get_match_score(
     match_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user),
 ):
     if not user.player_id:
         raise HTTPException(status_code=403, detail="No player linked to this account")
 
-    submissions = session.exec(
+    # The response only changes when score_version does, so a poller that already
+    # holds the current version gets a 304 without the submissions being loaded
+    score_version = (await session.exec(select(Match.score_version).where(Match.match_id == match_id))).first()
+    if score_version is not None:
+        etag = make_etag("score", match_id, score_version, user.player_id)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    submissions = (await session.exec(
         select(MatchScoreSubmission).where(MatchScoreSubmission.match_id == match_id)
-    ).all()
+    )).all()
 
     my_sub = next((s for s in submissions if s.submitted_by_player_id == user.player_id), None)
     opp_sub = next((s for s in submissions if s.submitted_by_player_id != user.player_id), None)
@@ -559,6 +454,7 @@ def submit_match_score(
         db_match.score_status = "pending"
         session.add(db_match)
 
+    db_match.score_version += 1
     session.commit()
     session.refresh(new_sub)
     if opp_sub:
@@ -619,6 +515,7 @@ def delete_match(match_id: int, session: Session = Depends(get_session), _admin:
     db_match = session.get(Match, match_id)
     if not db_match or db_match.deleted:
         raise HTTPException(status_code=404, detail="Match not found")
+    revert_stored_match(session, db_match)
     db_match.deleted = True
     session.add(db_match)
     session.commit()
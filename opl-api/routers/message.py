@@ -1,8 +1,10 @@
 from datetime import datetime
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
+from sqlalchemy import and_, delete, func, literal, or_
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from models import (
     DivisionPlayer,
@@ -11,8 +13,11 @@ from models import (
     Player,
     User,
 )
+from services import inbox
 from services.auth import get_current_user, require_admin
-from services.database import get_session
+from services.database import get_async_session, get_session
+from services.email_outbox import enqueue_email
+from services.pagination import MAX_PAGE_SIZE, keyset, page
 
 router = APIRouter(prefix="/messages")
 
@@ -26,10 +31,9 @@ class MessageCreate(BaseModel):
     send_email: bool = False
 
 
-class MessageOut(BaseModel):
+class MessageHeader(BaseModel):
     message_id: int
     subject: str
-    body: str
     sender_id: int
     recipient_type: str
     recipient_id: int | None
@@ -40,7 +44,6 @@ class MessageOut(BaseModel):
 @router.post("/")
 def create_message(
     data: MessageCreate,
-    background_tasks: BackgroundTasks,
     session: Session = Depends(get_session),
     admin: User = Depends(require_admin),
 ):
@@ -55,11 +58,8 @@ def create_message(
             recipient_id=None,
         )
         session.add(msg)
-        session.commit()
-        session.refresh(msg)
-        for pid in data.player_ids:
-            session.add(MessageRecipient(message_id=msg.message_id, player_id=pid))
-        session.commit()
+        session.flush()
+        inbox.fan_out(session, msg.message_id, data.player_ids)
 
         if data.send_email:
             # Collect opted-in player emails
@@ -69,10 +69,10 @@ def create_message(
                     Player.email_notifications == True,  # noqa: E712
                 )
             ).all()
-            emails = [p.email for p in players if p.email]
-            if emails:
-                _schedule_email(background_tasks, emails, data.subject, data.body)
+            enqueue_email(session, [p.email for p in players if p.email], data.subject, data.body)
 
+        session.commit()
+        session.refresh(msg)
         return msg
     else:
         msg = Message(
@@ -83,14 +83,17 @@ def create_message(
             recipient_id=data.recipient_id,
         )
         session.add(msg)
-        session.commit()
-        session.refresh(msg)
+        session.flush()
+        if inbox.MESSAGE_FANOUT:
+            player_ids = inbox.broadcast_player_ids(session, data.recipient_type, data.recipient_id)
+            inbox.fan_out(session, msg.message_id, player_ids)
 
         if data.send_email:
             emails = _resolve_recipient_emails(session, data.recipient_type, data.recipient_id)
-            if emails:
-                _schedule_email(background_tasks, emails, data.subject, data.body)
+            enqueue_email(session, emails, data.subject, data.body)
 
+        session.commit()
+        session.refresh(msg)
         return msg
 
 
@@ -120,131 +123,103 @@ def _resolve_recipient_emails(
     return [p.email for p in players if p.email]
 
 
-def _schedule_email(
-    background_tasks: BackgroundTasks, emails: list[str], subject: str, body: str
-) -> None:
-    from services.email_service import send_email
-
-    background_tasks.add_task(send_email, emails, subject, body)
-
 
-@router.get("/", response_model=list[MessageOut])
-def list_messages(
-    session: Session = Depends(get_session),
+def _inbox(query, player_id: int):
+    """Restrict *query* to one player's inbox, joined to their recipient row.
+
+    With fan-out on write every delivered message has a recipient row, so the inbox
+    is a plain join. Otherwise a message is in the inbox if it is a league
+    broadcast, targets one of the player's divisions, or has a recipient row for the
+    player (direct messages, and broadcasts the player has already read).
+    """
+    recipient = and_(MessageRecipient.message_id == Message.message_id, MessageRecipient.player_id == player_id)
+    if inbox.MESSAGE_FANOUT:
+        return query.select_from(Message).join(MessageRecipient, recipient)
+
+    division_ids = select(DivisionPlayer.division_id).where(DivisionPlayer.player_id == player_id)
+    return (
+        query.select_from(Message)
+        .outerjoin(MessageRecipient, recipient)
+        .where(or_(
+            Message.recipient_type == "league",
+            and_(Message.recipient_type == "division", Message.recipient_id.in_(division_ids)),
+            MessageRecipient.id.is_not(None),
+        ))
+    )
+
+
+@router.get("/", response_model=list[MessageHeader])
+async def list_messages(
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    after: str | None = None,
+    session: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user),
 ):
+    """Message headers (no body), newest first, optionally a page at a time."""
+    columns = (
+        Message.message_id,
+        Message.subject,
+        Message.sender_id,
+        Message.recipient_type,
+        Message.recipient_id,
+        Message.created_at,
+    )
     if not user.player_id:
         if user.is_admin:
             # Admin sees all messages
-            messages = session.exec(
-                select(Message).order_by(Message.created_at.desc())
-            ).all()
-            return [
-                MessageOut(
-                    message_id=m.message_id,
-                    subject=m.subject,
-                    body=m.body,
-                    sender_id=m.sender_id,
-                    recipient_type=m.recipient_type,
-                    recipient_id=m.recipient_id,
-                    created_at=m.created_at,
-                    is_read=True,
-                )
-                for m in messages
-            ]
-        raise HTTPException(status_code=400, detail="No player linked to this user")
+            query = select(*columns, literal(True).label("is_read"))
+        else:
+            raise HTTPException(status_code=400, detail="No player linked to this user")
+    else:
+        query = _inbox(select(*columns, MessageRecipient.read_at.is_not(None).label("is_read")), user.player_id)
 
-    player_id = user.player_id
+    query = keyset(query, Message.created_at, Message.message_id, limit, after, descending=True)
+    rows = page((await session.exec(query)).all(), limit, response, "created_at", "message_id")
+    return [MessageHeader.model_validate(row, from_attributes=True) for row in rows]
 
-    # Get division IDs for this player
-    div_ids = [
-        dp.division_id
-        for dp in session.exec(
-            select(DivisionPlayer).where(DivisionPlayer.player_id == player_id)
-        ).all()
-    ]
-
-    # Get all messages for this player
-    # 1. Direct player messages via MessageRecipient
-    direct_msg_ids = [
-        mr.message_id
-        for mr in session.exec(
-            select(MessageRecipient).where(MessageRecipient.player_id == player_id)
-        ).all()
-    ]
-
-    # 2. Division messages
-    # 3. League messages
-    all_messages = []
 
-    if direct_msg_ids:
-        direct = session.exec(
-            select(Message).where(Message.message_id.in_(direct_msg_ids))
-        ).all()
-        all_messages.extend(direct)
+@router.get("/unread-count/")
+async def unread_count(
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(get_current_user),
+):
+    if not user.player_id:
+        if user.is_admin:
+            return {"count": 0}
+        raise HTTPException(status_code=400, detail="No player linked to this user")
 
-    if div_ids:
-        div_messages = session.exec(
-            select(Message).where(
-                Message.recipient_type == "division",
-                Message.recipient_id.in_(div_ids),
-            )
-        ).all()
-        all_messages.extend(div_messages)
-
-    league_messages = session.exec(
-        select(Message).where(Message.recipient_type == "league")
-    ).all()
-    all_messages.extend(league_messages)
-
-    # Deduplicate by message_id
-    seen = set()
-    unique_messages = []
-    for m in all_messages:
-        if m.message_id not in seen:
-            seen.add(m.message_id)
-            unique_messages.append(m)
-
-    # Sort by created_at desc
-    unique_messages.sort(key=lambda m: m.created_at, reverse=True)
-
-    # Get read status
-    read_map = {}
-    if unique_messages:
-        msg_ids = [m.message_id for m in unique_messages]
-        recipients = session.exec(
-            select(MessageRecipient).where(
-                MessageRecipient.message_id.in_(msg_ids),
-                MessageRecipient.player_id == player_id,
-            )
-        ).all()
-        read_map = {r.message_id: r.read_at is not None for r in recipients}
-
-    return [
-        MessageOut(
-            message_id=m.message_id,
-            subject=m.subject,
-            body=m.body,
-            sender_id=m.sender_id,
-            recipient_type=m.recipient_type,
-            recipient_id=m.recipient_id,
-            created_at=m.created_at,
-            is_read=read_map.get(m.message_id, False),
+    if inbox.MESSAGE_FANOUT:
+        # Served entirely from the (player_id, read_at) index
+        query = select(func.count()).where(
+            MessageRecipient.player_id == user.player_id,
+            MessageRecipient.read_at.is_(None),
         )
-        for m in unique_messages
-    ]
+    else:
+        query = _inbox(select(func.count()), user.player_id).where(MessageRecipient.read_at.is_(None))
+    return {"count": (await session.exec(query)).one()}
+
+
+def _readable_message(session: Session, message_id: int, user: User) -> Message:
+    """The message if it is in *user*'s inbox (admins can read every message); 404 otherwise."""
+    if user.is_admin:
+        msg = session.get(Message, message_id)
+    elif user.player_id:
+        msg = session.exec(_inbox(select(Message), user.player_id).where(Message.message_id == message_id)).first()
+    else:
+        msg = None
+    if not msg:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return msg
 
 
 @router.get("/{message_id}/")
 def get_message(
     message_id: int,
     session: Session = Depends(get_session),
-    _user: User = Depends(get_current_user),
+    user: User = Depends(get_current_user),
 ):
-    msg = session.get(Message, message_id)
-    if not msg:
-        raise HTTPException(status_code=404, detail="Message not found")
-    return msg
+    return _readable_message(session, message_id, user)
 
 
 @router.put("/{message_id}/read/")
@@ -256,9 +231,8 @@ def mark_read(
     if not user.player_id:
         raise HTTPException(status_code=400, detail="No player linked to this user")
 
-    msg = session.get(Message, message_id)
-    if not msg:
-        raise HTTPException(status_code=404, detail="Message not found")
+    # A read row would put the message in the inbox, so only inbox messages qualify
+    _readable_message(session, message_id, user)
 
     recipient = session.exec(
         select(MessageRecipient).where(
@@ -296,12 +270,8 @@ def delete_message(
     if not msg:
         raise HTTPException(status_code=404, detail="Message not found")
 
-    # Delete associated recipients
-    recipients = session.exec(
-        select(MessageRecipient).where(MessageRecipient.message_id == message_id)
-    ).all()
-    for r in recipients:
-        session.delete(r)
+    # Delete associated recipients (one row per player for fanned-out broadcasts)
+    session.execute(delete(MessageRecipient).where(MessageRecipient.message_id == message_id))
 
     session.delete(msg)
     session.commit()
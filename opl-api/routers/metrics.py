@@ -0,0 +1,19 @@
+import os
+
+from fastapi import APIRouter, Header, HTTPException, Response
+
+from services.metrics import render_metrics
+
+# Bearer token Prometheus must send; unset leaves /metrics open (e.g. private network only)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+router = APIRouter()
+
+
+@router.get('/metrics', include_in_schema=False)
+def get_metrics(authorization: str | None = Header(default=None)):
+    """Prometheus exposition of this process's metrics."""
+    if METRICS_TOKEN and authorization != f'Bearer {METRICS_TOKEN}':
+        raise HTTPException(status_code=401, detail='Invalid metrics token')
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
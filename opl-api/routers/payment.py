@@ -1,12 +1,14 @@
+import json
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlmodel import Session, select
 
-from models import Game, Match, MatchScoreSubmission, Payment, Player, Session, User
+from models import Match, MatchScoreSubmission, Payment, Session, User
 from services.auth import get_current_user, require_admin
 from services.database import get_session
+from services.scoring import complete_match
 
 router = APIRouter(prefix="/payments")
 
@@ -131,7 +133,7 @@ def confirm_payment(
 
 def _complete_match_from_submission(match_id: int, db_match: Match, session: Session) -> None:
     """Complete a match using the confirmed score submission."""
-    from utils import calculate_rating_change, get_match_weight
+    from routers.match import GameInput
 
     submission = session.exec(
         select(MatchScoreSubmission).where(MatchScoreSubmission.match_id == match_id)
@@ -139,81 +141,5 @@ def _complete_match_from_submission(match_id: int, db_match: Match, session: Ses
     if not submission or submission.status != "confirmed":
         return
 
-    import json
-    games_data = json.loads(submission.games_json)
-
-    player1 = session.get(Player, db_match.player1_id)
-    player2 = session.get(Player, db_match.player2_id)
-    db_match.player1_rating = player1.rating if player1 else db_match.player1_rating
-    db_match.player2_rating = player2.rating if player2 else db_match.player2_rating
-    if player1 and player2:
-        w1, w2 = get_match_weight(player1.rating, player2.rating)
-        db_match.player1_weight = w1
-        db_match.player2_weight = w2
-
-    for game_data in games_data:
-        winner = session.get(Player, game_data["winner_id"])
-        loser = session.get(Player, game_data["loser_id"])
-
-        winner_change, loser_change = calculate_rating_change(
-            winner.games_played, loser.games_played, game_data["balls_remaining"]
-        )
-
-        session.add(Game(
-            match_id=match_id,
-            winner_id=game_data["winner_id"],
-            loser_id=game_data["loser_id"],
-            winner_rating=winner.rating,
-            loser_rating=loser.rating,
-            winner_rating_change=winner_change,
-            loser_rating_change=loser_change,
-            balls_remaining=game_data["balls_remaining"],
-            played_date=datetime.utcnow(),
-        ))
-
-        winner.rating += winner_change
-        loser.rating += loser_change
-        winner.games_played += 1
-        loser.games_played += 1
-
-    game_wins: dict[int, int] = {}
-    for g in games_data:
-        game_wins[g["winner_id"]] = game_wins.get(g["winner_id"], 0) + 1
-    if game_wins:
-        db_match.winner_id = max(game_wins, key=game_wins.get)
-        db_match.loser_id = (
-            db_match.player2_id if db_match.winner_id == db_match.player1_id else db_match.player1_id
-        )
-
-    db_match.completed = True
-    session.add(db_match)
-
-    # Update stored ratings on uncompleted matches for both players
-    from sqlalchemy import or_
-    from sqlmodel import select as sm_select
-
-    player1 = session.get(Player, db_match.player1_id)
-    player2 = session.get(Player, db_match.player2_id)
-
-    uncompleted = session.exec(
-        sm_select(Match).where(
-            Match.completed == False,  # noqa: E712
-            Match.deleted == False,  # noqa: E712
-            or_(
-                Match.player1_id == player1.player_id,
-                Match.player2_id == player1.player_id,
-                Match.player1_id == player2.player_id,
-                Match.player2_id == player2.player_id,
-            ),
-        )
-    ).all()
-
-    for m in uncompleted:
-        if m.player1_id == player1.player_id:
-            m.player1_rating = player1.rating
-        if m.player2_id == player1.player_id:
-            m.player2_rating = player1.rating
-        if m.player1_id == player2.player_id:
-            m.player1_rating = player2.rating
-        if m.player2_id == player2.player_id:
-            m.player2_rating = player2.rating
+    games = [GameInput.model_validate(g) for g in json.loads(submission.games_json)]
+    complete_match(session, db_match, games, datetime.utcnow())
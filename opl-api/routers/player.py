@@ -1,10 +1,20 @@
 
+from datetime import date
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from services.auth import get_current_user, invalidate_user, require_admin, revoke_tokens
+from services.database import get_async_session, get_session
+from services.response_cache import PLAYERS, cached_async, mark_stale
+from models import Player, PlayerBlackout, User
+
 
-from services.auth import get_current_user, require_admin
-from services.database import get_session
-from models import Player, User
+class BlackoutInput(SQLModel):
+    start_date: date
+    end_date: date
+    reason: str | None = None
 
 router = APIRouter(
     prefix="/players"
@@ -12,8 +22,12 @@ router = APIRouter(
 
 
 @router.get("/", response_model=list[Player])
-def get_players(session: Session = Depends(get_session), _user: User = Depends(get_current_user)):
-    return session.exec(select(Player).where(Player.deleted == False)).all()  # noqa: E712
+async def get_players(session: AsyncSession = Depends(get_async_session), _user: User = Depends(get_current_user)):
+    async def load():
+        players = (await session.exec(select(Player).where(Player.deleted == False))).all()  # noqa: E712
+        return [Player.model_validate(p.model_dump()) for p in players]
+
+    return await cached_async(PLAYERS, None, load)
 
 
 @router.get("/{player_id}/", response_model=Player)
@@ -27,6 +41,7 @@ def get_player(player_id: int, session: Session = Depends(get_session), _user: U
 @router.post("/", response_model=Player)
 def create_player(player: Player, session: Session = Depends(get_session), _admin: User = Depends(require_admin)):
     session.add(player)
+    mark_stale(session, PLAYERS)
     session.commit()
     session.refresh(player)
 
@@ -74,14 +89,19 @@ def update_player(player_id: int, player: Player, session: Session = Depends(get
             continue
         setattr(db_player, key, value)
     session.add(db_player)
+    mark_stale(session, PLAYERS)
 
+    user = None
     if db_player.email != old_email:
         user = session.exec(select(User).where(User.player_id == player_id)).first()
         if user:
             user.email = db_player.email
-            session.add(user)
+            revoke_tokens(session, user)
 
     session.commit()
+    # Only after the commit, or a concurrent request could re-cache the old email
+    if user:
+        invalidate_user(user.user_id)
     session.refresh(db_player)
     return db_player
 
@@ -93,5 +113,52 @@ def delete_player(player_id: int, session: Session = Depends(get_session), _admi
         raise HTTPException(status_code=404, detail="Player not found")
     player.deleted = True
     session.add(player)
+    mark_stale(session, PLAYERS)
+    users = session.exec(select(User).where(User.player_id == player_id)).all()
+    for user in users:
+        revoke_tokens(session, user)
+    session.commit()
+    for user in users:
+        invalidate_user(user.user_id)
+    return {"ok": True}
+
+
+def _blackout_player(player_id: int, session: Session, current_user: User) -> Player:
+    # Allow admin or the player themselves
+    if not current_user.is_admin and current_user.player_id != player_id:
+        raise HTTPException(status_code=403, detail="Not authorized to manage this player's blackouts")
+    player = session.get(Player, player_id)
+    if not player or player.deleted:
+        raise HTTPException(status_code=404, detail="Player not found")
+    return player
+
+
+@router.get("/{player_id}/blackouts/", response_model=list[PlayerBlackout])
+def get_player_blackouts(player_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    _blackout_player(player_id, session, current_user)
+    return session.exec(
+        select(PlayerBlackout).where(PlayerBlackout.player_id == player_id).order_by(PlayerBlackout.start_date)
+    ).all()
+
+
+@router.post("/{player_id}/blackouts/", response_model=PlayerBlackout)
+def create_player_blackout(player_id: int, blackout: BlackoutInput, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    _blackout_player(player_id, session, current_user)
+    if blackout.end_date < blackout.start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    db_blackout = PlayerBlackout(player_id=player_id, **blackout.model_dump())
+    session.add(db_blackout)
+    session.commit()
+    session.refresh(db_blackout)
+    return db_blackout
+
+
+@router.delete("/{player_id}/blackouts/{blackout_id}/")
+def delete_player_blackout(player_id: int, blackout_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
+    _blackout_player(player_id, session, current_user)
+    blackout = session.get(PlayerBlackout, blackout_id)
+    if not blackout or blackout.player_id != player_id:
+        raise HTTPException(status_code=404, detail="Blackout not found")
+    session.delete(blackout)
     session.commit()
     return {"ok": True}
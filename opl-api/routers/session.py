@@ -1,16 +1,20 @@
 
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
-from sqlalchemy import func
+from sqlalchemy import delete, func
 from sqlmodel import Session as DBSession
 from sqlmodel import select
 
-from models import Match, Session, User
+from models import Match, Session, Standing, User
 from models.session import SessionResponse
 from services.auth import get_current_user, require_admin
 from services.database import get_session
+from services.match_updates import MATCHES_UPDATED_HEADER, set_match_time, soft_delete_matches
+from services.response_cache import SESSIONS, cached, mark_stale
+from services.scoring import refresh_session_weights
+from utils import WeightTable
 
 
 class SessionUpdate(BaseModel):
@@ -19,6 +23,8 @@ class SessionUpdate(BaseModel):
     dues: int = 10
     active: bool
     update_existing_matches: bool = False
+    # Omit to keep the current table; null resets to the league default
+    weight_brackets: list[list[int | None]] | None = None
 
 router = APIRouter(
     prefix="/sessions"
@@ -49,6 +55,7 @@ def _build_session_responses(session: DBSession, sessions: list[Session]) -> lis
             dues=s.dues,
             active=s.active,
             deleted=s.deleted,
+            weight_brackets=s.weight_brackets,
             start_date=date_map.get(s.session_id, (None, None))[0],
             end_date=date_map.get(s.session_id, (None, None))[1],
         )
@@ -56,33 +63,50 @@ def _build_session_responses(session: DBSession, sessions: list[Session]) -> lis
     ]
 
 
+def _weight_brackets(value: list | None) -> list | None:
+    """Validate a weight bracket table and return it normalized for storage."""
+    if value is None:
+        return None
+    try:
+        return WeightTable.from_json(value).to_json()
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=f"Invalid weight_brackets: {exc}") from exc
+
+
 @router.get("/", response_model=list[SessionResponse])
 def get_sessions(active: bool | None = None, session: DBSession = Depends(get_session), _user: User = Depends(get_current_user)):
-    query = select(Session).where(Session.deleted == False)  # noqa: E712
-    if active is not None:
-        query = query.where(Session.active == active)
-    sessions = session.exec(query).all()
-    return _build_session_responses(session, list(sessions))
+    def load():
+        query = select(Session).where(Session.deleted == False)  # noqa: E712
+        if active is not None:
+            query = query.where(Session.active == active)
+        return _build_session_responses(session, list(session.exec(query).all()))
+
+    return cached(SESSIONS, ("list", active), load)
 
 
 @router.get("/{session_id}/", response_model=SessionResponse)
 def get_session_by_id(session_id: int, session: DBSession = Depends(get_session), _user: User = Depends(get_current_user)):
-    s = session.get(Session, session_id)
-    if not s or s.deleted:
-        raise HTTPException(status_code=404, detail="Session not found")
-    return _build_session_responses(session, [s])[0]
+    def load():
+        s = session.get(Session, session_id)
+        if not s or s.deleted:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return _build_session_responses(session, [s])[0]
+
+    return cached(SESSIONS, session_id, load)
 
 
 @router.post("/", response_model=SessionResponse)
 def create_session(body: Session, session: DBSession = Depends(get_session), _admin: User = Depends(require_admin)):
+    body.weight_brackets = _weight_brackets(body.weight_brackets)
     session.add(body)
+    mark_stale(session, SESSIONS)
     session.commit()
     session.refresh(body)
     return _build_session_responses(session, [body])[0]
 
 
 @router.put("/{session_id}/", response_model=SessionResponse)
-def update_session(session_id: int, body: SessionUpdate, session: DBSession = Depends(get_session), _admin: User = Depends(require_admin)):
+def update_session(session_id: int, body: SessionUpdate, response: Response, session: DBSession = Depends(get_session), _admin: User = Depends(require_admin)):
     db_session = session.get(Session, session_id)
     if not db_session or db_session.deleted:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -91,21 +115,19 @@ def update_session(session_id: int, body: SessionUpdate, session: DBSession = De
     db_session.match_time = body.match_time
     db_session.dues = body.dues
     db_session.active = body.active
+    if "weight_brackets" in body.model_fields_set:
+        db_session.weight_brackets = _weight_brackets(body.weight_brackets)
+        # Upcoming matches pick up the new table; completed ones keep their weights
+        refresh_session_weights(session, session_id, WeightTable.from_json(db_session.weight_brackets))
 
+    updated = 0
     if body.update_existing_matches and body.match_time is not None:
         h, m = map(int, body.match_time.split(':'))
-        matches = session.exec(
-            select(Match).where(
-                Match.session_id == session_id,
-                Match.completed == False,  # noqa: E712
-                Match.deleted == False,  # noqa: E712
-            )
-        ).all()
-        for match in matches:
-            match.scheduled_date = match.scheduled_date.replace(hour=h, minute=m, second=0, microsecond=0)
-            session.add(match)
+        updated = set_match_time(session, session_id, h, m)
+    response.headers[MATCHES_UPDATED_HEADER] = str(updated)
 
     session.add(db_session)
+    mark_stale(session, SESSIONS)
     session.commit()
     session.refresh(db_session)
     return _build_session_responses(session, [db_session])[0]
@@ -118,12 +140,9 @@ def delete_session(session_id: int, session: DBSession = Depends(get_session), _
         raise HTTPException(status_code=404, detail="Session not found")
     db_session.deleted = True
     session.add(db_session)
+    mark_stale(session, SESSIONS)
     # Cascade: soft-delete all matches for this session
-    matches = session.exec(
-        select(Match).where(Match.session_id == session_id, Match.deleted == False)  # noqa: E712
-    ).all()
-    for m in matches:
-        m.deleted = True
-        session.add(m)
+    matches = soft_delete_matches(session, Match.session_id == session_id)
+    standings = session.execute(delete(Standing).where(Standing.session_id == session_id)).rowcount
     session.commit()
-    return {"ok": True}
+    return {"ok": True, "matches_deleted": matches, "standings_deleted": standings}
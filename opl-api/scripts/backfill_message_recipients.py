@@ -0,0 +1,26 @@
+"""Write recipient rows for existing division and league messages.
+
+Run once before enabling MESSAGE_FANOUT so broadcasts sent under read-time
+resolution stay in their players' inboxes. Recipients are taken from the current
+division rosters and player list; existing rows (and their read state) are kept,
+so the script is safe to re-run.
+
+Usage:
+    python scripts/backfill_message_recipients.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlmodel import Session
+
+from services.database import engine
+from services.inbox import backfill_recipients
+
+if __name__ == '__main__':
+    with Session(engine) as session:
+        rows = backfill_recipients(session)
+        session.commit()
+    print(f'Inserted {rows} message recipient rows.')
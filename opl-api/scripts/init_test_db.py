@@ -99,7 +99,9 @@ def init_players_table(num_players: int, player_emails: list[str]):
 
 
 def init_matches_table(start_date: datetime):
-    from utils import schedule_round_robin
+    from sqlalchemy import insert
+
+    from utils import round_robin_rows
 
     with Session(engine) as session:
         opl_session = session.exec(select(OPLSession)).first()
@@ -109,8 +111,9 @@ def init_matches_table(start_date: datetime):
                 select(Player).join(DivisionPlayer, Player.player_id == DivisionPlayer.player_id)
                 .where(DivisionPlayer.division_id == division.division_id)
             ).all()
-            matches = schedule_round_robin(players, start_date, opl_session.session_id, division.division_id, is_weekly=True)
-            session.add_all(matches)
+            rows = round_robin_rows(players, start_date, opl_session.session_id, division.division_id, is_weekly=True)
+            if rows:
+                session.execute(insert(Match.__table__), rows)
             progress_bar(i + 1, len(divisions))
         session.commit()
 
@@ -0,0 +1,29 @@
+"""Rebuild the materialized standings table from completed matches.
+
+Run once after the standings migration to backfill existing seasons, or any time the
+table is suspected to have drifted (e.g. after manual database edits).
+
+Usage:
+    python scripts/rebuild_standings.py [--session-id N]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlmodel import Session
+
+from services.database import engine
+from services.standings import rebuild_standings
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild OPL standings')
+    parser.add_argument('--session-id', type=int, default=None, help='Only rebuild this session')
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        rows = rebuild_standings(session, args.session_id)
+        session.commit()
+    print(f'Wrote {rows} standings rows.')
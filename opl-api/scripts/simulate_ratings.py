@@ -0,0 +1,68 @@
+"""Replay the full game history under a different K-factor formula.
+
+Reads the games table once and recomputes every rating change in memory; the
+database is never written. Prints actual vs. simulated ratings, or the full
+report (including rating trajectories) as JSON with --json.
+
+Usage:
+    python scripts/simulate_ratings.py [--k-base 23] [--k-decay 0.943] [--player-id N ...] [--json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlmodel import Session
+
+from services.database import engine
+from services.rating_simulator import load_snapshot, simulate, simulation_report
+from utils import RATING_K_BASE, RATING_K_DECAY, KFactorTable
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate OPL ratings')
+    parser.add_argument(
+        '--k-base', type=float, default=RATING_K_BASE, help="K for a player's first game"
+    )
+    parser.add_argument(
+        '--k-decay', type=float, default=RATING_K_DECAY, help='K multiplier per game played'
+    )
+    parser.add_argument(
+        '--player-id',
+        type=int,
+        action='append',
+        dest='player_ids',
+        help='Only report these players',
+    )
+    parser.add_argument(
+        '--json', action='store_true', help='Print the full report, with trajectories, as JSON'
+    )
+    args = parser.parse_args()
+
+    k_factors = KFactorTable(args.k_base, args.k_decay)
+    with Session(engine) as session:
+        start = time.perf_counter()
+        snapshot = load_snapshot(session)
+        loaded = time.perf_counter()
+    result = simulate(snapshot, k_factors)
+    replayed = time.perf_counter()
+    report = simulation_report(result, args.player_ids)
+
+    if args.json:
+        json.dump(report, sys.stdout)
+        print()
+        sys.exit()
+
+    print(f'{"player":>8} {"start":>6} {"actual":>7} {"simulated":>10} {"diff":>6}')
+    for p in report['players']:
+        diff = p['rating'] - p['actual_rating']
+        print(
+            f'{p["player_id"]:>8} {p["start_rating"]:>6} {p["actual_rating"]:>7} {p["rating"]:>10} {diff:>+6}'
+        )
+    print(
+        f'Replayed {report["games"]} games in {(replayed - loaded) * 1000:.1f} ms '
+        f'(snapshot loaded in {(loaded - start) * 1000:.1f} ms).'
+    )
@@ -12,6 +12,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from models import Game, Match, Player  # noqa: E402
 from services.database import engine  # noqa: E402
+from services.standings import revert_match
 from sqlmodel import Session, select  # noqa: E402
 
 
@@ -67,6 +68,8 @@ def undo_match(match_id: int) -> None:
             p.games_played += games_played_deltas[pid]
             session.add(p)
 
+        revert_match(session, match, [g.winner_id for g in games])
+
         # Delete games
         for g in games:
             session.delete(g)
@@ -1,4 +1,7 @@
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import UTC, datetime, timedelta
 
 import jwt
@@ -6,7 +9,7 @@ from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from google.auth.transport import requests as google_requests
 from google.oauth2 import id_token
-from sqlmodel import Session
+from sqlmodel import Session, select
 
 from models import User
 from services.database import get_session
@@ -20,8 +23,24 @@ ADMIN_EMAIL = "admin@csopl.com"
 DEMO_MODE = os.environ.get("DEMO_MODE", "").lower() == "true"
 DEMO_PLAYER_EMAIL = os.environ.get("DEMO_PLAYER_EMAIL", "demo@csopl.com")
 
+# Decoded tokens are cached in-process so polling clients don't hit the users table on
+# every request. Edits to a user invalidate their entries; the TTL bounds staleness
+# for edits made on other instances.
+AUTH_CACHE_TTL_SECONDS = float(os.environ.get("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", "1024"))
+# Off by default. When enabled, tokens carry player_id, is_admin and the user's
+# token_version, and a cache miss reads only that version instead of the whole row.
+# Trade-off: admin and player-link changes made after login are not seen until the
+# token is reissued, unless the change goes through revoke_tokens (which bumps the
+# version and so rejects every older token). Deleted users are always rejected.
+JWT_EMBED_PLAYER_ID = os.environ.get("JWT_EMBED_PLAYER_ID", "").lower() == "true"
+
 security = HTTPBearer()
 
+_user_cache: OrderedDict[str, tuple[float, User]] = OrderedDict()
+_user_cache_lock = threading.Lock()
+_user_cache_stats = {"hits": 0, "misses": 0, "claims": 0, "invalidations": 0}
+
 
 def verify_google_token(credential: str) -> dict:
     if not GOOGLE_CLIENT_ID:
@@ -43,24 +62,103 @@ def create_jwt(user: User) -> str:
         "is_admin": user.is_admin,
         "exp": datetime.now(UTC) + timedelta(hours=JWT_EXPIRATION_HOURS),
     }
+    if JWT_EMBED_PLAYER_ID:
+        payload["player_id"] = user.player_id
+        payload["ver"] = user.token_version
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
+def _cache_get(token: str) -> User | None:
+    with _user_cache_lock:
+        entry = _user_cache.get(token)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del _user_cache[token]
+            _user_cache_stats["misses"] += 1
+            return None
+        _user_cache.move_to_end(token)
+        _user_cache_stats["hits"] += 1
+        return entry[1]
+
+
+def _cache_put(token: str, user: User, token_exp: float | None) -> None:
+    expires_at = time.monotonic() + AUTH_CACHE_TTL_SECONDS
+    if token_exp is not None:
+        # Never serve a token from cache past its own expiry
+        expires_at = min(expires_at, time.monotonic() + (token_exp - time.time()))
+    snapshot = User.model_validate(user.model_dump())
+    with _user_cache_lock:
+        _user_cache[token] = (expires_at, snapshot)
+        _user_cache.move_to_end(token)
+        while len(_user_cache) > AUTH_CACHE_MAX_ENTRIES:
+            _user_cache.popitem(last=False)
+
+
+def invalidate_user(user_id: int | None) -> None:
+    """Drop cached tokens for a user after their row (or linked player) changes."""
+    if user_id is None:
+        return
+    with _user_cache_lock:
+        stale = [token for token, (_, user) in _user_cache.items() if user.user_id == user_id]
+        for token in stale:
+            del _user_cache[token]
+        _user_cache_stats["invalidations"] += len(stale)
+
+
+def revoke_tokens(session: Session, user: User) -> None:
+    """Reject every token issued to *user* so far, once the caller commits.
+
+    Call ``invalidate_user`` after the commit to drop this instance's cached entries.
+    """
+    user.token_version += 1
+    session.add(user)
+
+
+def clear_user_cache() -> None:
+    with _user_cache_lock:
+        _user_cache.clear()
+
+
+def user_cache_stats() -> dict:
+    with _user_cache_lock:
+        return {**_user_cache_stats, "size": len(_user_cache)}
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     session: Session = Depends(get_session),
 ) -> User:
+    token = credentials.credentials
+    cached = _cache_get(token)
+    if cached is not None:
+        return cached
+
     try:
-        payload = jwt.decode(
-            credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM]
-        )
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         user_id = payload.get("user_id")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired token") from None
 
-    user = session.get(User, user_id)
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    if "player_id" in payload:
+        # Primary-key lookup of one column: revoked tokens and deleted users fail here
+        version = session.exec(select(User.token_version).where(User.user_id == user_id)).first()
+        if version is None or version != payload.get("ver"):
+            raise HTTPException(status_code=401, detail="Token has been revoked")
+        user = User(
+            user_id=user_id,
+            email=payload.get("email"),
+            is_admin=payload.get("is_admin", False),
+            player_id=payload["player_id"],
+            token_version=version,
+        )
+        with _user_cache_lock:
+            _user_cache_stats["claims"] += 1
+    else:
+        user = session.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+
+    _cache_put(token, user, payload.get("exp"))
     return user
 
 
@@ -1,6 +1,10 @@
 import os
 
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import QueuePool
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///opl_db.db")
 # Fly Postgres uses postgres:// but SQLAlchemy requires postgresql://
@@ -9,13 +13,108 @@ if DATABASE_URL.startswith("postgres://"):
 elif DATABASE_URL.startswith("postgresql://"):
     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
 
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Pool tuning (Postgres). Fly's proxy drops idle connections, so recycle well before
+# that and ping on checkout rather than handing a dead socket to a request.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+# The async engine (polling endpoints) has its own, smaller pool. A process can hold
+# up to DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW
+# connections, so size the four together against Postgres' max_connections
+# divided by the number of processes.
+DB_ASYNC_POOL_SIZE = int(os.environ.get("DB_ASYNC_POOL_SIZE", "2"))
+DB_ASYNC_MAX_OVERFLOW = int(os.environ.get("DB_ASYNC_MAX_OVERFLOW", "3"))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+# Server-side statement timeout in milliseconds; 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "0"))
+# SQLite only: WAL journal + synchronous=NORMAL lets readers run alongside a writer
+SQLITE_WAL = os.environ.get("SQLITE_WAL", "").lower() == "true"
+
 connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
+engine_kwargs = {"pool_pre_ping": DB_POOL_PRE_PING}
+if IS_SQLITE:
     connect_args["check_same_thread"] = False
+else:
+    engine_kwargs.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+engine = create_engine(DATABASE_URL, connect_args=connect_args, **engine_kwargs)
+
+# Async engine for the read-heavy polling endpoints. psycopg serves both sync and
+# async; SQLite goes through aiosqlite.
+ASYNC_DATABASE_URL = (
+    DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1) if IS_SQLITE else DATABASE_URL
+)
+async_engine_kwargs = dict(engine_kwargs)
+if not IS_SQLITE:
+    async_engine_kwargs.update(pool_size=DB_ASYNC_POOL_SIZE, max_overflow=DB_ASYNC_MAX_OVERFLOW)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args={} if IS_SQLITE else connect_args,
+    **async_engine_kwargs,
+)
+
+_pool_counters = {"connects": 0, "checkouts": 0}
+
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, _connection_record):
+    _pool_counters["connects"] += 1
+    if IS_SQLITE and SQLITE_WAL:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+@event.listens_for(engine, "checkout")
+@event.listens_for(async_engine.sync_engine, "checkout")
+def _on_checkout(_dbapi_connection, _connection_record, _connection_proxy):
+    _pool_counters["checkouts"] += 1
+
+
+def _describe_pool(pool, max_overflow: int) -> dict:
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            limit=pool.size() + max_overflow,
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return stats
+
+
+def pool_stats() -> dict:
+    """Snapshot of both engines' connection pools for the admin stats endpoint.
+
+    ``max_connections`` is the most this process can hold open across both pools.
+    """
+    sync = _describe_pool(engine.pool, DB_MAX_OVERFLOW)
+    async_ = _describe_pool(async_engine.pool, DB_ASYNC_MAX_OVERFLOW)
+    stats = {**_pool_counters, "sync": sync, "async": async_}
+    if "limit" in sync and "limit" in async_:
+        stats["max_connections"] = sync["limit"] + async_["limit"]
+    return stats
 
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,286 @@
+"""Persistent outbound email queue.
+
+Request handlers and scheduler jobs call ``enqueue_email`` inside their own
+transaction, so an email exists exactly when the change that triggered it is
+committed and survives restarts and deploys. ``drain_outbox`` runs as a scheduler
+job: it claims due rows, sends them over a small pool of reused SMTP connections
+under a global rate limit, and records the outcome on each row. Failed sends are
+retried with exponential backoff until EMAIL_MAX_ATTEMPTS, then marked failed.
+
+Claims are leases: a row being sent carries ``next_attempt_at`` = claim expiry, so
+rows stranded by a crash are picked up again once the lease lapses. On Postgres
+the claim uses SKIP LOCKED, so several API instances can drain concurrently.
+"""
+
+import asyncio
+import contextlib
+import logging
+import math
+import os
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
+
+import aiosmtplib
+import markdown
+from sqlalchemy import func, insert, or_, update
+from sqlmodel import Session, select
+
+from models import EmailOutbox
+from services.database import engine
+from services.email_service import (
+    MAIL_FROM_NAME,
+    SMTP_HOST,
+    SMTP_PASSWORD,
+    SMTP_PORT,
+    SMTP_STARTTLS,
+    SMTP_USER,
+)
+from services.metrics import EMAIL_OUTCOMES, EMAIL_SEND_FAILURES, EMAIL_SEND_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Parallel SMTP connections, each reused for every email it sends in a run
+EMAIL_CONCURRENCY = int(os.environ.get('EMAIL_CONCURRENCY', '4'))
+# Global send rate across all connections; 0 disables the limit
+EMAIL_RATE_PER_SECOND = float(os.environ.get('EMAIL_RATE_PER_SECOND', '10'))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', '5'))
+# Delay before the first retry, doubled for every further attempt
+EMAIL_RETRY_BACKOFF_SECONDS = int(os.environ.get('EMAIL_RETRY_BACKOFF_SECONDS', '60'))
+EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', '200'))
+EMAIL_CLAIM_SECONDS = int(os.environ.get('EMAIL_CLAIM_SECONDS', '600'))
+EMAIL_OUTBOX_INTERVAL_SECONDS = int(os.environ.get('EMAIL_OUTBOX_INTERVAL_SECONDS', '15'))
+SMTP_TIMEOUT_SECONDS = 30
+# The drain job's lease covers one batch at the send rate, including a stalled
+# connection; drain_outbox renews it between batches
+EMAIL_OUTBOX_LEASE_SECONDS = max(
+    EMAIL_OUTBOX_INTERVAL_SECONDS - 1,
+    math.ceil(EMAIL_BATCH_SIZE / EMAIL_RATE_PER_SECOND if EMAIL_RATE_PER_SECOND > 0 else 0)
+    + SMTP_TIMEOUT_SECONDS,
+)
+
+# Errors after which the connection can't be trusted for the next message
+_CONNECTION_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    OSError,
+)
+
+
+def enqueue_email(session: Session, to: list[str], subject: str, body: str) -> int:
+    """Queue one email per distinct address; *body* is markdown. Returns rows queued.
+
+    Nothing is committed; the emails go out once the caller's transaction commits.
+    """
+    addresses = list(dict.fromkeys(a for a in to if a))
+    if not addresses:
+        return 0
+    html = markdown.markdown(body)
+    session.execute(
+        insert(EmailOutbox),
+        [{'to_address': address, 'subject': subject, 'html': html} for address in addresses],
+    )
+    return len(addresses)
+
+
+def enqueue_emails(session: Session, emails: Iterable[tuple[str, str, str]]) -> int:
+    """Queue individually rendered emails given as (to, subject, markdown body) tuples.
+
+    One executemany for the whole batch; rows without an address are skipped.
+    Nothing is committed. Returns rows queued.
+    """
+    rows = [
+        {'to_address': to, 'subject': subject, 'html': markdown.markdown(body)}
+        for to, subject, body in emails
+        if to
+    ]
+    if rows:
+        session.execute(insert(EmailOutbox), rows)
+    return len(rows)
+
+
+@dataclass
+class _Outgoing:
+    email_id: int
+    to_address: str
+    subject: str
+    html: str
+    attempts: int
+
+
+class _RateLimiter:
+    """Spaces sends at least 1/rate seconds apart across all workers."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1 / per_second if per_second > 0 else 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _smtp_client() -> aiosmtplib.SMTP:
+    credentials = {'username': SMTP_USER, 'password': SMTP_PASSWORD} if SMTP_PASSWORD else {}
+    return aiosmtplib.SMTP(
+        hostname=SMTP_HOST,
+        port=SMTP_PORT,
+        start_tls=SMTP_STARTTLS,
+        timeout=SMTP_TIMEOUT_SECONDS,
+        **credentials,
+    )
+
+
+def _build_message(email: _Outgoing) -> EmailMessage:
+    message = EmailMessage()
+    message['From'] = formataddr((MAIL_FROM_NAME, SMTP_USER))
+    message['To'] = email.to_address
+    message['Subject'] = email.subject
+    message.set_content(email.html, subtype='html')
+    return message
+
+
+async def _send_worker(
+    queue: asyncio.Queue, limiter: _RateLimiter, results: dict[int, str | None]
+) -> None:
+    smtp: aiosmtplib.SMTP | None = None
+    try:
+        while not queue.empty():
+            email = queue.get_nowait()
+            await limiter.wait()
+            start = time.perf_counter()
+            try:
+                if smtp is None:
+                    smtp = _smtp_client()
+                    await smtp.connect()
+                await smtp.send_message(_build_message(email))
+                results[email.email_id] = None
+                EMAIL_SEND_SECONDS.observe(time.perf_counter() - start)
+            except (aiosmtplib.SMTPException, OSError) as exc:
+                results[email.email_id] = str(exc) or type(exc).__name__
+                EMAIL_SEND_FAILURES.labels(type(exc).__name__).inc()
+                if isinstance(exc, _CONNECTION_ERRORS) and smtp is not None:
+                    smtp.close()
+                    smtp = None
+    finally:
+        if smtp is not None and smtp.is_connected:
+            with contextlib.suppress(aiosmtplib.SMTPException, OSError):
+                await smtp.quit()
+
+
+def _claim(session: Session, now: datetime) -> list[_Outgoing]:
+    rows = session.exec(
+        select(
+            EmailOutbox.email_id,
+            EmailOutbox.to_address,
+            EmailOutbox.subject,
+            EmailOutbox.html,
+            EmailOutbox.attempts,
+        )
+        .where(
+            EmailOutbox.status.in_(('pending', 'sending')),
+            EmailOutbox.next_attempt_at <= now,
+        )
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.email_id)
+        .limit(EMAIL_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if rows:
+        session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.email_id.in_([r.email_id for r in rows]))
+            .values(status='sending', next_attempt_at=now + timedelta(seconds=EMAIL_CLAIM_SECONDS))
+        )
+    session.commit()
+    return [_Outgoing(*row) for row in rows]
+
+
+def _record(
+    session: Session, emails: list[_Outgoing], results: dict[int, str | None]
+) -> dict[str, int]:
+    now = datetime.utcnow()
+    counts = {'sent': 0, 'retrying': 0, 'failed': 0}
+    updates = []
+    for email in emails:
+        error = results.get(email.email_id, 'not attempted')
+        attempts = email.attempts + 1
+        if email.email_id in results and error is None:
+            status = 'sent'
+            values = {'sent_at': now, 'last_error': None, 'next_attempt_at': now}
+        elif attempts >= EMAIL_MAX_ATTEMPTS:
+            status = 'failed'
+            values = {'sent_at': None, 'last_error': error, 'next_attempt_at': now}
+        else:
+            status = 'retrying'
+            backoff = timedelta(seconds=EMAIL_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1))
+            values = {'sent_at': None, 'last_error': error, 'next_attempt_at': now + backoff}
+        counts[status] += 1
+        updates.append(
+            {
+                'email_id': email.email_id,
+                'status': 'pending' if status == 'retrying' else status,
+                'attempts': attempts,
+                **values,
+            }
+        )
+    if updates:
+        session.execute(update(EmailOutbox), updates)
+    session.commit()
+    for status, count in counts.items():
+        EMAIL_OUTCOMES.labels(status).inc(count)
+    return counts
+
+
+async def drain_outbox(renew_lease: Callable[[], bool] | None = None) -> dict[str, int]:
+    """Send every email that is due; returns counts of sent, retrying and failed rows.
+
+    *renew_lease* is called after each batch, before the next claim; draining stops
+    as soon as it returns False.
+    """
+    totals = {'sent': 0, 'retrying': 0, 'failed': 0}
+    limiter = _RateLimiter(EMAIL_RATE_PER_SECOND)
+    with Session(engine) as session:
+        # Claiming and recording are blocking round-trips; they run in a worker
+        # thread so the event loop keeps serving requests while a batch is out
+        while emails := await asyncio.to_thread(_claim, session, datetime.utcnow()):
+            queue: asyncio.Queue = asyncio.Queue()
+            for email in emails:
+                queue.put_nowait(email)
+            results: dict[int, str | None] = {}
+            workers = min(EMAIL_CONCURRENCY, len(emails))
+            await asyncio.gather(*(_send_worker(queue, limiter, results) for _ in range(workers)))
+
+            counts = await asyncio.to_thread(_record, session, emails, results)
+            for status, count in counts.items():
+                totals[status] += count
+            if renew_lease is not None and not await asyncio.to_thread(renew_lease):
+                break
+    if totals['retrying'] or totals['failed']:
+        logger.warning('Email outbox: %s', totals)
+    return totals
+
+
+def outbox_stats(session: Session) -> dict[str, int]:
+    """Row counts per status, plus how many pending rows are already due."""
+    counts = dict(
+        session.exec(select(EmailOutbox.status, func.count()).group_by(EmailOutbox.status)).all()
+    )
+    counts['due'] = session.exec(
+        select(func.count()).where(
+            or_(EmailOutbox.status == 'pending', EmailOutbox.status == 'sending'),
+            EmailOutbox.next_attempt_at <= datetime.utcnow(),
+        )
+    ).one()
+    return counts
@@ -1,48 +1,25 @@
 import os
 
-import markdown
-from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
-
-conf = ConnectionConfig(
-    MAIL_USERNAME=os.environ.get('CSOPL_SMTP_USER', 'noreply@csopl.com'),
-    MAIL_PASSWORD=os.environ.get('CSOPL_SMTP_PASSWORD', ''),
-    MAIL_FROM=os.environ.get('CSOPL_SMTP_USER', 'noreply@csopl.com'),
-    MAIL_PORT=int(os.environ.get('CSOPL_SMTP_PORT', '587')),
-    MAIL_SERVER=os.environ.get('CSOPL_SMTP_HOST', 'smtp.purelymail.com'),
-    MAIL_FROM_NAME='CSOPL',
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-)
-
-fm = FastMail(conf)
-
-
-async def send_email(to: list[str], subject: str, body: str) -> None:
-    """Send an HTML email. Body is markdown that gets rendered to HTML."""
-    if not to:
-        return
-    html = markdown.markdown(body)
-    message = MessageSchema(
-        subject=subject,
-        recipients=to,
-        body=html,
-        subtype=MessageType.html,
-    )
-    await fm.send_message(message)
-
-
-async def send_match_reminder(
-    player_email: str,
+SMTP_HOST = os.environ.get('CSOPL_SMTP_HOST', 'smtp.purelymail.com')
+SMTP_PORT = int(os.environ.get('CSOPL_SMTP_PORT', '587'))
+SMTP_USER = os.environ.get('CSOPL_SMTP_USER', 'noreply@csopl.com')
+SMTP_PASSWORD = os.environ.get('CSOPL_SMTP_PASSWORD', '')
+SMTP_STARTTLS = os.environ.get('CSOPL_SMTP_STARTTLS', 'true').lower() == 'true'
+MAIL_FROM_NAME = 'CSOPL'
+
+MATCH_REMINDER_SUBJECT = 'Match Reminder - CSOPL'
+
+
+def match_reminder_body(
     player_name: str,
     opponent_name: str,
     opponent_rating: int,
     player_weight: int,
     match_time: str,
     scheduled_date: str,
-) -> None:
-    """Send a match reminder email to a single player."""
-    body = f"""# Match Reminder
+) -> str:
+    """Markdown body of the match-day reminder email."""
+    return f"""# Match Reminder
 
 Hi {player_name},
 
@@ -54,4 +31,3 @@ Good luck!
 
 — CSOPL
 """
-    await send_email([player_email], 'Match Reminder - CSOPL', body)
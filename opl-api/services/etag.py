@@ -0,0 +1,80 @@
+"""Conditional GET support.
+
+Polled endpoints (the score-submission view, list pages left open in idle tabs)
+mostly return the same body over and over. ``ETagMiddleware`` tags every 200 GET
+response with a hash of its body and answers a matching ``If-None-Match`` with an
+empty 304, so the client skips the download and re-render. Endpoints that can
+derive a validator without running their query set the ``ETag`` header themselves
+(see ``get_match_score``); the middleware leaves those responses alone.
+"""
+
+import hashlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Clients must revalidate on every use, but may keep the body in their private cache
+CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts) -> str:
+    return 'W/"' + '-'.join(str(p) for p in parts) + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of *etag* against an If-None-Match header value."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag.removeprefix('W/') in {
+        tag.removeprefix('W/') for tag in candidates
+    }
+
+
+class ETagMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['method'] != 'GET':
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get('if-none-match')
+        start: Message | None = None
+        chunks: list[bytes] = []
+        passthrough = False
+
+        async def buffered_send(message: Message) -> None:
+            nonlocal start, passthrough
+            if message['type'] == 'http.response.start':
+                headers = Headers(raw=message['headers'])
+                passthrough = message['status'] != 200 or 'etag' in headers
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message['type'] != 'http.response.body':
+                await send(message)
+                return
+
+            chunks.append(message.get('body', b''))
+            if message.get('more_body', False):
+                return
+
+            body = b''.join(chunks)
+            etag = make_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+            headers = MutableHeaders(raw=start['headers'])
+            headers['ETag'] = etag
+            headers.setdefault('Cache-Control', CACHE_CONTROL)
+            if etag_matches(if_none_match, etag):
+                del headers['content-length']
+                del headers['content-type']
+                await send({**start, 'status': 304, 'headers': headers.raw})
+                await send({'type': 'http.response.body', 'body': b''})
+            else:
+                await send({**start, 'headers': headers.raw})
+                await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, buffered_send)
@@ -0,0 +1,82 @@
+"""Message delivery: who receives a message and where that is recorded.
+
+By default division and league broadcasts are resolved when an inbox is read.
+With ``MESSAGE_FANOUT=true`` ``create_message`` instead writes one
+message_recipients row per targeted player up front, so an inbox (and its unread
+count) is a single indexed lookup on message_recipients. Broadcasts reach the
+players targeted at send time; later joiners do not see older announcements.
+Run ``scripts/backfill_message_recipients.py`` when switching an existing
+database over.
+"""
+
+import os
+
+from sqlalchemy import and_, exists, insert
+from sqlmodel import Session, select
+
+from models import DivisionPlayer, Message, MessageRecipient, Player
+
+MESSAGE_FANOUT = os.environ.get('MESSAGE_FANOUT', '').lower() == 'true'
+
+
+def broadcast_player_ids(
+    session: Session, recipient_type: str, recipient_id: int | None
+) -> list[int]:
+    """Player ids targeted by a division or league message."""
+    if recipient_type == 'league':
+        query = select(Player.player_id).where(Player.deleted == False)  # noqa: E712
+    elif recipient_type == 'division' and recipient_id:
+        query = select(DivisionPlayer.player_id).where(DivisionPlayer.division_id == recipient_id)
+    else:
+        return []
+    return list(session.exec(query).all())
+
+
+def fan_out(session: Session, message_id: int, player_ids: list[int]) -> None:
+    """Insert one recipient row per player with a single executemany."""
+    if player_ids:
+        session.execute(
+            insert(MessageRecipient),
+            [{'message_id': message_id, 'player_id': pid} for pid in dict.fromkeys(player_ids)],
+        )
+
+
+def backfill_recipients(session: Session) -> int:
+    """Add the missing recipient rows for existing broadcasts; returns rows inserted.
+
+    Uses current division membership and the current player list. Existing rows
+    (and their read_at) are left untouched. Nothing is committed.
+    """
+    inserted = 0
+    league = (
+        select(Message.message_id, Player.player_id)
+        .join(Player, and_(Message.recipient_type == 'league', Player.deleted == False))  # noqa: E712
+        .where(
+            ~exists().where(
+                MessageRecipient.message_id == Message.message_id,
+                MessageRecipient.player_id == Player.player_id,
+            )
+        )
+    )
+    division = (
+        select(Message.message_id, DivisionPlayer.player_id)
+        .join(
+            DivisionPlayer,
+            and_(
+                Message.recipient_type == 'division',
+                DivisionPlayer.division_id == Message.recipient_id,
+            ),
+        )
+        .where(
+            ~exists().where(
+                MessageRecipient.message_id == Message.message_id,
+                MessageRecipient.player_id == DivisionPlayer.player_id,
+            )
+        )
+    )
+    for query in (league, division):
+        result = session.execute(
+            insert(MessageRecipient).from_select(['message_id', 'player_id'], query)
+        )
+        inserted += result.rowcount
+    return inserted
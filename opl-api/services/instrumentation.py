@@ -0,0 +1,163 @@
+"""Per-request latency, SQL statement counts, database time and slow-statement logging.
+
+Cursor listeners on every Engine (the sync and async app engines, and the test
+engines) time each statement and add it to the current request's stats.
+``RequestStatsMiddleware`` keeps those stats in a ContextVar. Sync endpoints see it
+through the threadpool's copied context and async ones through SQLAlchemy's
+greenlet. When the response starts, the middleware reports the stats in a
+``Server-Timing`` header. When the request ends, it records them per route
+template in the Prometheus metrics, along with the request's latency and status.
+It also tracks the number of requests in flight.
+
+A statement slower than SLOW_QUERY_MS is logged with its SQL and the shape of its
+bound parameters, meaning types and counts but not values. That is enough to
+recognise an unbounded IN list or a per-row executemany without leaking player
+data into the logs.
+"""
+
+import logging
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from itertools import groupby
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.metrics import (
+    DB_SECONDS,
+    DB_SLOW_STATEMENTS,
+    DB_STATEMENTS,
+    REQUEST_SECONDS,
+    REQUESTS_IN_FLIGHT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Statements at least this slow are logged and counted; 0 disables
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '250'))
+SERVER_TIMING_HEADER = 'Server-Timing'
+_STATUS_CLASSES = ('0xx', '1xx', '2xx', '3xx', '4xx', '5xx')
+
+
+@dataclass
+class _RequestStats:
+    scope: Scope = field(default_factory=dict)
+    status: int = 500
+    statements: int = 0
+    db_seconds: float = 0.0
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get('route')
+        return getattr(route, 'path', 'unmatched')
+
+
+_current: ContextVar[_RequestStats | None] = ContextVar('opl_request_stats', default=None)
+# Statement lists of the active assert_max_queries blocks
+_recorders: list[list[str]] = []
+
+
+def parameter_shape(parameters, executemany: bool = False) -> str:
+    """Types of bound parameters, with runs collapsed: "(int x 250, str)"."""
+    if executemany:
+        return f'{len(parameters)} x {parameter_shape(parameters[0])}' if parameters else '[]'
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{k}: {type(v).__name__}' for k, v in parameters.items()) + '}'
+    runs = [
+        (name, len(list(group)))
+        for name, group in groupby(type(v).__name__ for v in parameters or ())
+    ]
+    return (
+        '(' + ', '.join(name if count == 1 else f'{name} x {count}' for name, count in runs) + ')'
+    )
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info['statement_start'] = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, _cursor, statement, parameters, _context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop('statement_start', time.perf_counter())
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+    for recorder in tuple(_recorders):
+        recorder.append(statement)
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        route = stats.route if stats is not None else 'background'
+        DB_SLOW_STATEMENTS.labels(route).inc()
+        logger.warning(
+            'Slow SQL (%.0f ms, %s): %s params=%s',
+            elapsed * 1000,
+            route,
+            ' '.join(statement.split()),
+            parameter_shape(parameters, executemany),
+        )
+
+
+class RequestStatsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats(scope)
+        token = _current.set(stats)
+        start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+
+        async def timed_send(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                stats.status = message['status']
+                total_ms = (time.perf_counter() - start) * 1000
+                MutableHeaders(scope=message).append(
+                    SERVER_TIMING_HEADER,
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} queries", app;dur={total_ms:.1f}',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            _current.reset(token)
+            route = stats.route
+            REQUEST_SECONDS.labels(
+                route, scope['method'], _STATUS_CLASSES[min(stats.status // 100, 5)]
+            ).observe(elapsed)
+            DB_STATEMENTS.labels(route).observe(stats.statements)
+            DB_SECONDS.labels(route).observe(stats.db_seconds)
+
+
+@contextmanager
+def assert_max_queries(n: int) -> Iterator[list[str]]:
+    """Fail if the block runs more than *n* SQL statements, on any engine or thread.
+
+    For tests: locks in N+1 fixes. Yields the list of statements as they run.
+    """
+    statements: list[str] = []
+    _recorders.append(statements)
+    try:
+        yield statements
+    finally:
+        _recorders.remove(statements)
+    if len(statements) > n:
+        listing = '\n'.join(
+            f'  {i + 1}. {" ".join(s.split())[:200]}' for i, s in enumerate(statements)
+        )
+        raise AssertionError(
+            f'{len(statements)} SQL statements executed, expected at most {n}:\n{listing}'
+        )
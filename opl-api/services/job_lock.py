@@ -0,0 +1,191 @@
+"""Leases that keep scheduled jobs to one run per tick across API instances.
+
+Every instance with SCHEDULER_ROLE=worker runs the APScheduler loop. Before a job
+body runs, the instance takes the job's lease with a conditional UPDATE on
+scheduler_locks: it succeeds only if the previous lease has expired. The lease is
+not released when the job finishes. It covers the whole tick, so another machine
+firing the same cron a moment later skips it. Lease lengths therefore sit between
+a job's expected runtime and its interval. Jobs whose runtime depends on their
+backlog renew the lease as they go (``renew_lease``). Polling jobs, whose lease only
+has to keep runs from overlapping, pass ``release=True``. The lease is then dropped
+when the run ends, and the next tick on any instance can start on time.
+
+The lease and run-record writes are blocking round-trips, so they run in a worker
+thread, leaving the event loop free between ticks.
+
+Each run that takes the lease is recorded in scheduler_job_runs with its duration
+and outcome. It is also counted in the job metrics, together with the number of
+items the job reports having handled.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import socket
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from models import JobRun, SchedulerLock
+from services.database import engine
+from services.metrics import JOB_ITEMS, JOB_RUNS, JOB_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# "worker" runs scheduled jobs; "web" serves requests only
+SCHEDULER_ROLE = os.environ.get('SCHEDULER_ROLE', 'worker').lower()
+HOLDER = f'{os.environ.get("FLY_MACHINE_ID") or socket.gethostname()}:{os.getpid()}'
+
+
+def acquire_lease(session: Session, job_id: str, seconds: int, holder: str = HOLDER) -> bool:
+    """Take *job_id*'s lease for *seconds* if it is free; commits either way."""
+    now = datetime.utcnow()
+    until = now + timedelta(seconds=seconds)
+    result = session.execute(
+        update(SchedulerLock)
+        .where(SchedulerLock.job_id == job_id, SchedulerLock.locked_until <= now)
+        .values(holder=holder, locked_until=until)
+    )
+    if result.rowcount:
+        session.commit()
+        return True
+
+    if session.get(SchedulerLock, job_id) is not None:
+        session.rollback()
+        return False
+    # First run of this job anywhere; a concurrent insert loses on the primary key
+    try:
+        session.add(SchedulerLock(job_id=job_id, holder=holder, locked_until=until))
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        return False
+    return True
+
+
+def renew_lease(session: Session, job_id: str, seconds: int, holder: str = HOLDER) -> bool:
+    """Push *holder*'s unexpired lease on *job_id* to *seconds* from now; commits.
+
+    For jobs that can outrun their lease. False means the lease lapsed or another
+    instance holds it, and the job should stop.
+    """
+    now = datetime.utcnow()
+    result = session.execute(
+        update(SchedulerLock)
+        .where(
+            SchedulerLock.job_id == job_id,
+            SchedulerLock.holder == holder,
+            SchedulerLock.locked_until > now,
+        )
+        .values(locked_until=now + timedelta(seconds=seconds))
+    )
+    session.commit()
+    return bool(result.rowcount)
+
+
+def release_lease(session: Session, job_id: str, holder: str = HOLDER) -> None:
+    """End *holder*'s lease on *job_id* now; a lease another instance took is left alone."""
+    now = datetime.utcnow()
+    session.execute(
+        update(SchedulerLock)
+        .where(
+            SchedulerLock.job_id == job_id,
+            SchedulerLock.holder == holder,
+            SchedulerLock.locked_until > now,
+        )
+        .values(locked_until=now)
+    )
+    session.commit()
+
+
+def _in_session[T](work: Callable[..., T], *args) -> T:
+    with Session(engine) as session:
+        return work(session, *args)
+
+
+def _record_run(session: Session, run: JobRun) -> None:
+    session.add(run)
+    session.commit()
+
+
+def leased(job_id: str, lease_seconds: int, record_idle: bool = True, release: bool = False):
+    """Wrap a scheduler coroutine so it runs only under *job_id*'s lease.
+
+    A job may return the number of items it handled, which is added to the job's
+    item counter. With ``record_idle=False`` runs whose job returns a falsy value
+    are not recorded, for frequent polling jobs that usually find nothing to do.
+    With ``release=True`` the lease is released as soon as the run finishes.
+    """
+
+    def decorator(job: Callable[[], Awaitable]):
+        @functools.wraps(job)
+        async def run() -> None:
+            if not await asyncio.to_thread(_in_session, acquire_lease, job_id, lease_seconds):
+                return
+
+            started_at = datetime.utcnow()
+            start = time.perf_counter()
+            status, error, result = 'ok', None, None
+            try:
+                result = await job()
+            except Exception as exc:
+                status, error = 'error', f'{type(exc).__name__}: {exc}'
+                logger.exception('Scheduled job %s failed', job_id)
+            finally:
+                if release:
+                    await asyncio.to_thread(_in_session, release_lease, job_id)
+            duration = time.perf_counter() - start
+
+            JOB_SECONDS.labels(job_id).observe(duration)
+            JOB_RUNS.labels(job_id, status).inc()
+            if isinstance(result, int):
+                JOB_ITEMS.labels(job_id).inc(result)
+            if status == 'ok' and not result and not record_idle:
+                return
+            record = JobRun(
+                job_id=job_id,
+                holder=HOLDER,
+                started_at=started_at,
+                duration_ms=round(duration * 1000),
+                status=status,
+                error=error,
+            )
+            await asyncio.to_thread(_in_session, _record_run, record)
+
+        return run
+
+    return decorator
+
+
+def job_stats(session: Session) -> list[dict]:
+    """Lease and most recent run of every job that has run at least once."""
+    latest = (
+        select(JobRun.job_id, func.max(JobRun.run_id).label('run_id'))
+        .group_by(JobRun.job_id)
+        .subquery()
+    )
+    runs = {
+        run.job_id: run
+        for run in session.exec(select(JobRun).join(latest, JobRun.run_id == latest.c.run_id)).all()
+    }
+    locks = {lock.job_id: lock for lock in session.exec(select(SchedulerLock)).all()}
+    stats = []
+    for job_id in sorted(runs.keys() | locks.keys()):
+        run, lock = runs.get(job_id), locks.get(job_id)
+        stats.append(
+            {
+                'job_id': job_id,
+                'holder': lock.holder if lock else None,
+                'locked_until': lock.locked_until if lock else None,
+                'last_started_at': run.started_at if run else None,
+                'last_duration_ms': run.duration_ms if run else None,
+                'last_status': run.status if run else None,
+                'last_error': run.error if run else None,
+            }
+        )
+    return stats
@@ -0,0 +1,110 @@
+"""Set-based updates to every match of a session or division.
+
+Deleting a season or moving its match night touches hundreds of rows; each helper
+here is one UPDATE and returns the number of matches it changed. The date
+arithmetic is compiled per dialect (Postgres interval math, SQLite's datetime()
+modifiers) so the rows never have to be loaded into Python. Moving match dates
+changes the sessions' start and end dates, so the cached session list is marked
+stale.
+"""
+
+from sqlalchemy import DateTime, literal, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlmodel import Session
+
+from models import Match
+from services.response_cache import SESSIONS, mark_stale
+
+# Response header carrying how many matches an update endpoint rewrote
+MATCHES_UPDATED_HEADER = 'X-Matches-Updated'
+
+
+class AtTimeOfDay(FunctionElement):
+    """The same day as a timestamp, at hour:minute:00."""
+
+    type = DateTime()
+    inherit_cache = True
+
+    def __init__(self, timestamp, hour: int, minute: int):
+        super().__init__(timestamp, literal(hour), literal(minute))
+
+
+class OnWeekday(FunctionElement):
+    """The given weekday (0 = Monday) of a timestamp's Monday-based week, same time of day."""
+
+    type = DateTime()
+    inherit_cache = True
+
+    def __init__(self, timestamp, weekday: int):
+        super().__init__(timestamp, literal(weekday))
+
+
+@compiles(AtTimeOfDay)
+def _at_time_of_day(element, compiler, **kw):
+    ts, hour, minute = (compiler.process(c, **kw) for c in element.clauses)
+    return f"date_trunc('day', {ts}) + make_interval(0, 0, 0, 0, {hour}, {minute})"
+
+
+@compiles(AtTimeOfDay, 'sqlite')
+def _at_time_of_day_sqlite(element, compiler, **kw):
+    # SQLAlchemy stores SQLite datetimes as 'YYYY-MM-DD HH:MM:SS.ffffff'
+    ts, hour, minute = (compiler.process(c, **kw) for c in element.clauses)
+    return f"date({ts}) || printf(' %02d:%02d:00.000000', {hour}, {minute})"
+
+
+@compiles(OnWeekday)
+def _on_weekday(element, compiler, **kw):
+    ts, weekday = (compiler.process(c, **kw) for c in element.clauses)
+    return (
+        f'{ts} + make_interval(0, 0, 0, {weekday} + 1 - CAST(extract(isodow FROM {ts}) AS INTEGER))'
+    )
+
+
+@compiles(OnWeekday, 'sqlite')
+def _on_weekday_sqlite(element, compiler, **kw):
+    # datetime() drops the fractional seconds; carry the original suffix over
+    ts, weekday = (compiler.process(c, **kw) for c in element.clauses)
+    return (
+        f"datetime({ts}, printf('%+d days', {weekday} - (CAST(strftime('%w', {ts}) AS INTEGER) + 6) % 7))"
+        f' || substr({ts}, 20)'
+    )
+
+
+def _update_matches(session: Session, where: list, **values) -> int:
+    result = session.execute(
+        update(Match)
+        .where(*where, Match.deleted == False)  # noqa: E712
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def soft_delete_matches(session: Session, *where) -> int:
+    """Soft-delete every live match matching *where*. Nothing is committed."""
+    return _update_matches(session, list(where), deleted=True)
+
+
+def set_match_time(session: Session, session_id: int, hour: int, minute: int) -> int:
+    """Move a session's upcoming matches to hour:minute on the same day."""
+    mark_stale(session, SESSIONS)
+    return _update_matches(
+        session,
+        [Match.session_id == session_id, Match.completed == False],  # noqa: E712
+        scheduled_date=AtTimeOfDay(Match.scheduled_date, hour, minute),
+    )
+
+
+def set_match_weekday(session: Session, division_id: int, day_of_week: int | None) -> int:
+    """Move a division's upcoming matches to *day_of_week* of the same week.
+
+    None makes them weekly matches, dated the Monday of their week.
+    """
+    mark_stale(session, SESSIONS)
+    return _update_matches(
+        session,
+        [Match.division_id == division_id, Match.completed == False],  # noqa: E712
+        scheduled_date=OnWeekday(Match.scheduled_date, day_of_week or 0),
+        is_weekly=day_of_week is None,
+    )
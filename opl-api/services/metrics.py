@@ -0,0 +1,66 @@
+"""Prometheus metrics for this API process, scraped from GET /metrics.
+
+Metric objects live here so instrumentation, routers and scheduler jobs share one
+registry. Labels are route templates ("/matches/{match_id}/"), never raw paths, to
+keep cardinality bounded.
+"""
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+REQUEST_SECONDS = Histogram(
+    'opl_http_request_seconds',
+    'Time to serve a request, by route template and status class',
+    ['route', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_FLIGHT = Gauge('opl_http_requests_in_flight', 'Requests currently being served')
+
+DB_STATEMENTS = Histogram(
+    'opl_db_statements_per_request',
+    'SQL statements executed while serving a request',
+    ['route'],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+DB_SECONDS = Histogram(
+    'opl_db_seconds_per_request',
+    'Time spent executing SQL while serving a request',
+    ['route'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_SLOW_STATEMENTS = Counter(
+    'opl_db_slow_statements_total',
+    'SQL statements slower than SLOW_QUERY_MS',
+    ['route'],
+)
+
+JOB_SECONDS = Histogram(
+    'opl_job_seconds',
+    'Runtime of scheduled jobs that took their lease',
+    ['job'],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+JOB_RUNS = Counter('opl_job_runs_total', 'Scheduled job runs by outcome', ['job', 'status'])
+JOB_ITEMS = Counter(
+    'opl_job_items_total',
+    'Items a job handled: reminders queued, disputes escalated, emails drained',
+    ['job'],
+)
+
+EMAIL_SEND_SECONDS = Histogram(
+    'opl_email_send_seconds',
+    'Time to hand one email to the SMTP server',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+EMAIL_SEND_FAILURES = Counter(
+    'opl_email_send_failures_total', 'Emails the SMTP server did not accept', ['error']
+)
+EMAIL_OUTCOMES = Counter(
+    'opl_email_outcomes_total',
+    'Outbox rows recorded after a send attempt: sent, retrying or failed for good',
+    ['status'],
+)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """The exposition body and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
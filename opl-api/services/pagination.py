@@ -0,0 +1,65 @@
+"""Keyset pagination for the date-ordered list endpoints.
+
+A cursor is the (timestamp, id) of the last row on a page, encoded as an opaque
+url-safe string. The next page starts strictly after that key, so every page is a
+bounded index range scan no matter how far back the client has paged. Pagination
+is opt-in: without ``limit`` the endpoints keep returning the full list.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    raw = f'{sort_value.isoformat()}|{row_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        sort_value, row_id = raw.split('|')
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=422, detail='Invalid cursor') from None
+
+
+def keyset(
+    query, sort_column, id_column, limit: int | None, after: str | None, descending: bool = False
+):
+    """Order *query* by (sort_column, id_column) and restrict it to the page after *after*.
+
+    Fetches one extra row when *limit* is set so ``page`` can tell whether another
+    page follows.
+    """
+    if after is not None:
+        key = tuple_(sort_column, id_column)
+        bound = decode_cursor(after)
+        query = query.where(key < bound if descending else key > bound)
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column, id_column)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query
+
+
+def page(rows, limit: int | None, response: Response, sort_attr: str, id_attr: str) -> list:
+    """Trim the look-ahead row and advertise the next cursor in a response header."""
+    rows = list(rows)
+    if limit is None or len(rows) <= limit:
+        return rows
+    rows = rows[:limit]
+    last = rows[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+        getattr(last, sort_attr), getattr(last, id_attr)
+    )
+    return rows
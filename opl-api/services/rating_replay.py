@@ -0,0 +1,173 @@
+"""In-memory rating replay used when a completed match is rescored.
+
+Ratings are path dependent: changing the games of an early match shifts the
+ratings (and possibly games_played) of both players, which changes the snapshot
+ratings of every later game they played, and — through games_played — the rating
+changes their later opponents received. This module loads every game played after
+the rescored match in one query, rewinds all players to their state at that point,
+and replays history over compact per-player state arrays. Only rows whose values
+actually change are written back, in one bulk UPDATE per table.
+"""
+
+from dataclasses import dataclass, field
+
+from sqlalchemy import delete, update
+from sqlmodel import Session, select
+
+from models import Game, Player
+from services.response_cache import PLAYERS, mark_stale
+from services.scoring import GameResult
+from utils import calculate_rating_change
+
+
+@dataclass
+class ReplayResult:
+    new_games: list[Game] = field(default_factory=list)
+    games_updated: int = 0
+    # player_id -> final rating, for players whose row was rewritten
+    ratings: dict[int, int] = field(default_factory=dict)
+
+
+def replay_rescored_match(
+    session: Session,
+    match_id: int,
+    old_games: list[Game],
+    new_games: list[GameResult],
+) -> ReplayResult:
+    """Replace a match's games with *new_games* and replay all later games.
+
+    The new games keep the earliest played_date of *old_games*. Games from other
+    matches with a later played_date are replayed in (played_date, game_id) order.
+    Nothing is committed; the caller owns the transaction.
+    """
+    played_date = min(g.played_date for g in old_games)
+
+    later = session.exec(
+        select(
+            Game.game_id,
+            Game.winner_id,
+            Game.loser_id,
+            Game.winner_rating,
+            Game.loser_rating,
+            Game.winner_rating_change,
+            Game.loser_rating_change,
+            Game.balls_remaining,
+        )
+        .where(Game.match_id != match_id)
+        .where(Game.played_date > played_date)
+        .order_by(Game.played_date, Game.game_id)
+    ).all()
+
+    player_ids = {g.winner_id for g in old_games} | {g.loser_id for g in old_games}
+    player_ids |= {g.winner_id for g in new_games} | {g.loser_id for g in new_games}
+    player_ids |= {g.winner_id for g in later} | {g.loser_id for g in later}
+
+    current = session.exec(
+        select(Player.player_id, Player.rating, Player.games_played).where(
+            Player.player_id.in_(player_ids)
+        )
+    ).all()
+    index = {row.player_id: i for i, row in enumerate(current)}
+    rating = [row.rating for row in current]
+    played = [row.games_played for row in current]
+
+    # Rewind everyone to their state just before the rescored match
+    for g in (*old_games, *later):
+        w, lo = index[g.winner_id], index[g.loser_id]
+        rating[w] -= g.winner_rating_change
+        rating[lo] -= g.loser_rating_change
+        played[w] -= 1
+        played[lo] -= 1
+
+    # The original timeline, advanced alongside the replay so we can tell which
+    # players have actually diverged and skip recomputing everyone else
+    orig_rating = list(rating)
+    orig_played = list(played)
+    for g in old_games:
+        w, lo = index[g.winner_id], index[g.loser_id]
+        orig_rating[w] += g.winner_rating_change
+        orig_rating[lo] += g.loser_rating_change
+        orig_played[w] += 1
+        orig_played[lo] += 1
+
+    result = ReplayResult()
+    for g in new_games:
+        w, lo = index[g.winner_id], index[g.loser_id]
+        winner_change, loser_change = calculate_rating_change(
+            played[w], played[lo], g.balls_remaining
+        )
+        result.new_games.append(
+            Game(
+                match_id=match_id,
+                winner_id=g.winner_id,
+                loser_id=g.loser_id,
+                winner_rating=rating[w],
+                loser_rating=rating[lo],
+                winner_rating_change=winner_change,
+                loser_rating_change=loser_change,
+                balls_remaining=g.balls_remaining,
+                played_date=played_date,
+            )
+        )
+        rating[w] += winner_change
+        rating[lo] += loser_change
+        played[w] += 1
+        played[lo] += 1
+
+    game_updates = []
+    for g in later:
+        w, lo = index[g.winner_id], index[g.loser_id]
+        diverged = (
+            rating[w] != orig_rating[w]
+            or played[w] != orig_played[w]
+            or rating[lo] != orig_rating[lo]
+            or played[lo] != orig_played[lo]
+        )
+        if diverged:
+            winner_change, loser_change = calculate_rating_change(
+                played[w], played[lo], g.balls_remaining
+            )
+            if (rating[w], rating[lo], winner_change, loser_change) != (
+                g.winner_rating,
+                g.loser_rating,
+                g.winner_rating_change,
+                g.loser_rating_change,
+            ):
+                game_updates.append(
+                    {
+                        'game_id': g.game_id,
+                        'winner_rating': rating[w],
+                        'loser_rating': rating[lo],
+                        'winner_rating_change': winner_change,
+                        'loser_rating_change': loser_change,
+                    }
+                )
+        else:
+            winner_change, loser_change = g.winner_rating_change, g.loser_rating_change
+
+        orig_rating[w] += g.winner_rating_change
+        orig_rating[lo] += g.loser_rating_change
+        orig_played[w] += 1
+        orig_played[lo] += 1
+        rating[w] += winner_change
+        rating[lo] += loser_change
+        played[w] += 1
+        played[lo] += 1
+
+    player_updates = [
+        {'player_id': row.player_id, 'rating': rating[i], 'games_played': played[i]}
+        for i, row in enumerate(current)
+        if (rating[i], played[i]) != (row.rating, row.games_played)
+    ]
+
+    session.execute(delete(Game).where(Game.match_id == match_id))
+    session.add_all(result.new_games)
+    if game_updates:
+        session.execute(update(Game), game_updates)
+    if player_updates:
+        session.execute(update(Player), player_updates)
+        mark_stale(session, PLAYERS)
+
+    result.games_updated = len(game_updates)
+    result.ratings = {u['player_id']: u['rating'] for u in player_updates}
+    return result
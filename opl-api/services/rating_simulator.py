@@ -0,0 +1,162 @@
+"""What-if rating simulation over the full game history.
+
+``load_snapshot`` reads the games table once, in (played_date, game_id) order, into
+flat columns of player indices and balls remaining, and rewinds every player to
+their rating and games_played before their first recorded game. ``simulate``
+replays that snapshot under any K-factor table without touching the database, so
+admins can compare the league's actual ratings with an alternative formula.
+
+A rating change depends only on the players' games_played and the balls remaining,
+never on the ratings themselves, so the replay is a single pass of table lookups.
+"""
+
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlmodel import Session, select
+
+from models import Game, Player
+from utils import DEFAULT_K_FACTORS, KFactorTable
+
+
+@dataclass
+class RatingSnapshot:
+    # Per player, indexed by position in player_ids
+    player_ids: list[int]
+    start_rating: list[int]
+    start_played: list[int]
+    actual_rating: list[int]
+    # Per game, in replay order; winner and loser are indices into player_ids
+    game_ids: array
+    winner: array
+    loser: array
+    balls: array
+    played_date: list[datetime]
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+
+@dataclass
+class SimulationResult:
+    snapshot: RatingSnapshot
+    rating: list[int]
+    games_played: list[int]
+    # Per game: both players' ratings after the game
+    winner_after: array
+    loser_after: array
+
+    def trajectories(
+        self, player_ids: list[int] | None = None
+    ) -> dict[int, list[tuple[datetime, int]]]:
+        """(played_date, rating after the game) per game, for each requested player."""
+        snap = self.snapshot
+        index = {pid: i for i, pid in enumerate(snap.player_ids)}
+        wanted = (
+            index.values() if player_ids is None else [index[p] for p in player_ids if p in index]
+        )
+        points: dict[int, list] = {i: [] for i in wanted}
+        dates = snap.played_date
+        for g, (w, lo) in enumerate(zip(snap.winner, snap.loser, strict=True)):
+            if w in points:
+                points[w].append((dates[g], self.winner_after[g]))
+            if lo in points:
+                points[lo].append((dates[g], self.loser_after[g]))
+        return {snap.player_ids[i]: p for i, p in points.items()}
+
+
+def load_snapshot(session: Session) -> RatingSnapshot:
+    """Read every game and player once and rewind players to their starting state."""
+    games = session.exec(
+        select(
+            Game.game_id,
+            Game.winner_id,
+            Game.loser_id,
+            Game.winner_rating_change,
+            Game.loser_rating_change,
+            Game.balls_remaining,
+            Game.played_date,
+        ).order_by(Game.played_date, Game.game_id)
+    ).all()
+    players = session.exec(
+        select(Player.player_id, Player.rating, Player.games_played).order_by(Player.player_id)
+    ).all()
+
+    index = {row.player_id: i for i, row in enumerate(players)}
+    start_rating = [row.rating for row in players]
+    start_played = [row.games_played for row in players]
+    winner, loser = array('l'), array('l')
+    for g in games:
+        w, lo = index[g.winner_id], index[g.loser_id]
+        winner.append(w)
+        loser.append(lo)
+        start_rating[w] -= g.winner_rating_change
+        start_rating[lo] -= g.loser_rating_change
+        start_played[w] -= 1
+        start_played[lo] -= 1
+
+    return RatingSnapshot(
+        player_ids=[row.player_id for row in players],
+        start_rating=start_rating,
+        start_played=start_played,
+        actual_rating=[row.rating for row in players],
+        game_ids=array('q', (g.game_id for g in games)),
+        winner=winner,
+        loser=loser,
+        balls=array('l', (g.balls_remaining for g in games)),
+        played_date=[g.played_date for g in games],
+    )
+
+
+def simulate(
+    snapshot: RatingSnapshot, k_factors: KFactorTable = DEFAULT_K_FACTORS
+) -> SimulationResult:
+    """Replay every game in *snapshot* with *k_factors*; the database is not touched."""
+    rating = list(snapshot.start_rating)
+    # K is indexed by games_played - low; low < 0 only if a games_played was edited by hand
+    low = min([0, *snapshot.start_played])
+    played = [p - low for p in snapshot.start_played]
+    k = [k_factors[n] for n in range(low, 0)] + k_factors.values(
+        max([0, *played]) + len(snapshot) + 1
+    )
+    winner_after = array('l', [0]) * len(snapshot)
+    loser_after = array('l', [0]) * len(snapshot)
+
+    for g, (w, lo, balls) in enumerate(
+        zip(snapshot.winner, snapshot.loser, snapshot.balls, strict=True)
+    ):
+        rating[w] += k[played[w]] + balls
+        rating[lo] -= k[played[lo]] + balls
+        played[w] += 1
+        played[lo] += 1
+        winner_after[g] = rating[w]
+        loser_after[g] = rating[lo]
+
+    return SimulationResult(snapshot, rating, [p + low for p in played], winner_after, loser_after)
+
+
+def simulation_report(result: SimulationResult, player_ids: list[int] | None = None) -> dict:
+    """JSON-ready summary: per player start, actual and simulated rating plus trajectory.
+
+    *player_ids* None reports every player who has played a game.
+    """
+    snap = result.snapshot
+    trajectories = result.trajectories(player_ids)
+    return {
+        'games': len(snap),
+        'players': [
+            {
+                'player_id': pid,
+                'start_rating': snap.start_rating[i],
+                'actual_rating': snap.actual_rating[i],
+                'rating': result.rating[i],
+                'games_played': result.games_played[i],
+                'trajectory': [
+                    [played.isoformat(), rating] for played, rating in trajectories[pid]
+                ],
+            }
+            for i, pid in enumerate(snap.player_ids)
+            if pid in trajectories and (player_ids is not None or trajectories[pid])
+        ],
+    }
@@ -0,0 +1,198 @@
+"""In-process cache for the reference lists read on nearly every page.
+
+Divisions, sessions and the player list change only when an admin edits them (or a
+score moves ratings), yet every UI page reads them. ``cached`` serves those reads
+from memory, keyed by entity and query. Each entity has a version. An entry is
+served only while the version it was loaded under is current, and a load that
+overlaps an invalidation is returned but not stored.
+
+Writers call ``mark_stale(session, entity)`` before committing. The entity is
+invalidated when that transaction commits and is forgotten if it rolls back. On
+Postgres the same call queues a NOTIFY on CACHE_CHANNEL in the transaction.
+``start_cache_listener`` LISTENs for those notifications, so every instance drops
+its copy as soon as the change is visible. After a lost listener connection the
+whole cache is cleared, and the TTL bounds anything else.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from collections.abc import Awaitable, Callable, Hashable
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from services.database import DATABASE_URL, IS_SQLITE
+
+DIVISIONS = 'divisions'
+SESSIONS = 'sessions'
+PLAYERS = 'players'
+
+# 0 disables the cache
+RESPONSE_CACHE_TTL_SECONDS = float(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', '300'))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '1024'))
+CACHE_CHANNEL = 'opl_cache'
+# How often the listener checks for shutdown, and its backoff after losing Postgres
+LISTEN_POLL_SECONDS = 5.0
+LISTEN_RETRY_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
+# Tags our own notifications so the listener skips them
+_INSTANCE_ID = uuid.uuid4().hex
+_PENDING = 'response_cache_stale'
+
+_entries: OrderedDict[tuple[str, Hashable], tuple[int, float, object]] = OrderedDict()
+_versions: defaultdict[str, int] = defaultdict(int)
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'remote_invalidations': 0}
+_listener: threading.Thread | None = None
+_stop = threading.Event()
+
+
+def _lookup(entity: str, key: Hashable) -> tuple[int, object | None]:
+    """(current version, cached value or None)."""
+    with _lock:
+        version = _versions[entity]
+        entry = _entries.get((entity, key))
+        if entry is None or entry[0] != version or entry[1] <= time.monotonic():
+            _stats['misses'] += 1
+            return version, None
+        _entries.move_to_end((entity, key))
+        _stats['hits'] += 1
+        return version, entry[2]
+
+
+def _store(entity: str, key: Hashable, version: int, value: object) -> None:
+    with _lock:
+        # Invalidated while loading: the value may predate the change
+        if _versions[entity] != version:
+            return
+        _entries[(entity, key)] = (version, time.monotonic() + RESPONSE_CACHE_TTL_SECONDS, value)
+        _entries.move_to_end((entity, key))
+        while len(_entries) > RESPONSE_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def cached[T](entity: str, key: Hashable, load: Callable[[], T]) -> T:
+    """The cached value of *entity*/*key*, calling *load* on a miss.
+
+    *load* must return a value that is never mutated, since it is shared across requests.
+    """
+    if RESPONSE_CACHE_TTL_SECONDS <= 0:
+        return load()
+    version, value = _lookup(entity, key)
+    if value is None:
+        value = load()
+        _store(entity, key, version, value)
+    return value
+
+
+async def cached_async[T](entity: str, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+    """``cached`` for loaders that run on the async engine."""
+    if RESPONSE_CACHE_TTL_SECONDS <= 0:
+        return await load()
+    version, value = _lookup(entity, key)
+    if value is None:
+        value = await load()
+        _store(entity, key, version, value)
+    return value
+
+
+def invalidate(entity: str) -> None:
+    """Drop this instance's entries for *entity*."""
+    with _lock:
+        _versions[entity] += 1
+        for key in [k for k in _entries if k[0] == entity]:
+            del _entries[key]
+        _stats['invalidations'] += 1
+
+
+def clear_response_cache() -> None:
+    with _lock:
+        for entity in list(_versions):
+            _versions[entity] += 1
+        _entries.clear()
+
+
+def response_cache_stats() -> dict:
+    with _lock:
+        return {
+            **_stats,
+            'size': len(_entries),
+            'listening': _listener is not None and _listener.is_alive(),
+        }
+
+
+def mark_stale(session: Session, *entities: str) -> None:
+    """Invalidate *entities* on every instance once *session*'s transaction commits."""
+    pending = session.info.setdefault(_PENDING, set())
+    new = set(entities) - pending
+    pending.update(new)
+    if new and session.get_bind().dialect.name == 'postgresql':
+        # Delivered by Postgres on commit, and dropped on rollback
+        for entity in sorted(new):
+            session.execute(select(func.pg_notify(CACHE_CHANNEL, f'{_INSTANCE_ID}:{entity}')))
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session: Session) -> None:
+    for entity in session.info.pop(_PENDING, ()):
+        invalidate(entity)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def _on_notify(payload: str) -> None:
+    instance, _, entity = payload.partition(':')
+    if instance != _INSTANCE_ID:
+        invalidate(entity)
+        with _lock:
+            _stats['remote_invalidations'] += 1
+
+
+def _listen() -> None:
+    import psycopg
+
+    conninfo = (
+        make_url(DATABASE_URL).set(drivername='postgresql').render_as_string(hide_password=False)
+    )
+    while not _stop.is_set():
+        try:
+            with psycopg.connect(conninfo, autocommit=True) as conn:
+                conn.execute(f'LISTEN {CACHE_CHANNEL}')
+                # Anything could have changed while we weren't listening
+                clear_response_cache()
+                while not _stop.is_set():
+                    for notify in conn.notifies(timeout=LISTEN_POLL_SECONDS):
+                        _on_notify(notify.payload)
+        except psycopg.Error:
+            logger.warning('Response cache listener lost its connection; retrying', exc_info=True)
+            clear_response_cache()
+            _stop.wait(LISTEN_RETRY_SECONDS)
+
+
+def start_cache_listener() -> None:
+    """Follow other instances' invalidations. A no-op on SQLite, which has one writer process."""
+    global _listener
+    if IS_SQLITE or RESPONSE_CACHE_TTL_SECONDS <= 0 or _listener is not None:
+        return
+    _stop.clear()
+    _listener = threading.Thread(target=_listen, name='response-cache-listener', daemon=True)
+    _listener.start()
+
+
+def stop_cache_listener() -> None:
+    global _listener
+    if _listener is None:
+        return
+    _stop.set()
+    _listener.join(timeout=LISTEN_POLL_SECONDS + 1)
+    _listener = None
@@ -0,0 +1,462 @@
+"""Constraint-aware round robin scheduling.
+
+The circle method fixes which pairings make up each round. What is left to choose
+is which player takes which slot, which week each round is played in, and (in a
+single round robin) who is home. ``optimize_schedule`` searches those choices for
+the lowest weighted cost, made up of:
+
+- blackout: a match falls in a week one of its players blacked out
+- repeat: two players meet in consecutive weeks, either from the last week of the
+  previous session into week one or across the turn of a double round robin
+- home_away: each player's home-minus-away imbalance beyond one game, squared,
+  counting the imbalance carried over from the previous session
+- bye_balance: in odd-sized divisions, the gap (per 100 rating points) between the
+  average rating of players sitting out in the first and second half of each leg
+
+Engines are pluggable through ENGINES. "shuffle" is the old behaviour (a random
+slot order, rounds in order). "anneal" runs simulated annealing over single moves
+(swap two slots, swap two weeks within a leg, flip a match's home side) until the
+time budget runs out. Every move is scored incrementally, so a 64-player division
+gets through thousands of moves in a fraction of a second.
+"""
+
+import math
+import os
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from models import Match, Player, PlayerBlackout
+from utils import round_robin_pairings
+
+# Search time for one reschedule, shared between the divisions being scheduled
+SCHEDULE_OPTIMIZER_SECONDS = float(os.environ.get('SCHEDULE_OPTIMIZER_SECONDS', '1.0'))
+SCHEDULE_OPTIMIZER_MAX_SECONDS = 10.0
+# Response header carrying the total cost, then each term: "12.5; blackout=10; ..."
+SCHEDULE_COST_HEADER = 'X-Schedule-Cost'
+
+COST_WEIGHTS: dict[str, float] = {
+    'blackout': 10.0,
+    'repeat': 5.0,
+    'home_away': 1.0,
+    'bye_balance': 2.0,
+}
+
+# (week, home player index, away player index or None for a bye)
+ScheduleTable = list[tuple[int, int, int | None]]
+
+
+@dataclass
+class ScheduleProblem:
+    """One division's scheduling inputs, indexed by position in its player list."""
+
+    ratings: list[int]
+    double: bool = True
+    # Bitmask of the week indexes each player can't play
+    unavailable: list[int] = field(default_factory=list)
+    # Home minus away games carried over from the previous session
+    home_balance: list[int] = field(default_factory=list)
+    # Index of each player's final opponent last session, if still in the division
+    last_opponent: list[int | None] = field(default_factory=list)
+
+    def __post_init__(self):
+        n = len(self.ratings)
+        self.unavailable = self.unavailable or [0] * n
+        self.home_balance = self.home_balance or [0] * n
+        self.last_opponent = self.last_opponent or [None] * n
+
+
+class _Search:
+    """Mutable schedule state over the circle-method table, with move deltas."""
+
+    def __init__(self, problem: ScheduleProblem, weights: dict[str, float]):
+        self.problem = problem
+        self.weights = weights
+        n = len(problem.ratings)
+        self.matches = round_robin_pairings(n, double=problem.double)
+        self.rounds_per_leg = n + n % 2 - 1
+        self.num_rounds = self.matches[-1][0] + 1
+        self.by_round: list[list[int]] = [[] for _ in range(self.num_rounds)]
+        self.byes = [i for i, (_, _, b) in enumerate(self.matches) if b is None]
+        # Home minus away per slot, as oriented by the table and any flips
+        self.slot_balance = [0] * n
+        for i, (r, a, b) in enumerate(self.matches):
+            self.by_round[r].append(i)
+            if b is not None:
+                self.slot_balance[a] += 1
+                self.slot_balance[b] -= 1
+
+        # Rounds each slot plays in, and in which rounds it meets each other slot
+        self.plays = [0] * n
+        self.meets: list[list[tuple[int, int]]] = [[] for _ in range(n)]
+        meets: dict[tuple[int, int], int] = {}
+        for r, a, b in self.matches:
+            if b is not None:
+                self.plays[a] |= 1 << r
+                self.plays[b] |= 1 << r
+                meets[a, b] = meets.get((a, b), 0) | 1 << r
+                meets[b, a] = meets.get((b, a), 0) | 1 << r
+        for (a, b), mask in meets.items():
+            self.meets[a].append((b, mask))
+
+        self.order = list(range(n))  # slot -> player
+        self.week = list(range(self.num_rounds))  # round -> week
+        self.round_at = list(range(self.num_rounds))  # week -> round
+        self.flipped = [False] * len(self.matches)
+        # Each player's blackouts re-indexed by round rather than week
+        self.blocked = list(problem.unavailable)
+        # Opponent slot of every slot in each round, None for a bye
+        self.partner: list[list[int | None]] = [[None] * n for _ in range(self.num_rounds)]
+        for r, a, b in self.matches:
+            if b is not None:
+                self.partner[r][a], self.partner[r][b] = b, a
+
+    # -- cost terms ---------------------------------------------------------
+
+    def _match_cost(self, i: int) -> float:
+        r, a, b = self.matches[i]
+        if b is None:
+            return 0.0
+        blocked = self.problem.unavailable[self.order[a]] | self.problem.unavailable[self.order[b]]
+        return self.weights['blackout'] if blocked >> self.week[r] & 1 else 0.0
+
+    def _slot_blackouts(self, s: int) -> float:
+        """Blackout cost of slot s's matches, less double-counted matches between two blocked players.
+
+        Summed over two slots this is exact for a swap of those slots: the match
+        between them is double-counted the same before and after.
+        """
+        blocked = self.blocked
+        mine = blocked[self.order[s]]
+        if not mine:
+            return 0.0
+        count = (mine & self.plays[s]).bit_count()
+        order = self.order
+        for o, rounds in self.meets[s]:
+            both = mine & blocked[order[o]] & rounds
+            if both:
+                count -= both.bit_count()
+        return self.weights['blackout'] * count
+
+    def _slot_cost(self, s: int) -> float:
+        excess = abs(self.problem.home_balance[self.order[s]] + self.slot_balance[s]) - 1
+        return self.weights['home_away'] * excess * excess if excess > 0 else 0.0
+
+    def _bye_cost(self) -> float:
+        if not self.byes:
+            return 0.0
+        legs = self.num_rounds // self.rounds_per_leg
+        half = self.rounds_per_leg // 2
+        sums = [[0, 0] for _ in range(legs)]
+        counts = [[0, 0] for _ in range(legs)]
+        ratings = self.problem.ratings
+        for i in self.byes:
+            r, a, _ = self.matches[i]
+            leg, offset = divmod(self.week[r], self.rounds_per_leg)
+            side = 0 if offset < half else 1
+            sums[leg][side] += ratings[self.order[a]]
+            counts[leg][side] += 1
+        gap = sum(
+            abs(s[0] / c[0] - s[1] / c[1])
+            for s, c in zip(sums, counts, strict=True)
+            if c[0] and c[1]
+        )
+        return self.weights['bye_balance'] * gap / 100
+
+    def _opening_repeats(self, slots: tuple[int, ...] | None = None) -> int:
+        """Week-one matches against last session's final opponent, optionally only those of *slots*."""
+        partner, order, last = (
+            self.partner[self.round_at[0]],
+            self.order,
+            self.problem.last_opponent,
+        )
+        pairs = {
+            (min(s, o), max(s, o))
+            for s in (slots or range(len(order)))
+            if (o := partner[s]) is not None
+        }
+        return sum(1 for s, o in pairs if last[order[s]] == order[o])
+
+    def _turn_repeats(self) -> int:
+        """Pairs meeting in the last week of one leg and again in the first of the next.
+
+        Depends only on which rounds sit either side of the turn, not on which
+        player is in which slot.
+        """
+        if not self.problem.double:
+            return 0
+        before = self.partner[self.round_at[self.rounds_per_leg - 1]]
+        after = self.partner[self.round_at[self.rounds_per_leg]]
+        return sum(1 for s, o in enumerate(after) if o is not None and s < o and before[s] == o)
+
+    def _repeat_cost(self) -> float:
+        return self.weights['repeat'] * (self._opening_repeats() + self._turn_repeats())
+
+    def breakdown(self) -> dict[str, float]:
+        terms = {
+            'blackout': sum(self._match_cost(i) for i in range(len(self.matches))),
+            'repeat': self._repeat_cost(),
+            'home_away': sum(self._slot_cost(s) for s in range(len(self.order))),
+            'bye_balance': self._bye_cost(),
+        }
+        terms['total'] = sum(terms.values())
+        return terms
+
+    # -- moves (each is its own inverse) ------------------------------------
+
+    def swap_slots(self, s: int, t: int) -> None:
+        self.order[s], self.order[t] = self.order[t], self.order[s]
+
+    def swap_rounds(self, r1: int, r2: int) -> None:
+        w1, w2 = self.week[r1], self.week[r2]
+        self.week[r1], self.week[r2] = w2, w1
+        self.round_at[w1], self.round_at[w2] = r2, r1
+        both = 1 << r1 | 1 << r2
+        for p, mask in enumerate(self.blocked):
+            if mask and (mask >> r1 ^ mask >> r2) & 1:
+                self.blocked[p] = mask ^ both
+
+    def flip(self, i: int) -> None:
+        _, a, b = self.matches[i]
+        shift = 2 if self.flipped[i] else -2
+        self.slot_balance[a] += shift
+        self.slot_balance[b] -= shift
+        self.flipped[i] = not self.flipped[i]
+
+    def try_move(self, rng: random.Random) -> tuple[Callable[[], None], float]:
+        """Apply a random move; returns its undo and the change in cost.
+
+        Only the terms a move can change are scored before and after it.
+        """
+        n = len(self.order)
+        kind = rng.randrange(2 if self.problem.double else 3)
+        if kind == 0:
+            s, t = rng.sample(range(n), 2)
+
+            def cost() -> float:
+                return (
+                    self._slot_blackouts(s)
+                    + self._slot_blackouts(t)
+                    + self._slot_cost(s)
+                    + self._slot_cost(t)
+                    + self._bye_cost()
+                    + self.weights['repeat'] * self._opening_repeats((s, t))
+                )
+
+            def move() -> None:
+                self.swap_slots(s, t)
+        elif kind == 1:
+            if self.rounds_per_leg < 2:
+                return (lambda: None), 0.0
+            leg = rng.randrange(self.num_rounds // self.rounds_per_leg) * self.rounds_per_leg
+            r1, r2 = (leg + x for x in rng.sample(range(self.rounds_per_leg), 2))
+            boundary = {0, self.rounds_per_leg - 1, self.rounds_per_leg}
+            repeats = bool(boundary & {self.week[r1], self.week[r2]})
+
+            def cost() -> float:
+                total = sum(self._match_cost(i) for i in self.by_round[r1]) + sum(
+                    self._match_cost(i) for i in self.by_round[r2]
+                )
+                return total + self._bye_cost() + (self._repeat_cost() if repeats else 0.0)
+
+            def move() -> None:
+                self.swap_rounds(r1, r2)
+        else:
+            i = rng.randrange(len(self.matches))
+            _, a, b = self.matches[i]
+            if b is None:
+                return (lambda: None), 0.0
+
+            def cost() -> float:
+                return self._slot_cost(a) + self._slot_cost(b)
+
+            def move() -> None:
+                self.flip(i)
+
+        before = cost()
+        move()
+        return move, cost() - before
+
+    def state(self) -> tuple:
+        return tuple(
+            list(x)
+            for x in (
+                self.order,
+                self.week,
+                self.round_at,
+                self.blocked,
+                self.flipped,
+                self.slot_balance,
+            )
+        )
+
+    def restore(self, state: tuple) -> None:
+        self.order, self.week, self.round_at, self.blocked, self.flipped, self.slot_balance = (
+            list(x) for x in state
+        )
+
+    def table(self) -> ScheduleTable:
+        rows = []
+        for i, (r, a, b) in enumerate(self.matches):
+            if b is None:
+                rows.append((self.week[r], self.order[a], None))
+            elif self.flipped[i]:
+                rows.append((self.week[r], self.order[b], self.order[a]))
+            else:
+                rows.append((self.week[r], self.order[a], self.order[b]))
+        rows.sort(key=lambda row: row[0])
+        return rows
+
+
+def _shuffle(search: _Search, rng: random.Random, deadline: float) -> None:
+    rng.shuffle(search.order)
+
+
+def _anneal(search: _Search, rng: random.Random, deadline: float) -> None:
+    rng.shuffle(search.order)
+    cost = search.breakdown()['total']
+    best_cost, best_state = cost, search.state()
+    start = time.perf_counter()
+    budget = deadline - start
+    # Start hot enough to trade a blackout for a better neighbourhood, end greedy
+    hot, cold = search.weights['blackout'], 0.05
+    temperature = hot
+    iteration = 0
+    while best_cost > 0:
+        iteration += 1
+        if iteration % 64 == 0:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            temperature = hot * (cold / hot) ** ((now - start) / budget)
+        undo, delta = search.try_move(rng)
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            cost += delta
+            if cost < best_cost - 1e-9:
+                best_cost, best_state = cost, search.state()
+        else:
+            undo()
+    search.restore(best_state)
+
+
+ENGINES: dict[str, Callable[[_Search, random.Random, float], None]] = {
+    'shuffle': _shuffle,
+    'anneal': _anneal,
+}
+
+
+def optimize_schedule(
+    problem: ScheduleProblem,
+    *,
+    engine: str = 'anneal',
+    seconds: float = SCHEDULE_OPTIMIZER_SECONDS,
+    seed: int | None = None,
+    weights: dict[str, float] | None = None,
+) -> tuple[ScheduleTable, dict[str, float]]:
+    """Search for a low-cost schedule within *seconds*.
+
+    Returns the schedule as (week, home, away) player indexes, away None for a
+    bye, sorted by week, together with the cost of each term and their total.
+    """
+    if len(problem.ratings) < 2:
+        return [], {
+            'blackout': 0.0,
+            'repeat': 0.0,
+            'home_away': 0.0,
+            'bye_balance': 0.0,
+            'total': 0.0,
+        }
+    search = _Search(problem, {**COST_WEIGHTS, **(weights or {})})
+    ENGINES[engine](search, random.Random(seed), time.perf_counter() + max(seconds, 0.0))
+    return search.table(), search.breakdown()
+
+
+def previous_session_history(
+    session: Session, session_id: int
+) -> tuple[dict[int, int], dict[int, int]]:
+    """Home-minus-away balance and final opponent per player from the session before *session_id*."""
+    previous = session.exec(
+        select(func.max(Match.session_id)).where(
+            Match.session_id < session_id,
+            Match.deleted == False,  # noqa: E712
+        )
+    ).one()
+    balance: dict[int, int] = {}
+    last: dict[int, int] = {}
+    if previous is None:
+        return balance, last
+    for p1, p2 in session.exec(
+        select(Match.player1_id, Match.player2_id)
+        .where(Match.session_id == previous, Match.deleted == False, Match.player2_id.is_not(None))  # noqa: E712
+        .order_by(Match.scheduled_date, Match.match_id)
+    ).all():
+        balance[p1] = balance.get(p1, 0) + 1
+        balance[p2] = balance.get(p2, 0) - 1
+        last[p1], last[p2] = p2, p1
+    return balance, last
+
+
+def load_blackouts(
+    session: Session, player_ids: list[int], since: date
+) -> dict[int, list[tuple[date, date]]]:
+    """Blackout ranges per player that end on or after *since*."""
+    blackouts: dict[int, list[tuple[date, date]]] = {}
+    for player_id, start, end in session.exec(
+        select(PlayerBlackout.player_id, PlayerBlackout.start_date, PlayerBlackout.end_date).where(
+            PlayerBlackout.player_id.in_(player_ids), PlayerBlackout.end_date >= since
+        )
+    ).all():
+        blackouts.setdefault(player_id, []).append((start, end))
+    return blackouts
+
+
+def schedule_problem(
+    players: list[Player],
+    start_date: datetime,
+    *,
+    double: bool,
+    is_weekly: bool,
+    blackouts: dict[int, list[tuple[date, date]]],
+    history: tuple[dict[int, int], dict[int, int]],
+) -> ScheduleProblem:
+    """Inputs for one division whose week 0 starts on *start_date*.
+
+    A fixed-day match conflicts with a blackout covering its date; a flexible
+    (weekly) match only with one covering its whole Monday-to-Sunday week.
+    """
+    n = len(players)
+    weeks = (n + n % 2 - 1) * (2 if double else 1)
+    first = start_date.date()
+    span = timedelta(days=6 if is_weekly else 0)
+    unavailable = []
+    for player in players:
+        mask = 0
+        for start, end in blackouts.get(player.player_id, ()):
+            for week in range(weeks):
+                day = first + timedelta(weeks=week)
+                if start <= day and day + span <= end:
+                    mask |= 1 << week
+        unavailable.append(mask)
+
+    balance, last = history
+    index = {p.player_id: i for i, p in enumerate(players)}
+    return ScheduleProblem(
+        ratings=[p.rating for p in players],
+        double=double,
+        unavailable=unavailable,
+        home_balance=[balance.get(p.player_id, 0) for p in players],
+        last_opponent=[index.get(last.get(p.player_id)) for p in players],
+    )
+
+
+def format_cost(cost: dict[str, float]) -> str:
+    """Header value for SCHEDULE_COST_HEADER."""
+    terms = '; '.join(
+        f'{name}={round(value, 2):g}' for name, value in cost.items() if name != 'total'
+    )
+    return f'{round(cost["total"], 2):g}; {terms}'
@@ -2,150 +2,209 @@ import asyncio
 from datetime import date, datetime, timedelta
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import insert, update
+from sqlalchemy.orm import aliased
 from sqlmodel import Session, select
 
-from models import Match, MatchScoreSubmission, Message, MessageRecipient, Player
+from models import Match, MatchScoreSubmission, Message, MessageRecipient, Player, User
 from models import Session as SessionModel
 from services.database import engine
-from services.email_service import send_match_reminder
+from services.email_outbox import (
+    EMAIL_OUTBOX_INTERVAL_SECONDS,
+    EMAIL_OUTBOX_LEASE_SECONDS,
+    drain_outbox,
+    enqueue_emails,
+)
+from services.email_service import MATCH_REMINDER_SUBJECT, match_reminder_body
+from services.job_lock import SCHEDULER_ROLE, leased, renew_lease
 
 scheduler = AsyncIOScheduler()
 
 
-async def send_match_reminders() -> None:
-    """Send reminder emails for matches scheduled today."""
+async def send_match_reminders() -> int:
+    """Queue reminder emails for matches scheduled today; returns reminders queued.
+
+    One query loads the due matches with both players and the session's match time;
+    every reminder is rendered and queued in one batch, and the matches are flagged
+    with one UPDATE. Delivery is left to the leased outbox job, so the burst goes out
+    under its single drainer and rate limit on its next tick.
+    """
+    return await asyncio.to_thread(_queue_match_reminders)
+
+
+def _queue_match_reminders() -> int:
     today = date.today()
     today_start = datetime.combine(today, datetime.min.time())
     today_end = today_start + timedelta(days=1)
 
+    player1 = aliased(Player)
+    player2 = aliased(Player)
     with Session(engine) as session:
-        matches = session.exec(
-            select(Match).where(
+        rows = session.exec(
+            select(Match, player1, player2, SessionModel.match_time)
+            .join(player1, player1.player_id == Match.player1_id)
+            .join(player2, player2.player_id == Match.player2_id)
+            .outerjoin(SessionModel, SessionModel.session_id == Match.session_id)
+            .where(
                 Match.scheduled_date >= today_start,
                 Match.scheduled_date < today_end,
                 Match.completed == False,  # noqa: E712
                 Match.reminder_sent == False,  # noqa: E712
+                Match.deleted == False,  # noqa: E712
             )
         ).all()
+        if not rows:
+            return 0
 
-        for match in matches:
-            player1 = session.get(Player, match.player1_id)
-            player2 = session.get(Player, match.player2_id)
-
-            if not player1 or not player2:
-                continue
-
-            # Get match time from the session if available
-            match_time = ''
-            if match.session_id:
-                sess = session.get(SessionModel, match.session_id)
-                if sess:
-                    match_time = sess.match_time
-
+        emails = []
+        for match, p1, p2, match_time in rows:
             scheduled_str = match.scheduled_date.strftime('%A, %B %d')
-
-            tasks = []
-            if player1.match_reminders:
-                tasks.append(
-                    send_match_reminder(
-                        player_email=player1.email,
-                        player_name=player1.first_name,
-                        opponent_name=f'{player2.first_name} {player2.last_name}',
-                        opponent_rating=match.player2_rating,
-                        player_weight=match.player1_weight,
-                        match_time=match_time,
-                        scheduled_date=scheduled_str,
-                    )
-                )
-            if player2.match_reminders:
-                tasks.append(
-                    send_match_reminder(
-                        player_email=player2.email,
-                        player_name=player2.first_name,
-                        opponent_name=f'{player1.first_name} {player1.last_name}',
-                        opponent_rating=match.player1_rating,
-                        player_weight=match.player2_weight,
-                        match_time=match_time,
-                        scheduled_date=scheduled_str,
-                    )
+            sides = (
+                (p1, p2, match.player2_rating, match.player1_weight),
+                (p2, p1, match.player1_rating, match.player2_weight),
+            )
+            for player, opponent, opponent_rating, weight in sides:
+                if not player.match_reminders:
+                    continue
+                body = match_reminder_body(
+                    player_name=player.first_name,
+                    opponent_name=f'{opponent.first_name} {opponent.last_name}',
+                    opponent_rating=opponent_rating,
+                    player_weight=weight,
+                    match_time=match_time or '',
+                    scheduled_date=scheduled_str,
                 )
+                emails.append((player.email, MATCH_REMINDER_SUBJECT, body))
+
+        queued = enqueue_emails(session, emails)
+        session.execute(
+            update(Match)
+            .where(Match.match_id.in_([match.match_id for match, *_ in rows]))
+            .values(reminder_sent=True)
+        )
+        session.commit()
+    return queued
 
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
 
-            match.reminder_sent = True
-            session.add(match)
+async def escalate_score_mismatches() -> int:
+    """Escalate needs_review submissions older than 24 hours to disputed and notify admin.
 
-        session.commit()
+    A fixed number of statements however many disputes are open: one read of the
+    affected matches with both players' names, one UPDATE each for submissions and
+    matches, and one bulk INSERT each for the notices and their recipients. Returns
+    the number of matches escalated.
+    """
+    return await asyncio.to_thread(_escalate_score_mismatches)
 
 
-async def escalate_score_mismatches() -> None:
-    """Escalate needs_review submissions older than 24 hours to disputed and notify admin."""
+def _escalate_score_mismatches() -> int:
     cutoff = datetime.utcnow() - timedelta(hours=24)
+    stale = (
+        MatchScoreSubmission.status == "needs_review",
+        MatchScoreSubmission.needs_review_since <= cutoff,
+    )
 
+    player1 = aliased(Player)
+    player2 = aliased(Player)
     with Session(engine) as session:
-        from models.user import User as UserModel
-        from sqlalchemy import or_
-
-        stale = session.exec(
-            select(MatchScoreSubmission)
-            .where(MatchScoreSubmission.status == "needs_review")
-            .where(MatchScoreSubmission.needs_review_since <= cutoff)
+        matches = session.exec(
+            select(
+                Match.match_id,
+                Match.player1_id,
+                Match.player2_id,
+                player1.first_name,
+                player1.last_name,
+                player2.first_name,
+                player2.last_name,
+            )
+            .outerjoin(player1, player1.player_id == Match.player1_id)
+            .outerjoin(player2, player2.player_id == Match.player2_id)
+            .where(
+                Match.match_id.in_(select(MatchScoreSubmission.match_id).where(*stale)),
+                Match.completed == False,  # noqa: E712
+            )
+            .order_by(Match.match_id)
         ).all()
-
-        if not stale:
-            return
-
-        # Group by match so we update all submissions for a match together
-        by_match: dict[int, list[MatchScoreSubmission]] = {}
-        for sub in stale:
-            by_match.setdefault(sub.match_id, []).append(sub)
-
-        admin_user = session.exec(select(UserModel).where(UserModel.is_admin == True)).first()  # noqa: E712
-
-        for match_id, subs in by_match.items():
-            db_match = session.get(Match, match_id)
-            if not db_match or db_match.completed:
-                continue
-
-            for sub in subs:
-                sub.status = "disputed"
-                session.add(sub)
-
-            db_match.score_status = "disputed"
-            session.add(db_match)
-
-            if admin_user:
-                player1 = session.get(Player, db_match.player1_id)
-                player2 = session.get(Player, db_match.player2_id)
-                p1_name = f"{player1.first_name} {player1.last_name}" if player1 else f"Player {db_match.player1_id}"
-                p2_name = f"{player2.first_name} {player2.last_name}" if player2 else f"Player {db_match.player2_id}"
-
-                msg = Message(
-                    subject=f"Score Dispute Escalated – Match #{match_id}",
-                    body=(
+        if not matches:
+            return 0
+        match_ids = [m.match_id for m in matches]
+
+        session.execute(
+            update(MatchScoreSubmission)
+            .where(*stale, MatchScoreSubmission.match_id.in_(match_ids))
+            .values(status="disputed")
+        )
+        session.execute(
+            update(Match)
+            .where(Match.match_id.in_(match_ids))
+            .values(score_status="disputed", score_version=Match.score_version + 1)
+        )
+
+        admin_user = session.exec(select(User).where(User.is_admin == True)).first()  # noqa: E712
+        if admin_user:
+            notices = []
+            for match_id, p1_id, p2_id, p1_first, p1_last, p2_first, p2_last in matches:
+                p1_name = f"{p1_first} {p1_last}" if p1_first is not None else f"Player {p1_id}"
+                p2_name = f"{p2_first} {p2_last}" if p2_first is not None else f"Player {p2_id}"
+                notices.append({
+                    "subject": f"Score Dispute Escalated – Match #{match_id}",
+                    "body": (
                         f"The score mismatch between {p1_name} and {p2_name} for Match #{match_id} "
                         f"was not resolved within 24 hours and has been escalated.\n\n"
                         f"Please review the submitted scores and resolve the dispute."
                     ),
-                    sender_id=admin_user.user_id,
-                    recipient_type="player",
-                )
-                session.add(msg)
-                session.flush()
-
-                recipients = [pid for pid in (db_match.player1_id, db_match.player2_id, admin_user.player_id) if pid]
-                for pid in recipients:
-                    session.add(MessageRecipient(message_id=msg.message_id, player_id=pid))
+                    "sender_id": admin_user.user_id,
+                    "recipient_type": "player",
+                })
+            message_ids = session.scalars(
+                insert(Message).returning(Message.message_id, sort_by_parameter_order=True),
+                notices,
+            ).all()
+
+            recipients = [
+                {"message_id": message_id, "player_id": pid}
+                for message_id, m in zip(message_ids, matches, strict=True)
+                for pid in dict.fromkeys((m.player1_id, m.player2_id, admin_user.player_id))
+                if pid
+            ]
+            session.execute(insert(MessageRecipient), recipients)
 
         session.commit()
+    return len(match_ids)
+
+
+def _renew_outbox_lease() -> bool:
+    with Session(engine) as session:
+        return renew_lease(session, 'email_outbox', EMAIL_OUTBOX_LEASE_SECONDS)
+
+
+# A backlog can take many batches; holding the lease throughout keeps a second
+# instance from draining alongside this one. It is released when the drain ends,
+# so the next tick runs on schedule.
+@leased('email_outbox', lease_seconds=EMAIL_OUTBOX_LEASE_SECONDS, record_idle=False, release=True)
+async def drain_outbox_job() -> int:
+    totals = await drain_outbox(renew_lease=_renew_outbox_lease)
+    return sum(totals.values())
 
 
 def start_scheduler() -> None:
-    scheduler.add_job(send_match_reminders, 'cron', hour=8, minute=0, id='match_reminders')
-    scheduler.add_job(escalate_score_mismatches, 'interval', hours=1, id='escalate_score_mismatches')
+    if SCHEDULER_ROLE != "worker":
+        return
+    # Leases keep each tick to one machine when several workers are deployed
+    scheduler.add_job(
+        leased('match_reminders', lease_seconds=30 * 60)(send_match_reminders),
+        'cron', hour=8, minute=0, id='match_reminders',
+    )
+    scheduler.add_job(
+        leased('escalate_score_mismatches', lease_seconds=30 * 60)(escalate_score_mismatches),
+        'interval', hours=1, id='escalate_score_mismatches',
+    )
+    scheduler.add_job(
+        drain_outbox_job, 'interval', seconds=EMAIL_OUTBOX_INTERVAL_SECONDS, id='email_outbox',
+    )
     scheduler.start()
 
 
 def stop_scheduler() -> None:
-    scheduler.shutdown(wait=False)
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
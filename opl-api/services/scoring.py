@@ -0,0 +1,197 @@
+"""Applying a match result to games, player ratings and standings.
+
+Shared by the admin scoring endpoint and the score-submission completion path so
+both load the involved players once and write everything back in a single flush.
+"""
+
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Protocol
+
+from sqlalchemy import case, or_, update
+from sqlmodel import Session, select
+
+from models import Game, Match, Player
+from models import Session as SessionModel
+from services.response_cache import PLAYERS, mark_stale
+from services.standings import record_match
+from utils import DEFAULT_WEIGHTS, WeightTable, calculate_rating_change, get_match_weight
+
+
+class GameResult(Protocol):
+    winner_id: int
+    loser_id: int
+    balls_remaining: int
+
+
+def load_players(session: Session, player_ids: Iterable[int | None]) -> dict[int, Player]:
+    """Load the given players with one IN query, keyed by player_id."""
+    ids = {pid for pid in player_ids if pid is not None}
+    if not ids:
+        return {}
+    return {
+        p.player_id: p for p in session.exec(select(Player).where(Player.player_id.in_(ids))).all()
+    }
+
+
+def session_weights(session: Session, session_id: int | None) -> WeightTable:
+    """The match weight table for a league session (the default when it has none)."""
+    if session_id is None:
+        return DEFAULT_WEIGHTS
+    brackets = session.exec(
+        select(SessionModel.weight_brackets).where(SessionModel.session_id == session_id)
+    ).first()
+    return WeightTable.from_json(brackets)
+
+
+def complete_match(
+    session: Session,
+    db_match: Match,
+    games: list[GameResult],
+    played_date: datetime,
+) -> dict[int, Player]:
+    """Record *games* for *db_match*, apply the rating changes and mark it completed.
+
+    Snapshots both players' ratings (and matching weights) onto the match, adds one
+    Game row per game, sets winner/loser, updates standings and refreshes the stored
+    ratings on the players' upcoming matches. Returns the involved players.
+    """
+    players = load_players(
+        session,
+        [
+            db_match.player1_id,
+            db_match.player2_id,
+            *(g.winner_id for g in games),
+            *(g.loser_id for g in games),
+        ],
+    )
+    player1 = players.get(db_match.player1_id)
+    player2 = players.get(db_match.player2_id)
+    db_match.player1_rating = player1.rating if player1 else db_match.player1_rating
+    db_match.player2_rating = player2.rating if player2 else db_match.player2_rating
+
+    # Recalculate weights to match the actual ratings at play time
+    if player1 and player2:
+        w1, w2 = get_match_weight(
+            player1.rating, player2.rating, session_weights(session, db_match.session_id)
+        )
+        db_match.player1_weight = w1
+        db_match.player2_weight = w2
+
+    game_wins: dict[int, int] = {}
+    for g in games:
+        winner = players[g.winner_id]
+        loser = players[g.loser_id]
+
+        winner_change, loser_change = calculate_rating_change(
+            winner.games_played, loser.games_played, g.balls_remaining
+        )
+
+        session.add(
+            Game(
+                match_id=db_match.match_id,
+                winner_id=g.winner_id,
+                loser_id=g.loser_id,
+                winner_rating=winner.rating,
+                loser_rating=loser.rating,
+                winner_rating_change=winner_change,
+                loser_rating_change=loser_change,
+                balls_remaining=g.balls_remaining,
+                played_date=played_date,
+            )
+        )
+
+        winner.rating += winner_change
+        loser.rating += loser_change
+        winner.games_played += 1
+        loser.games_played += 1
+        game_wins[g.winner_id] = game_wins.get(g.winner_id, 0) + 1
+
+    # Determine match winner by counting game wins
+    if game_wins:
+        db_match.winner_id = max(game_wins, key=game_wins.get)
+        db_match.loser_id = (
+            db_match.player2_id
+            if db_match.winner_id == db_match.player1_id
+            else db_match.player1_id
+        )
+
+    db_match.completed = True
+    session.add(db_match)
+    record_match(session, db_match, [g.winner_id for g in games])
+
+    propagate_ratings(session, {p.player_id: p.rating for p in (player1, player2) if p})
+    if games:
+        mark_stale(session, PLAYERS)
+    session.flush()
+    return players
+
+
+def propagate_ratings(session: Session, ratings: dict[int, int]) -> None:
+    """Copy new ratings onto the players' uncompleted, non-deleted matches.
+
+    Set-based UPDATEs regardless of how many matches are upcoming: one rewrites the
+    rating snapshots, the next recomputes both weights from the new snapshots (one
+    more per affected session with its own weight table).
+    """
+    if not ratings:
+        return
+
+    player_ids = list(ratings)
+    upcoming = (
+        Match.completed == False,  # noqa: E712
+        Match.deleted == False,  # noqa: E712
+        or_(Match.player1_id.in_(player_ids), Match.player2_id.in_(player_ids)),
+    )
+
+    session.execute(
+        update(Match)
+        .where(*upcoming)
+        .values(
+            player1_rating=case(ratings, value=Match.player1_id, else_=Match.player1_rating),
+            player2_rating=case(ratings, value=Match.player2_id, else_=Match.player2_rating),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    # Sessions with their own weight table get their own UPDATE; everything else
+    # shares the default table
+    custom = dict(
+        session.exec(
+            select(SessionModel.session_id, SessionModel.weight_brackets).where(
+                SessionModel.weight_brackets.is_not(None),
+                SessionModel.session_id.in_(select(Match.session_id).where(*upcoming)),
+            )
+        ).all()
+    )
+    for session_id, brackets in custom.items():
+        _update_weights(
+            session, WeightTable.from_json(brackets), *upcoming, Match.session_id == session_id
+        )
+    _update_weights(
+        session,
+        DEFAULT_WEIGHTS,
+        *upcoming,
+        or_(Match.session_id.is_(None), Match.session_id.not_in(list(custom))),
+    )
+
+
+def refresh_session_weights(session: Session, session_id: int, weights: WeightTable) -> None:
+    """Recompute the weights of a session's upcoming matches after its table changes."""
+    _update_weights(
+        session,
+        weights,
+        Match.session_id == session_id,
+        Match.completed == False,  # noqa: E712
+        Match.deleted == False,  # noqa: E712
+    )
+
+
+def _update_weights(session: Session, weights: WeightTable, *where) -> None:
+    w1, w2 = weights.sql(Match.player1_rating, Match.player2_rating)
+    session.execute(
+        update(Match)
+        .where(*where, Match.player2_id.is_not(None))
+        .values(player1_weight=w1, player2_weight=w2)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,143 @@
+"""Incremental maintenance of the materialized standings table.
+
+Scoring (race-agnostic):
+- Shutout (loser won 0 games): winner gets 3pts
+- Non-shutout: winner gets 2pts
+- Loser reached the hill (1 game from winning): loser gets 1pt
+"""
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from models import Game, Match, Standing
+
+_COUNTERS = (
+    'points',
+    'match_wins',
+    'match_losses',
+    'shutouts',
+    'hill_losses',
+    'games_won',
+    'games_lost',
+)
+
+
+def match_deltas(match: Match, game_winner_ids: list[int]) -> dict[int, dict[str, int]]:
+    """Return the standings increments each player earns from a completed match."""
+    wins: dict[int, int] = {}
+    for winner_id in game_winner_ids:
+        wins[winner_id] = wins.get(winner_id, 0) + 1
+    if not wins:
+        return {}
+
+    winner_id = max(wins, key=wins.get)
+    loser_id = match.player2_id if winner_id == match.player1_id else match.player1_id
+    winner_wins = wins[winner_id]
+    loser_wins = wins.get(loser_id, 0)
+
+    winner = {'match_wins': 1, 'games_won': winner_wins, 'games_lost': loser_wins}
+    loser = {'match_losses': 1, 'games_won': loser_wins, 'games_lost': winner_wins}
+    if loser_wins == 0:
+        winner['points'] = 3
+        winner['shutouts'] = 1
+    else:
+        winner['points'] = 2
+        if loser_wins == winner_wins - 1:
+            loser['points'] = 1
+            loser['hill_losses'] = 1
+
+    deltas = {winner_id: winner}
+    if loser_id is not None:
+        deltas[loser_id] = loser
+    return deltas
+
+
+def _apply(session: Session, match: Match, game_winner_ids: list[int], sign: int) -> None:
+    if match.session_id is None:
+        return
+    deltas = match_deltas(match, game_winner_ids)
+    if not deltas:
+        return
+
+    rows = {
+        row.player_id: row
+        for row in session.exec(
+            select(Standing).where(
+                Standing.session_id == match.session_id,
+                Standing.division_id == match.division_id,
+                Standing.player_id.in_(list(deltas)),
+            )
+        ).all()
+    }
+    for player_id, delta in deltas.items():
+        row = rows.get(player_id)
+        if row is None:
+            # Never counted (e.g. completed before standings were kept): nothing to take back
+            if sign < 0:
+                continue
+            row = Standing(
+                session_id=match.session_id, division_id=match.division_id, player_id=player_id
+            )
+        for counter, value in delta.items():
+            setattr(row, counter, getattr(row, counter) + sign * value)
+        session.add(row)
+
+
+def record_match(session: Session, match: Match, game_winner_ids: list[int]) -> None:
+    """Add a newly completed match's result to the standings."""
+    _apply(session, match, game_winner_ids, 1)
+
+
+def revert_match(session: Session, match: Match, game_winner_ids: list[int]) -> None:
+    """Remove a previously recorded match result (rescore, delete or undo)."""
+    _apply(session, match, game_winner_ids, -1)
+
+
+def revert_stored_match(session: Session, match: Match) -> None:
+    """Remove a completed match's result using the games currently stored for it."""
+    if not match.completed:
+        return
+    winner_ids = session.exec(select(Game.winner_id).where(Game.match_id == match.match_id)).all()
+    revert_match(session, match, list(winner_ids))
+
+
+def rebuild_standings(session: Session, session_id: int | None = None) -> int:
+    """Recompute standings from completed matches; returns the number of rows written.
+
+    Limited to one OPL session when *session_id* is given. Nothing is committed.
+    """
+    match_query = select(Match).where(
+        Match.completed,
+        Match.deleted == False,  # noqa: E712
+        Match.session_id.is_not(None),
+    )
+    clear = delete(Standing)
+    if session_id is not None:
+        match_query = match_query.where(Match.session_id == session_id)
+        clear = clear.where(Standing.session_id == session_id)
+    matches = {m.match_id: m for m in session.exec(match_query).all()}
+
+    winners_by_match: dict[int, list[int]] = {}
+    if matches:
+        game_rows = session.exec(
+            select(Game.match_id, Game.winner_id).where(Game.match_id.in_(list(matches)))
+        ).all()
+        for match_id, winner_id in game_rows:
+            winners_by_match.setdefault(match_id, []).append(winner_id)
+
+    totals: dict[tuple[int, int, int], dict[str, int]] = {}
+    for match_id, winner_ids in winners_by_match.items():
+        match = matches[match_id]
+        for player_id, delta in match_deltas(match, winner_ids).items():
+            row = totals.setdefault(
+                (match.session_id, match.division_id, player_id), dict.fromkeys(_COUNTERS, 0)
+            )
+            for counter, value in delta.items():
+                row[counter] += value
+
+    session.execute(clear)
+    session.add_all(
+        Standing(session_id=sid, division_id=did, player_id=pid, **counters)
+        for (sid, did, pid), counters in totals.items()
+    )
+    return len(totals)
@@ -1,24 +1,38 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from services.auth import get_current_user, require_admin
-from services.database import get_session
+from services.database import get_async_session, get_session
+from services.response_cache import clear_response_cache
 from main import app
 from models import Division, DivisionPlayer, Player, User
 
 
 @pytest.fixture
-def session():
+def db_path(tmp_path):
+    # A file rather than :memory: so the sync and async engines see the same data
+    return tmp_path / 'test.db'
+
+
+@pytest.fixture
+def session(db_path):
     engine = create_engine(
-        'sqlite://',
+        f'sqlite:///{db_path}',
         connect_args={'check_same_thread': False},
-        poolclass=StaticPool,
     )
     SQLModel.metadata.create_all(engine)
     with Session(engine) as s:
         yield s
+    engine.dispose()
+
+
+@pytest.fixture
+def async_engine(db_path):
+    return create_async_engine(f'sqlite+aiosqlite:///{db_path}', poolclass=NullPool)
 
 
 @pytest.fixture
@@ -31,13 +45,20 @@ def test_user(session):
 
 
 @pytest.fixture
-def client(session, test_user):
+def client(session, async_engine, test_user):
     def get_test_session():
         yield session
 
+    async def get_test_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as s:
+            yield s
+
     app.dependency_overrides[get_session] = get_test_session
+    app.dependency_overrides[get_async_session] = get_test_async_session
     app.dependency_overrides[get_current_user] = lambda: test_user
     app.dependency_overrides[require_admin] = lambda: test_user
+    # Each test has its own database
+    clear_response_cache()
 
     with TestClient(app) as c:
         yield c
@@ -0,0 +1,83 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import services.auth as auth
+from models import User
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    auth.clear_user_cache()
+    yield
+    auth.clear_user_cache()
+
+
+def _credentials(user):
+    return HTTPAuthorizationCredentials(scheme='Bearer', credentials=auth.create_jwt(user))
+
+
+def test_cached_user_skips_lookup_until_invalidated(session, test_user):
+    creds = _credentials(test_user)
+    before = auth.user_cache_stats()
+
+    assert auth.get_current_user(creds, session).user_id == test_user.user_id
+
+    # Remove the row; a cache hit must not notice
+    session.delete(test_user)
+    session.commit()
+    assert auth.get_current_user(creds, session).email == 'test@example.com'
+
+    stats = auth.user_cache_stats()
+    assert stats['misses'] == before['misses'] + 1
+    assert stats['hits'] == before['hits'] + 1
+
+    auth.invalidate_user(test_user.user_id)
+    with pytest.raises(HTTPException) as exc:
+        auth.get_current_user(creds, session)
+    assert exc.value.status_code == 401
+
+
+def test_embedded_player_id_resolves_from_claims(session, monkeypatch):
+    monkeypatch.setattr(auth, 'JWT_EMBED_PLAYER_ID', True)
+    user = User(email='claims@example.com', player_id=7)
+    session.add(user)
+    session.commit()
+    creds = _credentials(user)
+
+    resolved = auth.get_current_user(creds, session)
+    assert (resolved.user_id, resolved.player_id, resolved.is_admin) == (user.user_id, 7, False)
+    assert auth.user_cache_stats()['claims'] >= 1
+
+    # Revoking bumps the version every outstanding token was issued with
+    auth.revoke_tokens(session, user)
+    session.commit()
+    auth.invalidate_user(user.user_id)
+    with pytest.raises(HTTPException) as exc:
+        auth.get_current_user(creds, session)
+    assert exc.value.status_code == 401
+    assert auth.get_current_user(_credentials(user), session).user_id == user.user_id
+
+
+def test_claims_of_deleted_user_rejected(session, monkeypatch):
+    monkeypatch.setattr(auth, 'JWT_EMBED_PLAYER_ID', True)
+    # Never persisted, as if the row had been deleted after login
+    creds = _credentials(User(user_id=42, email='gone@example.com', is_admin=True, player_id=7))
+    with pytest.raises(HTTPException) as exc:
+        auth.get_current_user(creds, session)
+    assert exc.value.status_code == 401
+
+
+def test_invalid_token_rejected(session):
+    creds = HTTPAuthorizationCredentials(scheme='Bearer', credentials='not-a-token')
+    with pytest.raises(HTTPException) as exc:
+        auth.get_current_user(creds, session)
+    assert exc.value.status_code == 401
+
+
+def test_admin_stats(client):
+    response = client.get('/admin/stats/')
+    assert response.status_code == 200
+    data = response.json()
+    assert {'hits', 'misses', 'size'} <= data['auth_cache'].keys()
+    assert {'sync', 'async', 'connects', 'checkouts'} <= data['db_pool'].keys()
@@ -1,3 +1,8 @@
+from datetime import datetime
+
+from models import Match
+
+
 def test_get_divisions_empty(client):
     response = client.get('/divisions/')
     assert response.status_code == 200
@@ -147,3 +152,37 @@ def test_copy_division(client, sample_division, sample_players):
     # Source division should still have its players
     old_players = client.get(f'/divisions/{sample_division.division_id}/players/').json()
     assert len(old_players) == 4
+
+
+def test_update_division_moves_upcoming_matches_in_sql(client, session, sample_division, sample_players):
+    alice, bob, _, _ = sample_players
+    # One upcoming match on every day of a week (Mon 2025-01-06 .. Sun 2025-01-12), plus a completed one
+    dates = [datetime(2025, 1, 6 + d, 19, 30) for d in range(7)]
+    matches = [
+        Match(
+            division_id=sample_division.division_id, player1_id=alice.player_id, player2_id=bob.player_id,
+            player1_rating=alice.rating, player2_rating=bob.rating, scheduled_date=d, completed=False,
+        )
+        for d in dates
+    ]
+    done = Match(
+        division_id=sample_division.division_id, player1_id=alice.player_id, player2_id=bob.player_id,
+        player1_rating=alice.rating, player2_rating=bob.rating, scheduled_date=datetime(2024, 12, 31, 19), completed=True,
+    )
+    session.add_all([*matches, done])
+    session.commit()
+
+    def update(day_of_week):
+        response = client.put(f'/divisions/{sample_division.division_id}/', json={
+            'name': 'Division A', 'day_of_week': day_of_week, 'active': True, 'update_existing_matches': True,
+        })
+        assert response.headers['X-Matches-Updated'] == '7'
+        session.expire_all()
+        return [session.get(Match, m.match_id) for m in matches]
+
+    assert {(m.scheduled_date, m.is_weekly) for m in update(3)} == {(datetime(2025, 1, 9, 19, 30), False)}
+    assert {(m.scheduled_date, m.is_weekly) for m in update(None)} == {(datetime(2025, 1, 6, 19, 30), True)}
+    assert session.get(Match, done.match_id).scheduled_date == datetime(2024, 12, 31, 19)
+
+    response = client.delete(f'/divisions/{sample_division.division_id}/')
+    assert response.json() == {'ok': True, 'matches_deleted': 8, 'standings_deleted': 0}
@@ -0,0 +1,128 @@
+import asyncio
+import socket
+import threading
+from datetime import datetime
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlmodel import select
+
+from models import EmailOutbox
+
+aiosmtpd_controller = pytest.importorskip('aiosmtpd.controller')
+
+
+class _Inbox:
+    def __init__(self, reject=()):
+        self.received = []
+        self.reject = set(reject)
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):  # noqa: N802 (aiosmtpd hook)
+        if address in self.reject:
+            return '451 Try again later'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):  # noqa: N802
+        self.received.append(envelope)
+        return '250 Message accepted'
+
+
+@pytest.fixture
+def smtp_server(session, monkeypatch):
+    """Local SMTP stand-in; drain_outbox is pointed at it and at the test database."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    handler = _Inbox(reject={'bob@example.com'})
+    controller = aiosmtpd_controller.Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+
+    monkeypatch.setattr('services.email_outbox.engine', session.get_bind())
+    monkeypatch.setattr('services.email_outbox.SMTP_HOST', '127.0.0.1')
+    monkeypatch.setattr('services.email_outbox.SMTP_PORT', port)
+    monkeypatch.setattr('services.email_outbox.SMTP_STARTTLS', False)
+    monkeypatch.setattr('services.email_outbox.SMTP_PASSWORD', '')
+    monkeypatch.setattr('services.email_outbox.EMAIL_RATE_PER_SECOND', 0)
+    monkeypatch.setattr('services.email_outbox.EMAIL_CONCURRENCY', 2)
+    yield handler
+    controller.stop()
+
+
+def test_broadcast_email_is_queued_and_drained(
+    client, session, sample_division, sample_players, smtp_server, monkeypatch
+):
+    from services.email_outbox import drain_outbox
+
+    monkeypatch.setattr('services.email_outbox.EMAIL_MAX_ATTEMPTS', 2)
+    for p in sample_players:
+        p.email_notifications = True
+        session.add(p)
+    session.commit()
+
+    response = client.post(
+        '/messages/',
+        json={
+            'subject': 'Playoffs',
+            'body': '**Tuesday**',
+            'recipient_type': 'league',
+            'send_email': True,
+        },
+    )
+    assert response.status_code == 200
+
+    # Queued with the message, nothing sent from the request
+    rows = session.exec(select(EmailOutbox)).all()
+    assert sorted(r.to_address for r in rows) == sorted(p.email for p in sample_players)
+    assert {r.status for r in rows} == {'pending'}
+    assert smtp_server.received == []
+
+    sends = REGISTRY.get_sample_value('opl_email_send_seconds_count') or 0
+    retries = REGISTRY.get_sample_value('opl_email_outcomes_total', {'status': 'retrying'}) or 0
+    assert asyncio.run(drain_outbox()) == {'sent': 3, 'retrying': 1, 'failed': 0}
+    assert REGISTRY.get_sample_value('opl_email_send_seconds_count') == sends + 3
+    assert (
+        REGISTRY.get_sample_value('opl_email_outcomes_total', {'status': 'retrying'}) == retries + 1
+    )
+    assert (
+        REGISTRY.get_sample_value(
+            'opl_email_send_failures_total', {'error': 'SMTPRecipientsRefused'}
+        )
+        >= 1
+    )
+    assert sorted(e.rcpt_tos[0] for e in smtp_server.received) == sorted(
+        p.email for p in sample_players if p.email != 'bob@example.com'
+    )
+    assert b'<strong>Tuesday</strong>' in smtp_server.received[0].content
+
+    session.expire_all()
+    bob = session.exec(select(EmailOutbox).where(EmailOutbox.to_address == 'bob@example.com')).one()
+    assert (bob.status, bob.attempts) == ('pending', 1)
+    assert bob.next_attempt_at > datetime.utcnow()
+    assert '451' in bob.last_error
+
+    # Not due yet; once it is, the second failure exhausts EMAIL_MAX_ATTEMPTS
+    assert asyncio.run(drain_outbox()) == {'sent': 0, 'retrying': 0, 'failed': 0}
+    bob.next_attempt_at = datetime.utcnow()
+    session.add(bob)
+    session.commit()
+    assert asyncio.run(drain_outbox()) == {'sent': 0, 'retrying': 0, 'failed': 1}
+
+    stats = client.get('/admin/email-outbox/').json()
+    assert stats['sent'] == 3
+    assert stats['failed'] == 1
+    assert stats['due'] == 0
+
+
+def test_drain_keeps_database_work_off_the_event_loop(monkeypatch):
+    from services import email_outbox
+
+    threads = []
+
+    def claim(session, now):
+        threads.append(threading.current_thread())
+        return []
+
+    monkeypatch.setattr(email_outbox, '_claim', claim)
+    assert asyncio.run(email_outbox.drain_outbox()) == {'sent': 0, 'retrying': 0, 'failed': 0}
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,83 @@
+import logging
+from datetime import datetime
+
+import pytest
+
+from models import Message
+from services import instrumentation
+from services.instrumentation import assert_max_queries, parameter_shape
+
+
+def test_server_timing_and_route_metrics(client, sample_division, sample_players):
+    response = client.get(f'/divisions/{sample_division.division_id}/players/')
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('db;dur=') and 'queries"' in timing and ', app;dur=' in timing
+    statements = int(timing.split('desc="')[1].split(' ')[0])
+    assert statements >= 1
+
+    metrics = client.get('/metrics').text
+    assert (
+        'opl_db_statements_per_request_count{route="/divisions/{division_id}/players/"}' in metrics
+    )
+    assert (
+        'opl_http_request_seconds_count{method="GET",route="/divisions/{division_id}/players/",status="2xx"}'
+        in metrics
+    )
+    # The scrape itself is the only request in flight
+    assert 'opl_http_requests_in_flight 1.0' in metrics
+    assert (
+        'opl_db_seconds_per_request_bucket{le="0.001",route="/divisions/{division_id}/players/"}'
+        in metrics
+    )
+    assert client.get('/divisions/999/').status_code == 404
+    assert 'route="/divisions/{division_id}/",status="4xx"' in client.get('/metrics').text
+
+
+def test_inbox_query_count_does_not_grow_with_messages(client, session, test_user, sample_players):
+    test_user.player_id = sample_players[0].player_id
+    session.add(test_user)
+
+    def add_messages(n):
+        session.add_all(
+            Message(
+                subject=f'News {i}',
+                body='...',
+                sender_id=test_user.user_id,
+                recipient_type='league',
+                created_at=datetime(2025, 3, 1, i),
+            )
+            for i in range(n)
+        )
+        session.commit()
+
+    add_messages(2)
+    with assert_max_queries(10) as few:
+        assert len(client.get('/messages/').json()) == 2
+    add_messages(20)
+    with assert_max_queries(len(few)):
+        assert len(client.get('/messages/').json()) == 22
+
+    with (
+        pytest.raises(AssertionError, match='SQL statements executed, expected at most 0'),
+        assert_max_queries(0),
+    ):
+        client.get('/messages/')
+
+
+def test_slow_statements_are_logged_with_parameter_shapes(
+    client, sample_division, sample_players, monkeypatch, caplog
+):
+    division_id = sample_division.division_id
+    monkeypatch.setattr(instrumentation, 'SLOW_QUERY_MS', 1e-6)
+    with caplog.at_level(logging.WARNING, logger='services.instrumentation'):
+        client.get(f'/divisions/{division_id}/players/')
+    slow = [r.getMessage() for r in caplog.records if r.getMessage().startswith('Slow SQL')]
+    assert slow and all('/divisions/{division_id}/players/' in m for m in slow)
+    assert any('params=(int' in m for m in slow)
+    assert 'alice' not in ' '.join(slow).lower()
+
+
+def test_parameter_shape():
+    assert parameter_shape((1, 2, 3, 'a', None)) == '(int x 3, str, NoneType)'
+    assert parameter_shape({'id': 1, 'name': 'x'}) == '{id: int, name: str}'
+    assert parameter_shape([(1, 'a'), (2, 'b')], executemany=True) == '2 x (int, str)'
@@ -0,0 +1,460 @@
+from datetime import date as date_type
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from models import Division, DivisionPlayer, Game, Match, Message, Player, PlayerBlackout, Standing
+from models import Session as OPLSession
+from services.standings import rebuild_standings
+from utils import calculate_rating_change, get_match_weight
+
+
+def _create_match(session, division, p1, p2, race=3, session_id=None):
+    match = Match(
+        session_id=session_id,
+        division_id=division.division_id,
+        player1_id=p1.player_id,
+        player2_id=p2.player_id,
+        player1_rating=p1.rating,
+        player2_rating=p2.rating,
+        scheduled_date=datetime(2025, 1, 7, 19, 0),
+        completed=False,
+        race=race,
+    )
+    session.add(match)
+    session.commit()
+    session.refresh(match)
+    return match
+
+
+def _games(winner, loser, wins, losses, balls=2):
+    return [
+        {'winner_id': winner.player_id, 'loser_id': loser.player_id, 'balls_remaining': balls}
+    ] * wins + [
+        {'winner_id': loser.player_id, 'loser_id': winner.player_id, 'balls_remaining': balls}
+    ] * losses
+
+
+def _replay(initial, history):
+    """Reference implementation: replay every game from scratch."""
+    rating = {pid: r for pid, (r, _) in initial.items()}
+    played = {pid: gp for pid, (_, gp) in initial.items()}
+    for games in history:
+        for g in games:
+            w, lo = g['winner_id'], g['loser_id']
+            wc, lc = calculate_rating_change(played[w], played[lo], g['balls_remaining'])
+            rating[w] += wc
+            rating[lo] += lc
+            played[w] += 1
+            played[lo] += 1
+    return rating, played
+
+
+def test_rescore_match_replays_transitive_games(client, session, sample_division, sample_players):
+    alice, bob, charlie, diana = sample_players
+    initial = {p.player_id: (p.rating, p.games_played) for p in sample_players}
+
+    m1 = _create_match(session, sample_division, alice, bob)
+    m2 = _create_match(session, sample_division, bob, charlie)
+    m3 = _create_match(session, sample_division, charlie, diana)
+
+    first = _games(alice, bob, 3, 0)
+    second = _games(charlie, bob, 3, 1)
+    third = _games(diana, charlie, 3, 2)
+    for match, games in ((m1, first), (m2, second), (m3, third)):
+        assert client.put(f'/matches/{match.match_id}/', json=games).status_code == 200
+
+    # Rescore the first match with more games, shifting Bob's games_played, which
+    # changes Charlie's later rating changes and, through him, Diana's snapshots
+    rescored = _games(alice, bob, 3, 2, balls=5)
+    response = client.put(f'/matches/{m1.match_id}/rescore/', json=rescored)
+    assert response.status_code == 200
+    assert response.json()['winner_id'] == alice.player_id
+
+    session.expire_all()
+    expected_rating, expected_played = _replay(initial, [rescored, second, third])
+    for p in sample_players:
+        db_player = session.get(Player, p.player_id)
+        assert db_player.rating == expected_rating[p.player_id]
+        assert db_player.games_played == expected_played[p.player_id]
+
+    # Every game's snapshot must match a clean replay of the new history
+    rating = {pid: r for pid, (r, _) in initial.items()}
+    played = {pid: gp for pid, (_, gp) in initial.items()}
+    for match in (m1, m2, m3):
+        games = session.exec(
+            select(Game).where(Game.match_id == match.match_id).order_by(Game.game_id)
+        ).all()
+        for g in games:
+            wc, lc = calculate_rating_change(
+                played[g.winner_id], played[g.loser_id], g.balls_remaining
+            )
+            assert (g.winner_rating, g.loser_rating) == (rating[g.winner_id], rating[g.loser_id])
+            assert (g.winner_rating_change, g.loser_rating_change) == (wc, lc)
+            rating[g.winner_id] += wc
+            rating[g.loser_id] += lc
+            played[g.winner_id] += 1
+            played[g.loser_id] += 1
+    assert len(session.exec(select(Game).where(Game.match_id == m1.match_id)).all()) == 5
+
+
+def test_rescore_match_requires_completed(client, session, sample_division, sample_players):
+    alice, bob, _, _ = sample_players
+    match = _create_match(session, sample_division, alice, bob)
+    response = client.put(f'/matches/{match.match_id}/rescore/', json=_games(alice, bob, 3, 0))
+    assert response.status_code == 400
+
+
+def test_get_matches_date_range_is_inclusive(client, session, sample_division, sample_players):
+    alice, bob, _, _ = sample_players
+    _create_match(session, sample_division, alice, bob)  # 2025-01-07 19:00
+
+    response = client.get('/matches/?start_date=2025-01-07&end_date=2025-01-07')
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+    response = client.get('/matches/?start_date=2025-01-08')
+    assert response.json() == []
+    response = client.get('/matches/?start_date=2025-01-01&end_date=2025-01-06')
+    assert response.json() == []
+
+
+def _pages(client, url):
+    """Follow X-Next-Cursor until exhausted; returns the pages' JSON bodies."""
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(url + (f'&after={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return pages
+
+
+def test_get_matches_keyset_pagination(client, session, sample_division, sample_players):
+    alice, bob, _, _ = sample_players
+    # Two matches share each timestamp so the match_id tie-break is exercised
+    for i in range(5):
+        for _ in range(2):
+            match = _create_match(session, sample_division, alice, bob)
+            match.scheduled_date = datetime(2025, 1, 7, 19, 0) + timedelta(days=7 * i)
+            session.add(match)
+    session.commit()
+
+    unpaged = client.get(f'/matches/?player_id={alice.player_id}')
+    assert 'X-Next-Cursor' not in unpaged.headers
+
+    pages = _pages(client, f'/matches/?player_id={alice.player_id}&limit=3')
+    assert [len(p) for p in pages] == [3, 3, 3, 1]
+    assert [m['match_id'] for p in pages for m in p] == [m['match_id'] for m in unpaged.json()]
+
+
+def test_get_games_and_messages_keyset_pagination(
+    client, session, test_user, sample_division, sample_players
+):
+    alice, bob, charlie, _ = sample_players
+    for opponent in (bob, charlie, bob):
+        match = _create_match(session, sample_division, alice, opponent)
+        client.put(f'/matches/{match.match_id}/', json=_games(alice, opponent, 3, 1))
+
+    games = _pages(client, f'/games/?player_id={alice.player_id}&limit=5')
+    game_ids = [g['game_id'] for p in games for g in p]
+    assert [len(p) for p in games] == [5, 5, 2]
+    assert game_ids == sorted(game_ids)
+
+    start = datetime(2025, 3, 1)
+    for i in range(4):
+        session.add(
+            Message(
+                subject=f'News {i}',
+                body='...',
+                sender_id=test_user.user_id,
+                recipient_type='league',
+                created_at=start + timedelta(hours=i),
+            )
+        )
+    session.commit()
+
+    messages = _pages(client, '/messages/?limit=3')
+    assert [[m['subject'] for m in p] for p in messages] == [
+        ['News 3', 'News 2', 'News 1'],
+        ['News 0'],
+    ]
+
+
+def test_pagination_rejects_bad_cursor(client):
+    response = client.get('/games/?player_id=1&limit=5&after=not-a-cursor')
+    assert response.status_code == 422
+
+
+def test_scores_follow_completions_and_rescores(client, session, sample_division, sample_players):
+    alice, bob, charlie, diana = sample_players
+    opl_session = OPLSession(name='Spring')
+    session.add(opl_session)
+    session.commit()
+    sid = opl_session.session_id
+
+    m1 = _create_match(session, sample_division, alice, bob, session_id=sid)
+    m2 = _create_match(session, sample_division, charlie, diana, session_id=sid)
+    client.put(f'/matches/{m1.match_id}/', json=_games(alice, bob, 3, 0))
+    client.put(f'/matches/{m2.match_id}/', json=_games(diana, charlie, 3, 2))
+
+    def scores():
+        data = client.get(f'/matches/scores/?session_id={sid}').json()
+        return {s['player_id']: s['score'] for s in data}
+
+    # Shutout 3pts; 3-2 win 2pts with 1pt for the loser on the hill
+    assert scores() == {alice.player_id: 3, diana.player_id: 2, charlie.player_id: 1}
+
+    client.put(f'/matches/{m1.match_id}/rescore/', json=_games(bob, alice, 3, 1))
+    assert scores() == {bob.player_id: 2, diana.player_id: 2, charlie.player_id: 1}
+
+    client.delete(f'/matches/{m2.match_id}/')
+    assert scores() == {bob.player_id: 2}
+
+    # A full rebuild must agree with the incrementally maintained rows
+    def snapshot():
+        session.expire_all()
+        return sorted(
+            (r.player_id, r.points, r.match_wins, r.match_losses, r.games_won, r.games_lost)
+            for r in session.exec(select(Standing)).all()
+            if r.match_wins or r.match_losses
+        )
+
+    incremental = snapshot()
+    rebuild_standings(session)
+    session.commit()
+    assert snapshot() == incremental
+
+
+def test_deleting_match_missing_from_standings_leaves_them_untouched(
+    client, session, sample_division, sample_players
+):
+    alice, bob, charlie, diana = sample_players
+    opl_session = OPLSession(name='Spring')
+    session.add(opl_session)
+    session.commit()
+    sid = opl_session.session_id
+
+    m1 = _create_match(session, sample_division, alice, bob, session_id=sid)
+    m2 = _create_match(session, sample_division, charlie, diana, session_id=sid)
+    client.put(f'/matches/{m1.match_id}/', json=_games(alice, bob, 3, 0))
+    client.put(f'/matches/{m2.match_id}/', json=_games(diana, charlie, 3, 2))
+    # Rows lost, as for a match completed before the standings table existed
+    for row in session.exec(
+        select(Standing).where(Standing.player_id.in_([charlie.player_id, diana.player_id]))
+    ):
+        session.delete(row)
+    session.commit()
+
+    assert client.delete(f'/matches/{m2.match_id}/').status_code == 200
+    session.expire_all()
+    rows = session.exec(select(Standing)).all()
+    assert {r.player_id: r.points for r in rows} == {alice.player_id: 3, bob.player_id: 0}
+    assert all(
+        getattr(r, c) >= 0
+        for r in rows
+        for c in ('points', 'match_wins', 'match_losses', 'games_won', 'games_lost')
+    )
+
+
+def test_confirmed_submission_completes_match(
+    client, session, test_user, sample_division, sample_players, monkeypatch
+):
+    monkeypatch.setenv('AUTO_CONFIRM_SCORES', 'true')
+    alice, bob, _, _ = sample_players
+    opl_session = OPLSession(name='Free Session', dues=0)
+    session.add(opl_session)
+    session.commit()
+    match = _create_match(session, sample_division, alice, bob, session_id=opl_session.session_id)
+    match.scheduled_date = datetime.utcnow()
+    upcoming = _create_match(
+        session, sample_division, bob, alice, session_id=opl_session.session_id
+    )
+    test_user.player_id = alice.player_id
+    session.add_all([match, test_user])
+    session.commit()
+    initial = {p.player_id: (p.rating, p.games_played) for p in (alice, bob)}
+
+    response = client.post(f'/matches/{match.match_id}/score/', json=_games(alice, bob, 3, 1))
+    assert response.status_code == 200
+
+    session.expire_all()
+    db_match = session.get(Match, match.match_id)
+    assert db_match.completed
+    assert db_match.winner_id == alice.player_id
+    assert len(session.exec(select(Game).where(Game.match_id == match.match_id)).all()) == 4
+
+    expected_rating, _ = _replay(initial, [_games(alice, bob, 3, 1)])
+    db_upcoming = session.get(Match, upcoming.match_id)
+    assert db_upcoming.player1_rating == expected_rating[bob.player_id]
+    assert db_upcoming.player2_rating == expected_rating[alice.player_id]
+
+
+def test_completion_refreshes_upcoming_ratings_and_weights(
+    client, session, sample_division, sample_players
+):
+    alice, bob, charlie, _ = sample_players
+    played = _create_match(session, sample_division, alice, bob)
+    upcoming = _create_match(session, sample_division, charlie, bob)
+    bye = Match(
+        division_id=sample_division.division_id,
+        player1_id=alice.player_id,
+        player1_rating=alice.rating,
+        scheduled_date=datetime(2025, 1, 14),
+        completed=False,
+        is_bye=True,
+    )
+    session.add(bye)
+    session.commit()
+
+    client.put(f'/matches/{played.match_id}/', json=_games(alice, bob, 3, 0, balls=8))
+
+    session.expire_all()
+    new_alice = session.get(Player, alice.player_id)
+    new_bob = session.get(Player, bob.player_id)
+    db_upcoming = session.get(Match, upcoming.match_id)
+    assert db_upcoming.player1_rating == charlie.rating
+    assert db_upcoming.player2_rating == new_bob.rating
+    assert (db_upcoming.player1_weight, db_upcoming.player2_weight) == get_match_weight(
+        charlie.rating, new_bob.rating
+    )
+
+    db_bye = session.get(Match, bye.match_id)
+    assert db_bye.player1_rating == new_alice.rating
+    assert db_bye.player2_rating is None
+
+
+def test_match_score_etag(client, session, test_user, sample_division, sample_players):
+    alice, bob, _, _ = sample_players
+    match = _create_match(session, sample_division, alice, bob)
+    match.scheduled_date = datetime.utcnow()
+    test_user.player_id = alice.player_id
+    session.add_all([match, test_user])
+    session.commit()
+    url = f'/matches/{match.match_id}/score/'
+
+    first = client.get(url)
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+
+    cached = client.get(url, headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.content == b''
+
+    # A new submission bumps score_version, invalidating the validator
+    assert client.post(url, json=_games(alice, bob, 3, 1)).status_code == 200
+    fresh = client.get(url, headers={'If-None-Match': etag})
+    assert fresh.status_code == 200
+    assert fresh.headers['ETag'] != etag
+    assert fresh.json()['my_submission']['status'] == 'pending'
+
+
+def test_list_endpoints_answer_conditional_gets(client, sample_division, sample_players):
+    etag = client.get('/players/').headers['ETag']
+
+    assert client.get('/players/', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/divisions/', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_schedule_round_robin_replaces_unplayed_matches(
+    client, session, sample_division, sample_players
+):
+    alice, bob, charlie, diana = sample_players
+    tuesday = Division(name='Tuesday', day_of_week=1)
+    session.add(tuesday)
+    opl_session = OPLSession(name='Spring')
+    session.add(opl_session)
+    session.commit()
+    for p in (alice, bob, charlie):
+        session.add(DivisionPlayer(division_id=tuesday.division_id, player_id=p.player_id))
+    session.commit()
+
+    stale = _create_match(session, sample_division, alice, bob, session_id=opl_session.session_id)
+    played = _create_match(
+        session, sample_division, charlie, diana, session_id=opl_session.session_id
+    )
+    played.completed = True
+    session.add(played)
+    session.commit()
+    stale_id = stale.match_id
+
+    response = client.post(
+        '/matches/schedule-round-robin/',
+        json={
+            'session_id': opl_session.session_id,
+            'start_date': '2025-01-08T19:00:00',
+        },
+    )
+    assert response.status_code == 200
+    scheduled = response.json()
+    assert all(m['match_id'] for m in scheduled)
+
+    weekly = [m for m in scheduled if m['division_id'] == sample_division.division_id]
+    assert len(weekly) == 12 and not any(m['is_bye'] for m in weekly)
+    assert {m['scheduled_date'][:10] for m in weekly} == {
+        (datetime(2025, 1, 6) + timedelta(weeks=w)).date().isoformat() for w in range(6)
+    }
+    ratings = {p.player_id: p.rating for p in sample_players}
+    for m in weekly:
+        assert (m['player1_weight'], m['player2_weight']) == get_match_weight(
+            ratings[m['player1_id']], ratings[m['player2_id']]
+        )
+
+    # Three players: every round has one bye, on the division's own weekday
+    odd = [m for m in scheduled if m['division_id'] == tuesday.division_id]
+    assert len([m for m in odd if m['is_bye']]) == 6 and len(odd) == 12
+    assert {datetime.fromisoformat(m['scheduled_date']).weekday() for m in odd} == {1}
+
+    session.expire_all()
+    remaining = {m.match_id for m in session.exec(select(Match)).all()}
+    assert stale_id not in remaining
+    assert played.match_id in remaining
+    assert remaining == {played.match_id} | {m['match_id'] for m in scheduled}
+
+
+def test_schedule_round_robin_works_around_blackouts(
+    client, session, sample_division, sample_players
+):
+    alice, bob, charlie, diana = sample_players
+    fall, spring = OPLSession(name='Fall'), OPLSession(name='Spring')
+    session.add_all([fall, spring])
+    session.commit()
+    # Last session ended with Alice vs Charlie; Alice and Bob are both away week one
+    last = _create_match(session, sample_division, alice, charlie, session_id=fall.session_id)
+    last.completed = True
+    session.add(last)
+    for p in (alice, bob):
+        session.add(
+            PlayerBlackout(
+                player_id=p.player_id,
+                start_date=date_type(2025, 1, 6),
+                end_date=date_type(2025, 1, 12),
+            )
+        )
+    session.commit()
+
+    body = {
+        'session_id': spring.session_id,
+        'start_date': '2025-01-06T00:00:00',
+        'double': False,
+        'time_budget': 0.2,
+    }
+    assert (
+        client.post(
+            '/matches/schedule-round-robin/', json={**body, 'optimizer': 'genetic'}
+        ).status_code
+        == 422
+    )
+
+    response = client.post('/matches/schedule-round-robin/', json=body)
+    assert response.status_code == 200
+    cost = response.headers['X-Schedule-Cost']
+    assert cost.startswith('10; blackout=10; repeat=0;')
+
+    week_one = [m for m in response.json() if m['scheduled_date'].startswith('2025-01-06')]
+    assert {frozenset((m['player1_id'], m['player2_id'])) for m in week_one} == {
+        frozenset((alice.player_id, bob.player_id)),
+        frozenset((charlie.player_id, diana.player_id)),
+    }
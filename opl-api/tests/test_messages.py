@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from models import Division, Message, MessageRecipient
+from services.inbox import backfill_recipients
+
+
+def _message(
+    session, test_user, subject, recipient_type, recipient_id=None, player_ids=(), hours=0
+):
+    msg = Message(
+        subject=subject,
+        body=f'{subject} body',
+        sender_id=test_user.user_id,
+        recipient_type=recipient_type,
+        recipient_id=recipient_id,
+        created_at=datetime(2025, 3, 1) + timedelta(hours=hours),
+    )
+    session.add(msg)
+    session.commit()
+    for pid in player_ids:
+        session.add(MessageRecipient(message_id=msg.message_id, player_id=pid))
+    session.commit()
+    return msg
+
+
+def test_player_inbox_headers_and_unread_count(
+    client, session, test_user, sample_division, sample_players
+):
+    alice, bob, _, _ = sample_players
+    other = Division(name='Division B')
+    session.add(other)
+    session.commit()
+
+    _message(session, test_user, 'League', 'league', hours=0)
+    _message(session, test_user, 'Our division', 'division', sample_division.division_id, hours=1)
+    _message(session, test_user, 'Other division', 'division', other.division_id, hours=2)
+    direct = _message(session, test_user, 'Direct', 'player', player_ids=[alice.player_id], hours=3)
+    _message(session, test_user, 'For Bob', 'player', player_ids=[bob.player_id], hours=4)
+
+    test_user.player_id = alice.player_id
+    session.add(test_user)
+    session.commit()
+
+    inbox = client.get('/messages/').json()
+    assert [m['subject'] for m in inbox] == ['Direct', 'Our division', 'League']
+    assert all('body' not in m for m in inbox)
+    assert client.get('/messages/unread-count/').json() == {'count': 3}
+
+    assert client.put(f'/messages/{direct.message_id}/read/').status_code == 200
+    league = next(m for m in inbox if m['subject'] == 'League')
+    assert client.put(f'/messages/{league["message_id"]}/read/').status_code == 200
+
+    inbox = client.get('/messages/').json()
+    assert {m['subject']: m['is_read'] for m in inbox} == {
+        'Direct': True,
+        'Our division': False,
+        'League': True,
+    }
+    assert client.get('/messages/unread-count/').json() == {'count': 1}
+
+    first = client.get('/messages/?limit=2')
+    second = client.get(f'/messages/?limit=2&after={first.headers["X-Next-Cursor"]}')
+    assert [m['subject'] for m in first.json() + second.json()] == [
+        'Direct',
+        'Our division',
+        'League',
+    ]
+    assert 'X-Next-Cursor' not in second.headers
+
+    # The full body is fetched per message
+    assert client.get(f'/messages/{direct.message_id}/').json()['body'] == 'Direct body'
+
+
+def test_players_only_read_messages_in_their_inbox(
+    client, session, test_user, sample_division, sample_players
+):
+    alice, bob, _, _ = sample_players
+    other = Division(name='Division B')
+    session.add(other)
+    session.commit()
+    league = _message(session, test_user, 'League', 'league')
+    ours = _message(session, test_user, 'Our division', 'division', sample_division.division_id)
+    theirs = _message(session, test_user, 'Other division', 'division', other.division_id)
+    for_bob = _message(session, test_user, 'For Bob', 'player', player_ids=[bob.player_id])
+    ids = {m.subject: m.message_id for m in (league, ours, theirs, for_bob)}
+
+    # Admins read everything
+    assert client.get(f'/messages/{ids["For Bob"]}/').status_code == 200
+
+    test_user.is_admin = False
+    test_user.player_id = alice.player_id
+    session.add(test_user)
+    session.commit()
+    assert client.get(f'/messages/{ids["League"]}/').json()['body'] == 'League body'
+    assert client.get(f'/messages/{ids["Our division"]}/').status_code == 200
+    for subject in ('Other division', 'For Bob'):
+        assert client.get(f'/messages/{ids[subject]}/').status_code == 404
+        # Marking it read must not smuggle it into the inbox either
+        assert client.put(f'/messages/{ids[subject]}/read/').status_code == 404
+        assert client.get(f'/messages/{ids[subject]}/').status_code == 404
+
+
+def test_fanout_delivers_broadcasts_on_write(
+    client, session, test_user, sample_division, sample_players, monkeypatch
+):
+    alice, _, _, _ = sample_players
+    legacy = _message(session, test_user, 'Before fan-out', 'league', hours=0)
+
+    monkeypatch.setattr('services.inbox.MESSAGE_FANOUT', True)
+    response = client.post(
+        '/messages/',
+        json={
+            'subject': 'Division news',
+            'body': '...',
+            'recipient_type': 'division',
+            'recipient_id': sample_division.division_id,
+        },
+    )
+    assert response.status_code == 200
+    message_id = response.json()['message_id']
+
+    rows = session.exec(
+        select(MessageRecipient).where(MessageRecipient.message_id == message_id)
+    ).all()
+    assert sorted(r.player_id for r in rows) == sorted(p.player_id for p in sample_players)
+
+    test_user.player_id = alice.player_id
+    session.add(test_user)
+    session.commit()
+
+    # Pre-existing broadcasts only show up once backfilled
+    assert [m['subject'] for m in client.get('/messages/').json()] == ['Division news']
+    assert backfill_recipients(session) == len(sample_players)
+    assert backfill_recipients(session) == 0
+    session.commit()
+
+    inbox = client.get('/messages/').json()
+    assert {m['message_id'] for m in inbox} == {message_id, legacy.message_id}
+    assert client.get('/messages/unread-count/').json() == {'count': 2}
+    client.put(f'/messages/{message_id}/read/')
+    assert client.get('/messages/unread-count/').json() == {'count': 1}
+
+    assert client.delete(f'/messages/{message_id}/').status_code == 200
+    assert (
+        session.exec(
+            select(MessageRecipient).where(MessageRecipient.message_id == message_id)
+        ).all()
+        == []
+    )
@@ -65,3 +65,51 @@ def test_update_player(client, sample_players):
     data = response.json()
     assert data['last_name'] == 'Johnson'
     assert data['rating'] == 750
+
+
+def test_email_change_and_delete_revoke_linked_tokens(client, session, sample_players):
+    from models import User
+
+    alice = sample_players[0]
+    user = User(email=alice.email, player_id=alice.player_id)
+    session.add(user)
+    session.commit()
+    body = {k: v for k, v in alice.model_dump().items() if k not in ('player_id', 'deleted')}
+
+    client.put(f'/players/{alice.player_id}/', json={**body, 'phone': '555-9999'})
+    session.refresh(user)
+    assert user.token_version == 0
+
+    client.put(f'/players/{alice.player_id}/', json={**body, 'email': 'alice@new.example.com'})
+    session.refresh(user)
+    assert (user.email, user.token_version) == ('alice@new.example.com', 1)
+
+    client.delete(f'/players/{alice.player_id}/')
+    session.refresh(user)
+    assert user.token_version == 2
+
+
+def test_player_blackouts(client, sample_players):
+    alice = sample_players[0]
+    url = f'/players/{alice.player_id}/blackouts/'
+    response = client.post(
+        url, json={'start_date': '2025-02-10', 'end_date': '2025-02-16', 'reason': 'Travel'}
+    )
+    assert response.status_code == 200
+    blackout_id = response.json()['blackout_id']
+    assert (
+        client.post(url, json={'start_date': '2025-03-02', 'end_date': '2025-03-01'}).status_code
+        == 400
+    )
+
+    assert [(b['start_date'], b['reason']) for b in client.get(url).json()] == [
+        ('2025-02-10', 'Travel')
+    ]
+    assert (
+        client.delete(
+            f'/players/{sample_players[1].player_id}/blackouts/{blackout_id}/'
+        ).status_code
+        == 404
+    )
+    assert client.delete(f'{url}{blackout_id}/').status_code == 200
+    assert client.get(url).json() == []
@@ -0,0 +1,106 @@
+from datetime import datetime
+
+from sqlmodel import select
+
+from models import Game, Match, Player
+from services.rating_simulator import load_snapshot, simulate
+from utils import KFactorTable
+
+
+def _play(client, session, division, history):
+    for p1, p2, games in history:
+        match = Match(
+            division_id=division.division_id,
+            player1_id=p1.player_id,
+            player2_id=p2.player_id,
+            player1_rating=p1.rating,
+            player2_rating=p2.rating,
+            scheduled_date=datetime(2025, 1, 7, 19, 0),
+            completed=False,
+        )
+        session.add(match)
+        session.commit()
+        assert (
+            client.put(
+                f'/matches/{match.match_id}/',
+                json=[
+                    {'winner_id': w.player_id, 'loser_id': lo.player_id, 'balls_remaining': balls}
+                    for w, lo, balls in games
+                ],
+            ).status_code
+            == 200
+        )
+    session.expire_all()
+
+
+def test_default_simulation_reproduces_stored_ratings(
+    client, session, sample_division, sample_players
+):
+    alice, bob, charlie, diana = sample_players
+    start = {p.player_id: p.rating for p in sample_players}
+    _play(
+        client,
+        session,
+        sample_division,
+        [
+            (alice, bob, [(alice, bob, 3), (bob, alice, 1), (alice, bob, 5), (alice, bob, 2)]),
+            (charlie, diana, [(diana, charlie, 4), (diana, charlie, 1), (diana, charlie, 6)]),
+            (
+                bob,
+                charlie,
+                [(charlie, bob, 2), (bob, charlie, 7), (bob, charlie, 1), (bob, charlie, 3)],
+            ),
+        ],
+    )
+
+    snapshot = load_snapshot(session)
+    result = simulate(snapshot)
+    assert len(snapshot) == 11
+    players = {p.player_id: p for p in session.exec(select(Player)).all()}
+    for i, pid in enumerate(snapshot.player_ids):
+        assert snapshot.start_rating[i] == start[pid]
+        assert result.rating[i] == players[pid].rating
+        assert result.games_played[i] == players[pid].games_played
+
+    # Each trajectory point is the rating after that game, matching the next game's snapshot
+    bob_games = session.exec(
+        select(Game)
+        .where((Game.winner_id == bob.player_id) | (Game.loser_id == bob.player_id))
+        .order_by(Game.played_date, Game.game_id)
+    ).all()
+    trajectory = result.trajectories([bob.player_id])[bob.player_id]
+    assert len(trajectory) == len(bob_games) == 8
+    before = [
+        g.winner_rating if g.winner_id == bob.player_id else g.loser_rating for g in bob_games
+    ]
+    assert [r for _, r in trajectory] == [*before[1:], players[bob.player_id].rating]
+
+    # With no K only the balls remaining move ratings
+    flat = simulate(snapshot, KFactorTable(base=0))
+    alice_index = snapshot.player_ids.index(alice.player_id)
+    assert flat.rating[alice_index] == start[alice.player_id] + 3 - 1 + 5 + 2
+
+
+def test_rating_simulation_endpoint(client, session, sample_division, sample_players):
+    alice, bob, _, _ = sample_players
+    _play(
+        client,
+        session,
+        sample_division,
+        [(alice, bob, [(alice, bob, 3), (alice, bob, 4), (alice, bob, 1)])],
+    )
+
+    report = client.post(
+        '/admin/rating-simulation/', json={'k_base': 30, 'player_ids': [alice.player_id]}
+    ).json()
+    assert report['games'] == 3
+    [entry] = report['players']
+    assert entry['actual_rating'] == session.get(Player, alice.player_id).rating
+    assert entry['rating'] > entry['actual_rating']
+    assert [r for _, r in entry['trajectory']][-1] == entry['rating']
+
+    everyone = client.post('/admin/rating-simulation/', json={}).json()
+    assert {p['player_id'] for p in everyone['players']} == {alice.player_id, bob.player_id}
+    assert all(p['rating'] == p['actual_rating'] for p in everyone['players'])
+
+    assert client.post('/admin/rating-simulation/', json={'k_decay': 1.5}).status_code == 422
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from models import Division, Match
+from models import Session as OPLSession
+from services import response_cache
+from services.instrumentation import assert_max_queries
+from services.response_cache import cached, mark_stale
+
+
+def test_division_list_served_from_memory_until_edited(client, session, sample_division):
+    assert [d['name'] for d in client.get('/divisions/').json()] == ['Division A']
+    with assert_max_queries(0):
+        assert [d['name'] for d in client.get('/divisions/').json()] == ['Division A']
+
+    # Writes that bypass the API are not seen until something marks the list stale
+    session.add(Division(name='Division B'))
+    session.commit()
+    assert len(client.get('/divisions/').json()) == 1
+
+    assert client.post('/divisions/', json={'name': 'Division C'}).status_code == 200
+    assert [d['name'] for d in client.get('/divisions/').json()] == [
+        'Division A',
+        'Division B',
+        'Division C',
+    ]
+    client.delete(f'/divisions/{sample_division.division_id}/')
+    assert [d['name'] for d in client.get('/divisions/').json()] == ['Division B', 'Division C']
+
+
+def test_session_reads_follow_updates_and_rescheduling(
+    client, session, sample_division, sample_players
+):
+    opl_session = OPLSession(name='Spring', match_time='19:00')
+    session.add(opl_session)
+    session.commit()
+    session_id = opl_session.session_id
+    alice, bob = sample_players[:2]
+    session.add_all(
+        Match(
+            session_id=session_id,
+            division_id=sample_division.division_id,
+            player1_id=alice.player_id,
+            player2_id=bob.player_id,
+            player1_rating=alice.rating,
+            player2_rating=bob.rating,
+            scheduled_date=datetime(2025, 1, 7, 19, 0) + timedelta(weeks=w),
+            completed=False,
+        )
+        for w in range(3)
+    )
+    session.commit()
+
+    assert client.get(f'/sessions/{session_id}/').json()['start_date'] == '2025-01-07'
+    assert [s['name'] for s in client.get('/sessions/').json()] == ['Spring']
+    with assert_max_queries(0):
+        client.get(f'/sessions/{session_id}/')
+        client.get('/sessions/')
+
+    update = {'name': 'Summer', 'match_time': '19:00', 'dues': 10, 'active': True}
+    assert client.put(f'/sessions/{session_id}/', json=update).status_code == 200
+    assert client.get(f'/sessions/{session_id}/').json()['name'] == 'Summer'
+    assert [s['name'] for s in client.get('/sessions/').json()] == ['Summer']
+
+    # Moving the division to Mondays moves the session's first match night
+    client.put(
+        f'/divisions/{sample_division.division_id}/',
+        json={
+            'name': 'Division A',
+            'day_of_week': 0,
+            'active': True,
+            'update_existing_matches': True,
+        },
+    )
+    assert client.get(f'/sessions/{session_id}/').json()['start_date'] == '2025-01-06'
+
+
+def test_scored_match_refreshes_player_ratings(client, session, sample_division, sample_players):
+    alice, bob = sample_players[:2]
+    alice_id, bob_id = alice.player_id, bob.player_id
+    match = Match(
+        division_id=sample_division.division_id,
+        player1_id=alice_id,
+        player2_id=bob_id,
+        player1_rating=alice.rating,
+        player2_rating=bob.rating,
+        scheduled_date=datetime(2025, 1, 7, 19, 0),
+        completed=False,
+    )
+    session.add(match)
+    session.commit()
+    match_id = match.match_id
+
+    def rating(player_id):
+        return next(
+            p['rating'] for p in client.get('/players/').json() if p['player_id'] == player_id
+        )
+
+    assert rating(alice_id) == 700
+    games = [{'winner_id': alice_id, 'loser_id': bob_id, 'balls_remaining': 3}] * 3
+    assert client.put(f'/matches/{match_id}/', json=games).status_code == 200
+    assert rating(alice_id) > 700
+
+
+def test_invalidation_waits_for_commit(session):
+    loads = []
+
+    def load():
+        loads.append(1)
+        return ['value']
+
+    response_cache.clear_response_cache()
+    cached('test', None, load)
+    cached('test', None, load)
+    assert len(loads) == 1
+
+    session.exec(select(Division)).all()
+    mark_stale(session, 'test')
+    session.rollback()
+    cached('test', None, load)
+    assert len(loads) == 1
+
+    mark_stale(session, 'test')
+    session.commit()
+    cached('test', None, load)
+    assert len(loads) == 2
+
+
+def test_load_overlapping_invalidation_is_not_stored():
+    response_cache.clear_response_cache()
+
+    def load():
+        response_cache.invalidate('test')
+        return 'stale'
+
+    assert cached('test', None, load) == 'stale'
+    assert cached('test', None, lambda: 'fresh') == 'fresh'
+    assert cached('test', None, lambda: 'unused') == 'fresh'
+
+
+def test_notifications_from_other_instances_invalidate():
+    response_cache.clear_response_cache()
+    cached('test', None, lambda: 'first')
+
+    response_cache._on_notify(f'{response_cache._INSTANCE_ID}:test')
+    assert cached('test', None, lambda: 'second') == 'first'
+
+    response_cache._on_notify('another-instance:test')
+    assert cached('test', None, lambda: 'second') == 'second'
+    assert response_cache.response_cache_stats()['remote_invalidations'] >= 1
@@ -0,0 +1,95 @@
+import random
+import time
+from collections import Counter
+
+from services.schedule_optimizer import COST_WEIGHTS, ScheduleProblem, _Search, optimize_schedule
+
+
+def _assert_round_robin(table, n, double):
+    weeks = (n + n % 2 - 1) * (2 if double else 1)
+    pairs = Counter(frozenset((a, b)) for _, a, b in table if b is not None)
+    assert len(pairs) == n * (n - 1) // 2
+    assert set(pairs.values()) == {2 if double else 1}
+    for week in range(weeks):
+        seen = [p for w, a, b in table if w == week for p in (a, b) if p is not None]
+        assert sorted(seen) == list(range(n))
+
+
+def test_anneal_keeps_a_valid_round_robin_and_beats_shuffle():
+    rng = random.Random(7)
+    for n, double in [(7, True), (8, False), (9, False), (10, True)]:
+        weeks = (n + n % 2 - 1) * (2 if double else 1)
+        problem = ScheduleProblem(
+            ratings=[rng.randint(300, 900) for _ in range(n)],
+            double=double,
+            unavailable=[
+                sum(1 << w for w in range(weeks) if rng.random() < 0.15) for _ in range(n)
+            ],
+            home_balance=[rng.randint(-3, 3) for _ in range(n)],
+            last_opponent=[i ^ 1 if i ^ 1 < n else None for i in range(n)],
+        )
+        shuffled, shuffle_cost = optimize_schedule(problem, engine='shuffle', seed=1)
+        annealed, anneal_cost = optimize_schedule(problem, engine='anneal', seconds=0.2, seed=1)
+        _assert_round_robin(shuffled, n, double)
+        _assert_round_robin(annealed, n, double)
+        assert anneal_cost['total'] <= shuffle_cost['total']
+        assert anneal_cost['total'] == sum(v for k, v in anneal_cost.items() if k != 'total')
+
+
+def test_blocked_players_meet_each_other():
+    # Players 0 and 1 are both out in week 0; in a 4-player league everyone plays
+    # every week, so the best schedule pairs them so only one match is affected
+    problem = ScheduleProblem(ratings=[600] * 4, unavailable=[1, 1, 0, 0])
+    table, cost = optimize_schedule(problem, seconds=0.2, seed=3)
+    assert cost['blackout'] == COST_WEIGHTS['blackout']
+    assert any(w == 0 and {a, b} == {0, 1} for w, a, b in table)
+    assert cost['repeat'] == 0
+
+
+def test_single_round_robin_balances_home_games():
+    problem = ScheduleProblem(
+        ratings=[600] * 8, double=False, home_balance=[2, 2, -2, -2, 0, 0, 1, -1]
+    )
+    table, cost = optimize_schedule(problem, seconds=0.2, seed=5)
+    assert cost['home_away'] == 0
+    home = Counter(a for _, a, b in table if b is not None)
+    assert home[0] < home[2]
+
+
+def test_move_deltas_match_a_full_recount():
+    rng = random.Random(11)
+    for n, double in [(5, True), (6, False), (9, True)]:
+        weeks = (n + n % 2 - 1) * (2 if double else 1)
+        search = _Search(
+            ScheduleProblem(
+                ratings=[rng.randint(300, 900) for _ in range(n)],
+                double=double,
+                unavailable=[
+                    sum(1 << w for w in range(weeks) if rng.random() < 0.3) for _ in range(n)
+                ],
+                home_balance=[rng.randint(-2, 2) for _ in range(n)],
+                last_opponent=[(i + 1) % n for i in range(n)],
+            ),
+            COST_WEIGHTS,
+        )
+        cost = search.breakdown()['total']
+        for _ in range(500):
+            undo, delta = search.try_move(rng)
+            if rng.random() < 0.5:
+                undo()
+            else:
+                cost += delta
+            assert abs(search.breakdown()['total'] - cost) < 1e-6
+
+
+def test_large_division_stays_within_budget():
+    # Pairs of players share a blacked-out week; at best each pair meets that week
+    problem = ScheduleProblem(
+        ratings=[400 + 7 * i for i in range(64)], unavailable=[1 << (i // 2) for i in range(64)]
+    )
+    start = time.perf_counter()
+    table, cost = optimize_schedule(problem, seconds=0.3, seed=2)
+    assert time.perf_counter() - start < 1.0
+    assert len(table) == 64 * 63
+    _, shuffled = optimize_schedule(problem, engine='shuffle', seed=2)
+    assert cost['blackout'] < shuffled['blackout']
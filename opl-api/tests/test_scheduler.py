@@ -0,0 +1,288 @@
+import asyncio
+from datetime import datetime, time, timedelta
+
+from prometheus_client import REGISTRY
+from sqlalchemy import event
+from sqlmodel import select
+
+from models import (
+    EmailOutbox,
+    JobRun,
+    Match,
+    MatchScoreSubmission,
+    Message,
+    MessageRecipient,
+    SchedulerLock,
+)
+from models import Session as OPLSession
+from services import scheduler
+from services.job_lock import acquire_lease, leased, renew_lease
+
+
+def test_send_match_reminders_queues_one_batch(
+    session, sample_division, sample_players, monkeypatch
+):
+    alice, bob, charlie, diana = sample_players
+    for p in (alice, bob, charlie):
+        p.match_reminders = True
+    opl_session = OPLSession(name='Spring', match_time='19:30')
+    session.add_all([alice, bob, charlie, opl_session])
+    session.commit()
+
+    tonight = datetime.combine(datetime.now().date(), time(19, 30))
+
+    def match(p1, p2, **kwargs):
+        m = Match(
+            session_id=opl_session.session_id,
+            division_id=sample_division.division_id,
+            player1_id=p1.player_id,
+            player2_id=p2.player_id if p2 else None,
+            player1_rating=p1.rating,
+            player2_rating=p2.rating if p2 else None,
+            scheduled_date=kwargs.pop('scheduled_date', tonight),
+            completed=False,
+            **kwargs,
+        )
+        session.add(m)
+        return m
+
+    due = match(alice, bob, player1_weight=7, player2_weight=5)
+    one_sided = match(charlie, diana)
+    bye = match(diana, None, is_bye=True)
+    deleted = match(alice, charlie, deleted=True)
+    tomorrow = match(bob, charlie, scheduled_date=tonight + timedelta(days=1))
+    session.commit()
+
+    drained = []
+
+    async def fake_drain(**kwargs):
+        drained.append(True)
+
+    monkeypatch.setattr(scheduler, 'engine', session.get_bind())
+    monkeypatch.setattr(scheduler, 'drain_outbox', fake_drain)
+    assert asyncio.run(scheduler.send_match_reminders()) == 3
+
+    session.expire_all()
+    queued = {row.to_address: row.html for row in session.exec(select(EmailOutbox)).all()}
+    assert sorted(queued) == sorted([alice.email, bob.email, charlie.email])
+    assert 'vs. Bob Jones (600) | <strong>7</strong>' in queued[alice.email]
+    assert 'at 19:30' in queued[alice.email]
+    # Sending is left to the leased outbox job
+    assert drained == []
+
+    flagged = {m.match_id: m.reminder_sent for m in session.exec(select(Match)).all()}
+    assert flagged[due.match_id] and flagged[one_sided.match_id]
+    assert not flagged[bye.match_id]
+    assert not flagged[deleted.match_id]
+    assert not flagged[tomorrow.match_id]
+
+    # Already-flagged matches are not reminded twice
+    asyncio.run(scheduler.send_match_reminders())
+    assert len(session.exec(select(EmailOutbox)).all()) == 3
+
+
+def test_job_lease_allows_one_holder_until_expiry(session):
+    assert acquire_lease(session, 'match_reminders', 60, holder='machine-a:1')
+    assert not acquire_lease(session, 'match_reminders', 60, holder='machine-b:1')
+    # Not re-entrant either: the same machine's next tick waits for expiry too
+    assert not acquire_lease(session, 'match_reminders', 60, holder='machine-a:1')
+    assert acquire_lease(session, 'email_outbox', 60, holder='machine-b:1')
+
+    lock = session.get(SchedulerLock, 'match_reminders')
+    lock.locked_until = datetime.utcnow() - timedelta(seconds=1)
+    session.add(lock)
+    session.commit()
+    assert acquire_lease(session, 'match_reminders', 60, holder='machine-b:1')
+    assert session.get(SchedulerLock, 'match_reminders').holder == 'machine-b:1'
+
+
+def test_leased_job_runs_once_and_records_outcome(client, session, monkeypatch):
+    monkeypatch.setattr('services.job_lock.engine', session.get_bind())
+    calls = []
+
+    async def job():
+        calls.append(True)
+        if len(calls) > 1:
+            raise RuntimeError('smtp down')
+
+    run = leased('nightly', lease_seconds=60)(job)
+    asyncio.run(run())
+    asyncio.run(run())  # same tick on another worker: lease still held
+    assert calls == [True]
+
+    session.execute(SchedulerLock.__table__.update().values(locked_until=datetime.utcnow()))
+    session.commit()
+    asyncio.run(run())
+
+    runs = session.exec(select(JobRun).order_by(JobRun.run_id)).all()
+    assert [(r.job_id, r.status) for r in runs] == [('nightly', 'ok'), ('nightly', 'error')]
+    assert runs[1].error == 'RuntimeError: smtp down'
+
+    stats = client.get('/admin/jobs/').json()
+    assert [(j['job_id'], j['last_status']) for j in stats] == [('nightly', 'error')]
+    for status in ('ok', 'error'):
+        assert (
+            REGISTRY.get_sample_value('opl_job_runs_total', {'job': 'nightly', 'status': status})
+            == 1
+        )
+    assert REGISTRY.get_sample_value('opl_job_seconds_count', {'job': 'nightly'}) == 2
+
+
+def test_idle_polling_runs_are_not_recorded(session, monkeypatch):
+    monkeypatch.setattr('services.job_lock.engine', session.get_bind())
+
+    async def idle():
+        return 0
+
+    asyncio.run(leased('email_outbox', lease_seconds=0, record_idle=False)(idle)())
+    assert session.exec(select(JobRun)).all() == []
+
+
+def test_escalation_uses_a_fixed_number_of_statements(
+    session, test_user, sample_division, sample_players, monkeypatch
+):
+    alice, bob, charlie, diana = sample_players
+    test_user.player_id = diana.player_id
+    session.add(test_user)
+    session.commit()
+    monkeypatch.setattr(scheduler, 'engine', session.get_bind())
+    stale_since = datetime.utcnow() - timedelta(hours=30)
+
+    def dispute(p1, p2, since=stale_since, completed=False):
+        m = Match(
+            division_id=sample_division.division_id,
+            player1_id=p1.player_id,
+            player2_id=p2.player_id,
+            player1_rating=p1.rating,
+            player2_rating=p2.rating,
+            scheduled_date=stale_since,
+            completed=completed,
+        )
+        session.add(m)
+        session.commit()
+        for p in (p1, p2):
+            session.add(
+                MatchScoreSubmission(
+                    match_id=m.match_id,
+                    submitted_by_player_id=p.player_id,
+                    games_json='[]',
+                    needs_review_since=since,
+                    status='needs_review',
+                )
+            )
+        session.commit()
+        return m
+
+    statements = []
+
+    def count(conn, clauseelement, *args):
+        statements.append(clauseelement)
+
+    def escalate():
+        statements.clear()
+        event.listen(session.get_bind(), 'before_execute', count)
+        try:
+            asyncio.run(scheduler.escalate_score_mismatches())
+        finally:
+            event.remove(session.get_bind(), 'before_execute', count)
+        return len(statements)
+
+    first = [dispute(alice, bob), dispute(bob, charlie)]
+    recent = dispute(alice, charlie, since=datetime.utcnow())
+    finished = dispute(charlie, diana, completed=True)
+    small = escalate()
+
+    session.expire_all()
+    for m in first:
+        assert session.get(Match, m.match_id).score_status == 'disputed'
+        assert session.get(Match, m.match_id).score_version == 1
+    for m in (recent, finished):
+        assert session.get(Match, m.match_id).score_status != 'disputed'
+    statuses = session.exec(
+        select(MatchScoreSubmission.match_id, MatchScoreSubmission.status)
+    ).all()
+    assert {mid for mid, status in statuses if status == 'disputed'} == {m.match_id for m in first}
+
+    notices = session.exec(select(Message).order_by(Message.message_id)).all()
+    assert [n.subject.rsplit('#', 1)[1] for n in notices] == [str(m.match_id) for m in first]
+    recipients = session.exec(
+        select(MessageRecipient.player_id).where(
+            MessageRecipient.message_id == notices[0].message_id
+        )
+    ).all()
+    assert sorted(recipients) == sorted([alice.player_id, bob.player_id, diana.player_id])
+
+    # Already-disputed matches are not picked up again; more disputes, same statement count
+    assert escalate() < small
+    for _ in range(3):
+        dispute(alice, bob)
+    assert escalate() == small
+    assert len(session.exec(select(Message)).all()) == 5
+
+
+def test_outbox_drain_renews_its_lease_between_batches(session, monkeypatch):
+    from services import email_outbox
+
+    monkeypatch.setattr('services.job_lock.engine', session.get_bind())
+    monkeypatch.setattr(scheduler, 'engine', session.get_bind())
+    monkeypatch.setattr(email_outbox, 'engine', session.get_bind())
+    monkeypatch.setattr(email_outbox, 'EMAIL_BATCH_SIZE', 1)
+    monkeypatch.setattr(email_outbox, 'EMAIL_RATE_PER_SECOND', 0)
+    for i in range(3):
+        session.add(EmailOutbox(to_address=f'p{i}@example.com', subject='Hi', html='<p>Hi</p>'))
+    session.commit()
+
+    batches = []
+
+    async def fake_worker(queue, limiter, results):
+        email = queue.get_nowait()
+        batches.append(email.email_id)
+        results[email.email_id] = None
+        # Another instance takes over the expired lease while the second batch is out
+        if len(batches) == 2:
+            session.execute(SchedulerLock.__table__.update().values(holder='machine-b:1'))
+            session.commit()
+
+    monkeypatch.setattr(email_outbox, '_send_worker', fake_worker)
+    asyncio.run(scheduler.drain_outbox_job())
+
+    # The first renewal extends our lease; the second finds it gone and stops the drain
+    assert len(batches) == 2
+    session.expire_all()
+    assert [r.status for r in session.exec(select(EmailOutbox).order_by(EmailOutbox.email_id))] == [
+        'sent',
+        'sent',
+        'pending',
+    ]
+
+
+def test_outbox_drains_on_every_tick(session, monkeypatch):
+    monkeypatch.setattr('services.job_lock.engine', session.get_bind())
+    drains = []
+
+    async def fake_drain(renew_lease):
+        drains.append(True)
+        return {'sent': 1, 'retrying': 0, 'failed': 0}
+
+    monkeypatch.setattr(scheduler, 'drain_outbox', fake_drain)
+    asyncio.run(scheduler.drain_outbox_job())
+    asyncio.run(scheduler.drain_outbox_job())
+    assert drains == [True, True]
+
+    # Released, not handed over: another instance can take the next tick
+    assert acquire_lease(session, 'email_outbox', 60, holder='machine-b:1')
+    asyncio.run(scheduler.drain_outbox_job())
+    assert len(drains) == 2
+
+
+def test_renew_lease_only_extends_the_holders_live_lease(session):
+    assert acquire_lease(session, 'email_outbox', 60, holder='machine-a:1')
+    before = session.get(SchedulerLock, 'email_outbox').locked_until
+    assert renew_lease(session, 'email_outbox', 600, holder='machine-a:1')
+    session.expire_all()
+    assert session.get(SchedulerLock, 'email_outbox').locked_until > before
+    assert not renew_lease(session, 'email_outbox', 600, holder='machine-b:1')
+
+    session.execute(SchedulerLock.__table__.update().values(locked_until=datetime.utcnow()))
+    session.commit()
+    assert not renew_lease(session, 'email_outbox', 600, holder='machine-a:1')
@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import func, select
+
+from models import Match, Standing
+from models import Session as OPLSession
+from utils import WeightTable, get_match_weight
+
+FLAT = [[100, 8, 8], [None, 9, 7]]
+
+
+def _session_update(opl_session, **changes):
+    return {'name': opl_session.name, 'match_time': None, 'dues': 10, 'active': True, **changes}
+
+
+def test_session_weight_brackets_drive_match_weights(
+    client, session, sample_division, sample_players
+):
+    alice, bob, _, _ = sample_players
+    response = client.post('/sessions/', json={'name': 'Handicap', 'weight_brackets': FLAT})
+    assert response.status_code == 200
+    assert response.json()['weight_brackets'] == FLAT
+    assert (
+        client.post(
+            '/sessions/', json={'name': 'Bad', 'weight_brackets': [[100, 8, 8]]}
+        ).status_code
+        == 422
+    )
+    opl_session = session.get(OPLSession, response.json()['session_id'])
+
+    scheduled = client.post(
+        '/matches/schedule-round-robin/',
+        json={
+            'session_id': opl_session.session_id,
+            'start_date': '2025-01-06T00:00:00',
+            'optimizer': 'shuffle',
+        },
+    ).json()
+    table = WeightTable.from_json(FLAT)
+    ratings = {p.player_id: p.rating for p in sample_players}
+    for m in scheduled:
+        assert (m['player1_weight'], m['player2_weight']) == get_match_weight(
+            ratings[m['player1_id']], ratings[m['player2_id']], table
+        )
+
+    # Completing a match propagates new ratings with the session's table
+    first = next(
+        m
+        for m in scheduled
+        if {m['player1_id'], m['player2_id']} == {alice.player_id, bob.player_id}
+    )
+    games = [{'winner_id': bob.player_id, 'loser_id': alice.player_id, 'balls_remaining': 8}] * 3
+    assert client.put(f'/matches/{first["match_id"]}/', json=games).status_code == 200
+    session.expire_all()
+    for m in session.exec(select(Match).where(Match.completed == False)).all():  # noqa: E712
+        assert (m.player1_weight, m.player2_weight) == get_match_weight(
+            m.player1_rating, m.player2_rating, table
+        )
+
+    # Resetting to the default table rewrites upcoming weights; omitting the field keeps it
+    assert (
+        client.put(
+            f'/sessions/{opl_session.session_id}/',
+            json=_session_update(opl_session, weight_brackets=None),
+        ).status_code
+        == 200
+    )
+    session.expire_all()
+    for m in session.exec(select(Match).where(Match.completed == False)).all():  # noqa: E712
+        assert (m.player1_weight, m.player2_weight) == get_match_weight(
+            m.player1_rating, m.player2_rating
+        )
+    completed = session.get(Match, first['match_id'])
+    assert (completed.player1_weight, completed.player2_weight) == get_match_weight(
+        completed.player1_rating,
+        completed.player2_rating,
+        table,
+    )
+
+    assert (
+        client.put(
+            f'/sessions/{opl_session.session_id}/',
+            json=_session_update(opl_session, weight_brackets=FLAT),
+        ).status_code
+        == 200
+    )
+    response = client.put(
+        f'/sessions/{opl_session.session_id}/', json=_session_update(opl_session, name='Renamed')
+    )
+    assert response.json()['weight_brackets'] == FLAT
+
+
+def _season(session, division, players, session_id=None, weeks=4):
+    """One match per week, Tuesdays at 19:00, the first one completed."""
+    alice, bob = players[:2]
+    matches = [
+        Match(
+            session_id=session_id,
+            division_id=division.division_id,
+            player1_id=alice.player_id,
+            player2_id=bob.player_id,
+            player1_rating=alice.rating,
+            player2_rating=bob.rating,
+            scheduled_date=datetime(2025, 1, 7, 19, 0) + timedelta(weeks=w),
+            completed=w == 0,
+        )
+        for w in range(weeks)
+    ]
+    session.add_all(matches)
+    session.commit()
+    return [m.match_id for m in matches]
+
+
+def test_session_cascades_are_single_updates(client, session, sample_division, sample_players):
+    opl_session = OPLSession(name='Spring')
+    session.add(opl_session)
+    session.commit()
+    ids = _season(session, sample_division, sample_players, opl_session.session_id)
+    session.add(
+        Standing(
+            session_id=opl_session.session_id,
+            division_id=sample_division.division_id,
+            player_id=sample_players[0].player_id,
+        )
+    )
+    session.commit()
+
+    response = client.put(
+        f'/sessions/{opl_session.session_id}/',
+        json=_session_update(
+            opl_session,
+            match_time='20:15',
+            update_existing_matches=True,
+        ),
+    )
+    assert response.headers['X-Matches-Updated'] == '3'
+    session.expire_all()
+    dates = [session.get(Match, mid).scheduled_date for mid in ids]
+    assert dates == [datetime(2025, 1, 7, 19, 0)] + [
+        datetime(2025, 1, 14 + 7 * w, 20, 15) for w in range(3)
+    ]
+    # Still comparable with bound datetimes after the SQL rewrite
+    assert (
+        session.exec(
+            select(func.count())
+            .select_from(Match)
+            .where(Match.scheduled_date == datetime(2025, 1, 14, 20, 15))
+        ).one()
+        == 1
+    )
+
+    assert client.delete(f'/sessions/{opl_session.session_id}/').json() == {
+        'ok': True,
+        'matches_deleted': 4,
+        'standings_deleted': 1,
+    }
+    session.expire_all()
+    assert all(session.get(Match, mid).deleted for mid in ids)
@@ -1,6 +1,18 @@
 from datetime import datetime
+from math import floor
 
-from utils import calculate_rating_change, schedule_round_robin
+import pytest
+from sqlalchemy import column, create_engine, literal, select
+
+from utils import (
+    KFactorTable,
+    WeightTable,
+    calculate_rating_change,
+    get_match_weight,
+    get_match_weights,
+    match_weight_sql,
+    schedule_round_robin,
+)
 
 
 class TestCalculateRatingChange:
@@ -98,3 +110,80 @@ class TestScheduleRoundRobin:
         players = self._make_players(4)
         matches = schedule_round_robin(players, datetime(2025, 1, 1), 1)
         assert all(not m.completed for m in matches)
+
+
+class TestMatchWeightSql:
+    def test_matches_python_weights(self):
+        engine = create_engine('sqlite://')
+        pairs = [(600, 600 + d) for d in range(0, 460, 5)] + [
+            (600 + d, 600) for d in range(0, 460, 5)
+        ]
+        r1, r2 = column('r1'), column('r2')
+        w1, w2 = match_weight_sql(r1, r2)
+        with engine.connect() as conn:
+            for a, b in pairs:
+                rows = select(literal(a).label('r1'), literal(b).label('r2')).subquery()
+                got = conn.execute(select(w1, w2).select_from(rows)).one()
+                assert tuple(got) == get_match_weight(a, b), (a, b)
+
+
+class TestKFactorTable:
+    @pytest.mark.parametrize('base, decay', [(23, 0.943), (30, 0.9), (16, 1.0), (0, 0.5)])
+    def test_matches_formula(self, base, decay):
+        table = KFactorTable(base, decay)
+        expected = [floor(base * decay**n) for n in range(-3, 200)]
+        assert [table[n] for n in range(-3, 200)] == expected
+        assert table.values(200) == expected[3:]
+
+    def test_default_table_drives_rating_change(self):
+        for n in range(120):
+            assert calculate_rating_change(n, n + 1, 2) == (
+                floor(23 * 0.943**n) + 2,
+                -(floor(23 * 0.943 ** (n + 1)) + 2),
+            )
+        assert calculate_rating_change(0, 0, 0, KFactorTable(base=40)) == (40, -40)
+
+    @pytest.mark.parametrize('base, decay', [(-1, 0.9), (23, 0), (23, 1.01)])
+    def test_rejects_bad_parameters(self, base, decay):
+        with pytest.raises(ValueError):
+            KFactorTable(base, decay)
+
+
+class TestWeightTable:
+    def test_bracket_edges(self):
+        assert get_match_weight(600, 650) == (8, 8)
+        assert get_match_weight(600, 651) == (7, 8)
+        assert get_match_weight(1001, 600) == (12, 4)
+        assert get_match_weight(600, 1000) == (4, 11)
+
+    def test_batch_matches_single_lookups(self):
+        pairs = [(a, b) for a in range(300, 1000, 13) for b in range(300, 1000, 17)]
+        assert get_match_weights(pairs) == [get_match_weight(a, b) for a, b in pairs]
+
+    def test_custom_table_round_trips_and_matches_sql(self):
+        table = WeightTable.from_json([[100, 8, 8], [200, 9, 7], [None, 10, 6]])
+        assert table.to_json() == [[100, 8, 8], [200, 9, 7], [None, 10, 6]]
+        assert get_match_weight(500, 701, table) == (6, 10)
+        r1, r2 = column('r1'), column('r2')
+        w1, w2 = match_weight_sql(r1, r2, table)
+        with create_engine('sqlite://').connect() as conn:
+            for a, b in [(500, 600), (500, 650), (700, 500), (500, 701)]:
+                rows = select(literal(a).label('r1'), literal(b).label('r2')).subquery()
+                assert tuple(
+                    conn.execute(select(w1, w2).select_from(rows)).one()
+                ) == get_match_weight(a, b, table)
+
+    @pytest.mark.parametrize(
+        'value',
+        [
+            [],
+            [[100, 8, 8]],
+            [[None, 8, 8], [None, 9, 7]],
+            [[200, 8, 8], [100, 9, 7], [None, 10, 6]],
+            [[100, 7, 8], [None, 10, 6]],
+            [['x']],
+        ],
+    )
+    def test_rejects_malformed_tables(self, value):
+        with pytest.raises(ValueError):
+            WeightTable.from_json(value)
@@ -1,117 +1,255 @@
 import random
+from bisect import bisect_left
+from collections.abc import Iterable
 from datetime import datetime, timedelta
+from itertools import pairwise
 from math import floor
 
+from sqlalchemy import case, func
+
 from models import Match, Player
 
+# (max rating difference, higher-rated weight, lower-rated weight); anything wider
+# than the last bracket plays 12/4. The league default; a session can override it
+# through its weight_brackets column.
+WEIGHT_BRACKETS: list[tuple[int, int, int]] = [
+    (50, 8, 8),
+    (100, 8, 7),
+    (150, 9, 7),
+    (200, 9, 6),
+    (250, 10, 6),
+    (300, 10, 5),
+    (350, 11, 5),
+    (400, 11, 4),
+]
+WEIGHT_OVERFLOW: tuple[int, int] = (12, 4)
+
+
+class WeightTable:
+    """Match weight brackets, precomputed for bisect lookups.
+
+    Serialized (Session.weight_brackets) as [[max_diff, high, low], ...] with the
+    overflow weights as a final [null, high, low] row.
+    """
+
+    def __init__(self, brackets: list[tuple[int, int, int]] = WEIGHT_BRACKETS, overflow: tuple[int, int] = WEIGHT_OVERFLOW):
+        limits = [limit for limit, _, _ in brackets]
+        if any(lo >= hi for lo, hi in pairwise(limits)) or (limits and limits[0] < 0):
+            raise ValueError("Bracket limits must be non-negative and strictly increasing")
+        weights = [(high, low) for _, high, low in brackets] + [tuple(overflow)]
+        if any(low < 1 or high < low for high, low in weights):
+            raise ValueError("Weights must be positive with the higher-rated weight first")
+        self.brackets = [tuple(b) for b in brackets]
+        self.overflow = tuple(overflow)
+        self._limits = limits
+        self._weights = weights
+
+    @classmethod
+    def from_json(cls, value: list | None) -> "WeightTable":
+        """Parse a stored bracket list; None means the league default."""
+        if value is None:
+            return DEFAULT_WEIGHTS
+        try:
+            *brackets, (last_limit, *overflow) = [(row[0], int(row[1]), int(row[2])) for row in value]
+        except (TypeError, ValueError, IndexError) as exc:
+            raise ValueError("Expected [[max_diff, high, low], ..., [null, high, low]]") from exc
+        if last_limit is not None or any(limit is None for limit, _, _ in brackets):
+            raise ValueError("Only the final overflow row has a null max_diff")
+        return cls([(int(limit), high, low) for limit, high, low in brackets], tuple(overflow))
+
+    def to_json(self) -> list[list[int | None]]:
+        return [list(b) for b in self.brackets] + [[None, *self.overflow]]
+
+    def weights_many(self, pairs: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+        """Weights for many (rating1, rating2) pairs in one pass."""
+        limits, table = self._limits, self._weights
+        result = []
+        for r1, r2 in pairs:
+            high, low = table[bisect_left(limits, r1 - r2 if r1 >= r2 else r2 - r1)]
+            result.append((high, low) if r1 >= r2 else (low, high))
+        return result
+
+    def sql(self, rating1, rating2) -> tuple:
+        """(player1_weight, player2_weight) CASE expressions for two rating columns."""
+        diff = func.abs(rating1 - rating2)
+        high = case(*((diff <= limit, h) for limit, h, _ in self.brackets), else_=self.overflow[0])
+        low = case(*((diff <= limit, lo) for limit, _, lo in self.brackets), else_=self.overflow[1])
+        return (
+            case((rating1 >= rating2, high), else_=low),
+            case((rating1 >= rating2, low), else_=high),
+        )
+
+
+DEFAULT_WEIGHTS = WeightTable()
+
 
-def get_match_weight(rating1: int, rating2: int) -> tuple[int, int]:
+def match_weight_sql(rating1, rating2, weights: WeightTable = DEFAULT_WEIGHTS) -> tuple:
+    """Build SQL expressions equivalent to get_match_weight for two rating columns.
+
+    Returns (player1_weight, player2_weight) CASE expressions for use in UPDATE ... SET.
+    """
+    return weights.sql(rating1, rating2)
+
+
+def get_match_weight(rating1: int, rating2: int, weights: WeightTable = DEFAULT_WEIGHTS) -> tuple[int, int]:
     """Calculate match weights (race lengths) based on rating difference.
 
     The higher-rated player gets the higher weight (more balls to pocket).
     Returns (player1_weight, player2_weight).
     """
-    diff = abs(rating1 - rating2)
-
-    if diff <= 50:
-        high, low = 8, 8
-    elif diff <= 100:
-        high, low = 8, 7
-    elif diff <= 150:
-        high, low = 9, 7
-    elif diff <= 200:
-        high, low = 9, 6
-    elif diff <= 250:
-        high, low = 10, 6
-    elif diff <= 300:
-        high, low = 10, 5
-    elif diff <= 350:
-        high, low = 11, 5
-    elif diff <= 400:
-        high, low = 11, 4
-    else:
-        high, low = 12, 4
-
-    if rating1 >= rating2:
-        return (high, low)
-    return (low, high)
-
-
-def schedule_round_robin(players: list[Player], start_date: datetime, session_id: int, division_id: int, *, double: bool = True, is_weekly: bool = False, race: int = 3) -> list[Match]:
+    high, low = weights._weights[bisect_left(weights._limits, abs(rating1 - rating2))]
+    return (high, low) if rating1 >= rating2 else (low, high)
+
+
+def get_match_weights(pairs: Iterable[tuple[int, int]], weights: WeightTable = DEFAULT_WEIGHTS) -> list[tuple[int, int]]:
+    """get_match_weight for many (rating1, rating2) pairs at once."""
+    return weights.weights_many(pairs)
+
+
+def round_robin_pairings(n: int, *, double: bool = True) -> list[tuple[int, int, int | None]]:
+    """Index table for an n-player round robin using the circle method.
+
+    Returns (round, home, away) with home/away as indexes into the player list and
+    away None for a bye. Rounds are numbered across legs; the second leg swaps
+    home and away. Pure index arithmetic, so no per-round list rebuilding.
+    """
+    if n < 2:
+        return []
+    slots = n + n % 2  # pad odd fields with a bye slot
+    num_rounds = slots - 1  # rounds per leg
+    bye = n if n % 2 else None
+
+    def seat(i: int) -> int | None:
+        return None if i == bye else i
+
+    # Slot num_rounds is fixed; the rest rotate and mirror around it
+    leg = [
+        (r, seat(num_rounds), r) if i == 0 else (r, (r + i) % num_rounds, (r - i) % num_rounds)
+        for r in range(num_rounds)
+        for i in range(slots // 2)
+    ]
+    # Byes always list the sitting player first
+    leg = [(r, a, b) if a is not None else (r, b, None) for r, a, b in leg]
+    if not double:
+        return leg
+    return leg + [(r + num_rounds, b, a) if b is not None else (r + num_rounds, a, None) for r, a, b in leg]
+
+
+def round_robin_rows(players: list[Player], start_date: datetime, session_id: int, division_id: int, *, double: bool = True, is_weekly: bool = False, race: int = 3, table: list[tuple[int, int, int | None]] | None = None, weights: WeightTable = DEFAULT_WEIGHTS) -> list[dict]:
+    """Column dicts for a round robin, ready for a bulk ``insert(Match)``.
+
+    *table* is a precomputed (week, home, away) schedule indexing into *players*,
+    as returned by services.schedule_optimizer; without one the players are
+    shuffled into a plain circle-method schedule. Every row carries the same keys
+    so the whole schedule goes out as one executemany. Weeks are one week apart.
+    Match weights come from *weights* (the session's table), in one batch.
+    """
+    if table is None:
+        players = random.sample(players, len(players))
+        table = round_robin_pairings(len(players), double=double)
+    if not table:
+        return []
+
+    num_rounds = max(week for week, _, _ in table) + 1
+    dates = [start_date + timedelta(weeks=r) for r in range(num_rounds)]
+    if is_weekly:
+        # Snap to Monday of the week
+        dates = [d - timedelta(days=d.weekday()) for d in dates]
+
+    ids = [p.player_id for p in players]
+    ratings = [p.rating for p in players]
+    pair_weights = iter(weights.weights_many(
+        (ratings[home], ratings[away]) for _, home, away in table if away is not None
+    ))
+    rows = []
+    for r, home, away in table:
+        if away is None:
+            p2_id = p2_rating = w2 = None
+            w1 = 0
+        else:
+            p2_id, p2_rating = ids[away], ratings[away]
+            w1, w2 = next(pair_weights)
+        rows.append({
+            "session_id": session_id,
+            "division_id": division_id,
+            "player1_id": ids[home],
+            "player2_id": p2_id,
+            "player1_rating": ratings[home],
+            "player2_rating": p2_rating,
+            "player1_weight": w1,
+            "player2_weight": w2,
+            "scheduled_date": dates[r],
+            "completed": False,
+            "is_bye": away is None,
+            "is_weekly": is_weekly,
+            "race": race,
+        })
+    return rows
+
+
+def schedule_round_robin(players: list[Player], start_date: datetime, session_id: int, division_id: int, *, double: bool = True, is_weekly: bool = False, race: int = 3, weights: WeightTable = DEFAULT_WEIGHTS) -> list[Match]:
     """Generate a round robin schedule using the circle method.
 
     When *double* is True (default), each pairing plays twice (home-and-away).
     When False, each pairing plays only once (single round robin).
     Rounds are one week apart.
     """
-    n = len(players)
-    if n < 2:
-        return []
+    return [
+        Match(**row)
+        for row in round_robin_rows(players, start_date, session_id, division_id, double=double, is_weekly=is_weekly, race=race, weights=weights)
+    ]
+
+
+# A game moves each player's rating by floor(K_BASE * K_DECAY ** games_played),
+# plus the balls remaining, so new players' ratings settle quickly.
+RATING_K_BASE = 23
+RATING_K_DECAY = 0.943
+# Entries precomputed per table; with the default decay K reaches 0 at 54 games
+_K_TABLE_SIZE = 64
+
+
+class KFactorTable:
+    """Base rating change per game, indexed by the player's games_played.
+
+    Entries past the precomputed range are computed on demand, or are 0 once the
+    table has decayed to 0 (K never increases again).
+    """
+
+    def __init__(self, base: float = RATING_K_BASE, decay: float = RATING_K_DECAY):
+        if base < 0 or not 0 < decay <= 1:
+            raise ValueError("K base must be non-negative and decay in (0, 1]")
+        self.base = base
+        self.decay = decay
+        self._k = []
+        for n in range(_K_TABLE_SIZE):
+            self._k.append(floor(base * decay ** n))
+            if self._k[-1] == 0:
+                break
+
+    def _compute(self, games_played: int) -> int:
+        if games_played >= 0 and self._k[-1] == 0:
+            return 0
+        return floor(self.base * self.decay ** games_played)
+
+    def __getitem__(self, games_played: int) -> int:
+        if 0 <= games_played < len(self._k):
+            return self._k[games_played]
+        return self._compute(games_played)
+
+    def values(self, size: int) -> list[int]:
+        """The first *size* entries as a plain list, for tight loops."""
+        values = self._k[:size]
+        if len(values) < size and values[-1] == 0:
+            values.extend([0] * (size - len(values)))
+        else:
+            values.extend(self._compute(n) for n in range(len(values), size))
+        return values
+
+
+DEFAULT_K_FACTORS = KFactorTable()
+
 
-    # Shuffle players before scheduling to randomize matchups
-    shuffled = list(players)
-    random.shuffle(shuffled)
-
-    # Circle method requires an even number; pad with None (bye) if odd
-    padded = shuffled + ([None] if n % 2 != 0 else [])
-    num_players = len(padded)
-    num_rounds = num_players - 1  # rounds per leg
-
-    def get_round_pairings(round_num: int) -> list[tuple]:
-        # Fixed player (last) vs the rotating slot
-        pairings = [(padded[num_rounds], padded[round_num])]
-        # Remaining pairs mirror around the fixed slot
-        for i in range(1, num_players // 2):
-            pairings.append((
-                padded[(round_num + i) % num_rounds],
-                padded[(round_num - i) % num_rounds],
-            ))
-        return pairings
-
-    matches = []
-    num_legs = 2 if double else 1
-    for leg in range(num_legs):
-        for round_num in range(num_rounds):
-            round_date = start_date + timedelta(weeks=round_num + leg * num_rounds)
-            if is_weekly:
-                # Snap to Monday of the week
-                round_date = round_date - timedelta(days=round_date.weekday())
-            for p1, p2 in get_round_pairings(round_num):
-                if p1 is None or p2 is None:
-                    bye_player = p2 if p1 is None else p1
-                    matches.append(Match(
-                        session_id=session_id,
-                        division_id=division_id,
-                        player1_id=bye_player.player_id,
-                        player1_rating=bye_player.rating,
-                        scheduled_date=round_date,
-                        completed=False,
-                        is_bye=True,
-                        is_weekly=is_weekly,
-                        race=race,
-                    ))
-                    continue
-                # Swap home/away between legs
-                home, away = (p1, p2) if leg == 0 else (p2, p1)
-                w1, w2 = get_match_weight(home.rating, away.rating)
-                matches.append(Match(
-                    session_id=session_id,
-                    division_id=division_id,
-                    player1_id=home.player_id,
-                    player2_id=away.player_id,
-                    player1_rating=home.rating,
-                    player2_rating=away.rating,
-                    player1_weight=w1,
-                    player2_weight=w2,
-                    scheduled_date=round_date,
-                    completed=False,
-                    is_weekly=is_weekly,
-                    race=race,
-                ))
-
-    return matches
-
-def calculate_rating_change(winner_robustness: int, loser_robustness: int, balls_remaining: int) -> tuple[int, int]:
-    winner_change = floor(23 * (0.943 ** winner_robustness)) + balls_remaining
-    loser_change = -(floor(23 * (0.943 ** loser_robustness)) + balls_remaining)
+def calculate_rating_change(winner_robustness: int, loser_robustness: int, balls_remaining: int, k_factors: KFactorTable = DEFAULT_K_FACTORS) -> tuple[int, int]:
+    winner_change = k_factors[winner_robustness] + balls_remaining
+    loser_change = -(k_factors[loser_robustness] + balls_remaining)
     return (winner_change, loser_change)
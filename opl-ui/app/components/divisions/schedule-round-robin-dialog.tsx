@@ -43,14 +43,15 @@ export const ScheduleRoundRobinDialog: React.FC<ScheduleRoundRobinDialogProps> =
 
     const handleSubmit = async () => {
         try {
-            const scheduledMatches = await scheduleRoundRobin.mutateAsync({
+            const { matches, cost } = await scheduleRoundRobin.mutateAsync({
                 session_id: sessionId,
                 start_date: `${startDate}T00:00:00`,
                 double,
                 race,
             })
 
-            showSnackbar(`Successfully scheduled ${scheduledMatches.length} matches`, 'success')
+            const costNote = cost ? ` (schedule cost ${cost})` : ''
+            showSnackbar(`Successfully scheduled ${matches.length} matches${costNote}`, 'success')
             onClose()
         } catch (err) {
             showSnackbar(err instanceof Error ? err.message : 'Failed to schedule round robin', 'error')
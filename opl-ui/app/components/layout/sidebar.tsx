@@ -29,7 +29,7 @@ import {
 import { useLocation, useNavigate } from 'react-router'
 
 import { useAuth } from '~/lib/auth'
-import { useMessages } from '~/lib/react-query'
+import { useUnreadMessageCount } from '~/lib/react-query'
 
 export const DRAWER_WIDTH = 240
 
@@ -64,8 +64,8 @@ export const Sidebar: React.FC<SidebarProps> = ({ open, onClose }: SidebarProps)
     const theme = useTheme()
     const isMobile = useMediaQuery(theme.breakpoints.down('md'))
 
-    const { data: messages } = useMessages()
-    const hasUnread = messages?.some((m) => !m.is_read) ?? false
+    const { data: unreadCount } = useUnreadMessageCount()
+    const hasUnread = (unreadCount ?? 0) > 0
     const navItems = user?.is_admin ? adminNavItems : playerNavItems
 
     const isActive = (path: string) => {
@@ -7,6 +7,7 @@ import type {
     Game,
     GameInput,
     ScheduleInput,
+    ScheduleResult,
     Division,
     DivisionInput,
     DivisionUpdateInput,
@@ -16,7 +17,9 @@ import type {
     PlayerScore,
     User,
     Message,
+    MessageHeader,
     MessageInput,
+    Page,
 } from './types'
 
 const API_BASE = import.meta.env.VITE_API_BASE_URL ?? 'http://localhost:8000'
@@ -28,7 +31,7 @@ function getAuthHeaders(): Record<string, string> {
     return token ? { Authorization: `Bearer ${token}` } : {}
 }
 
-async function fetchJson<T>(url: string, options?: RequestInit): Promise<T> {
+async function fetchResponse(url: string, options?: RequestInit): Promise<Response> {
     const response = await fetch(url, {
         ...options,
         headers: {
@@ -53,9 +56,75 @@ async function fetchJson<T>(url: string, options?: RequestInit): Promise<T> {
         throw err
     }
 
+    return response
+}
+
+async function fetchJson<T>(url: string, options?: RequestInit): Promise<T> {
+    const response = await fetchResponse(url, options)
+
     return response.json()
 }
 
+// Keyset-paginated list endpoints return the cursor for the next page in a header
+async function fetchPage<T>(url: string, limit: number, after?: string | null): Promise<Page<T>> {
+    const pageParams = new URLSearchParams({ limit: limit.toString() })
+
+    if (after) {
+        pageParams.set('after', after)
+    }
+
+    const response = await fetchResponse(`${url}${url.includes('?') ? '&' : '?'}${pageParams.toString()}`)
+
+    return {
+        items: await response.json(),
+        nextCursor: response.headers.get('X-Next-Cursor'),
+    }
+}
+
+export interface MatchListParams {
+    start_date?: string
+    end_date?: string
+    player_id?: number
+    match_id?: number
+    session_id?: number
+    division_id?: number
+    completed?: boolean
+}
+
+function matchSearchParams(params: MatchListParams): URLSearchParams {
+    const searchParams = new URLSearchParams()
+
+    if (params.start_date) {
+        searchParams.set('start_date', params.start_date)
+    }
+
+    if (params.end_date) {
+        searchParams.set('end_date', params.end_date)
+    }
+
+    if (params.player_id) {
+        searchParams.set('player_id', params.player_id.toString())
+    }
+
+    if (params.match_id) {
+        searchParams.set('match_id', params.match_id.toString())
+    }
+
+    if (params.session_id) {
+        searchParams.set('session_id', params.session_id.toString())
+    }
+
+    if (params.division_id) {
+        searchParams.set('division_id', params.division_id.toString())
+    }
+
+    if (params.completed !== undefined) {
+        searchParams.set('completed', params.completed.toString())
+    }
+
+    return searchParams
+}
+
 export const api = {
     auth: {
         login: (credential: string): Promise<{ token: string; user: User }> =>
@@ -107,47 +176,11 @@ export const api = {
     },
 
     matches: {
-        list: (params: {
-            start_date?: string
-            end_date?: string
-            player_id?: number
-            match_id?: number
-            session_id?: number
-            division_id?: number
-            completed?: boolean
-        }): Promise<Match[]> => {
-            const searchParams = new URLSearchParams()
-
-            if (params.start_date) {
-                searchParams.set('start_date', params.start_date)
-            }
-
-            if (params.end_date) {
-                searchParams.set('end_date', params.end_date)
-            }
-
-            if (params.player_id) {
-                searchParams.set('player_id', params.player_id.toString())
-            }
-
-            if (params.match_id) {
-                searchParams.set('match_id', params.match_id.toString())
-            }
-
-            if (params.session_id) {
-                searchParams.set('session_id', params.session_id.toString())
-            }
-
-            if (params.division_id) {
-                searchParams.set('division_id', params.division_id.toString())
-            }
-
-            if (params.completed !== undefined) {
-                searchParams.set('completed', params.completed.toString())
-            }
+        list: (params: MatchListParams): Promise<Match[]> =>
+            fetchJson(`${API_BASE}/matches/?${matchSearchParams(params).toString()}`),
 
-            return fetchJson(`${API_BASE}/matches/?${searchParams.toString()}`)
-        },
+        listPage: (params: MatchListParams, limit: number, after?: string | null): Promise<Page<Match>> =>
+            fetchPage(`${API_BASE}/matches/?${matchSearchParams(params).toString()}`, limit, after),
 
         get: (id: number): Promise<Match[]> => fetchJson(`${API_BASE}/matches/?match_id=${id}`),
 
@@ -169,11 +202,19 @@ export const api = {
                 body: JSON.stringify(games),
             }),
 
-        scheduleRoundRobin: (data: ScheduleInput): Promise<Match[]> =>
-            fetchJson(`${API_BASE}/matches/schedule-round-robin/`, {
+        scheduleRoundRobin: async (data: ScheduleInput): Promise<ScheduleResult> => {
+            const response = await fetchResponse(`${API_BASE}/matches/schedule-round-robin/`, {
                 method: 'POST',
                 body: JSON.stringify(data),
-            }),
+            })
+            // "12.5; blackout=10; repeat=0; ..." - the total comes first
+            const cost = response.headers.get('X-Schedule-Cost')
+
+            return {
+                matches: await response.json(),
+                cost: cost === null ? null : parseFloat(cost),
+            }
+        },
 
         markIncompleted: (id: number): Promise<Match> =>
             fetchJson(`${API_BASE}/matches/${id}/incompleted/`, { method: 'PATCH' }),
@@ -253,7 +294,12 @@ export const api = {
     },
 
     messages: {
-        list: (): Promise<Message[]> => fetchJson(`${API_BASE}/messages/`),
+        list: (): Promise<MessageHeader[]> => fetchJson(`${API_BASE}/messages/`),
+
+        listPage: (limit: number, after?: string | null): Promise<Page<MessageHeader>> =>
+            fetchPage(`${API_BASE}/messages/`, limit, after),
+
+        unreadCount: (): Promise<{ count: number }> => fetchJson(`${API_BASE}/messages/unread-count/`),
 
         get: (id: number): Promise<Message> => fetchJson(`${API_BASE}/messages/${id}/`),
 
@@ -5,7 +5,7 @@ export { queryKeys } from './query-keys'
 export { usePlayers, usePlayer, useCreatePlayer, useUpdatePlayer, usePlayerDivisions, useDeletePlayer } from './players'
 
 // Match hooks
-export { useMatches, useMatch, useCompleteMatch, useRescoreMatch, useScheduleRoundRobin, useMarkIncompletedMatch, useDeleteMatch } from './matches'
+export { useMatches, useInfiniteMatches, useMatch, useCompleteMatch, useRescoreMatch, useScheduleRoundRobin, useMarkIncompletedMatch, useDeleteMatch } from './matches'
 
 // Division hooks
 export { useDivisions, useDivision, useCreateDivision, useUpdateDivision, useDivisionPlayers, useAddPlayerToDivision, useRemovePlayerFromDivision, useDeleteDivision } from './divisions'
@@ -20,7 +20,7 @@ export { useGames } from './games'
 export { useScores } from './scores'
 
 // Message hooks
-export { useMessages, useMessage, useCreateMessage, useMarkMessageRead, useDeleteMessage } from './messages'
+export { useMessages, useInfiniteMessages, useUnreadMessageCount, useMessage, useCreateMessage, useMarkMessageRead, useDeleteMessage } from './messages'
 
 // Score submission hooks
 export { useMatchScoreSubmission, useSubmitMatchScore } from './score-submission'
@@ -1,13 +1,16 @@
 import {
+    useInfiniteQuery,
     useQuery,
     useMutation,
     useQueryClient,
+    type InfiniteData,
+    type UseInfiniteQueryResult,
     type UseQueryResult,
     type UseMutationResult,
 } from '@tanstack/react-query'
 
-import { api } from '../api'
-import type { GameInput, Match, ScheduleInput } from '../types'
+import { api, type MatchListParams } from '../api'
+import type { GameInput, Match, Page, ScheduleInput, ScheduleResult } from '../types'
 
 import { queryKeys } from './query-keys'
 
@@ -25,6 +28,19 @@ export const useMatches = (params: {
     })
 }
 
+export const useInfiniteMatches = (
+    params: MatchListParams,
+    pageSize = 50,
+): UseInfiniteQueryResult<InfiniteData<Page<Match>, string | null>> => {
+    return useInfiniteQuery({
+        queryKey: queryKeys.matchPages(params),
+        queryFn: ({ pageParam }) => api.matches.listPage(params, pageSize, pageParam),
+        initialPageParam: null as string | null,
+        getNextPageParam: (lastPage) => lastPage.nextCursor,
+        enabled: !!(params.start_date ?? params.player_id ?? params.session_id ?? params.division_id),
+    })
+}
+
 export const useMatch = (id: number): UseQueryResult<Match> => {
     return useQuery({
         queryKey: queryKeys.match(id),
@@ -73,7 +89,7 @@ export const useRescoreMatch = (): UseMutationResult<
 }
 
 export const useScheduleRoundRobin = (): UseMutationResult<
-    Match[],
+    ScheduleResult,
     Error,
     ScheduleInput
 > => {
@@ -1,23 +1,45 @@
 import {
+    useInfiniteQuery,
     useQuery,
     useMutation,
     useQueryClient,
+    type InfiniteData,
+    type UseInfiniteQueryResult,
     type UseQueryResult,
     type UseMutationResult,
 } from '@tanstack/react-query'
 
 import { api } from '../api'
-import type { Message, MessageInput } from '../types'
+import type { Message, MessageHeader, MessageInput, Page } from '../types'
 
 import { queryKeys } from './query-keys'
 
-export const useMessages = (): UseQueryResult<Message[]> => {
+export const useMessages = (): UseQueryResult<MessageHeader[]> => {
     return useQuery({
         queryKey: queryKeys.messages,
         queryFn: api.messages.list,
     })
 }
 
+export const useInfiniteMessages = (
+    pageSize = 25,
+): UseInfiniteQueryResult<InfiniteData<Page<MessageHeader>, string | null>> => {
+    return useInfiniteQuery({
+        queryKey: queryKeys.messagePages,
+        queryFn: ({ pageParam }) => api.messages.listPage(pageSize, pageParam),
+        initialPageParam: null as string | null,
+        getNextPageParam: (lastPage) => lastPage.nextCursor,
+    })
+}
+
+export const useUnreadMessageCount = (): UseQueryResult<number> => {
+    return useQuery({
+        queryKey: queryKeys.unreadMessageCount,
+        queryFn: api.messages.unreadCount,
+        select: (data) => data.count,
+    })
+}
+
 export const useMessage = (id: number): UseQueryResult<Message> => {
     return useQuery({
         queryKey: queryKeys.message(id),
@@ -1,3 +1,5 @@
+import type { MatchListParams } from '../api'
+
 export const queryKeys = {
     players: ['players'] as const,
     player: (id: number) => ['players', id] as const,
@@ -9,6 +11,7 @@ export const queryKeys = {
         division_id?: number
         completed?: boolean
     }) => ['matches', params] as const,
+    matchPages: (params: MatchListParams) => ['matches', 'pages', params] as const,
     match: (id: number) => ['matches', id] as const,
     games: (matchId: number) => ['games', matchId] as const,
     divisions: ['divisions'] as const,
@@ -19,6 +22,8 @@ export const queryKeys = {
     session: (id: number) => ['sessions', id] as const,
     scores: (sessionId: number) => ['scores', sessionId] as const,
     messages: ['messages'] as const,
+    messagePages: ['messages', 'pages'] as const,
+    unreadMessageCount: ['messages', 'unread-count'] as const,
     message: (id: number) => ['messages', id] as const,
     scoreSubmission: (matchId: number) => ['score-submission', matchId] as const,
     payments: (matchId: number) => ['payments', matchId] as const,
@@ -31,6 +31,7 @@ export interface Match {
     loser_id: number | null
     deleted: boolean
     score_status: 'pending' | 'confirmed' | 'needs_review' | 'disputed' | null
+    score_version: number
 }
 
 export interface MatchScoreSubmission {
@@ -86,6 +87,14 @@ export interface ScheduleInput {
     start_date: string
     double?: boolean
     race?: number
+    optimizer?: 'anneal' | 'shuffle'
+    time_budget?: number
+}
+
+/** Scheduled matches plus the optimizer's objective score (lower is better). */
+export interface ScheduleResult {
+    matches: Match[]
+    cost: number | null
 }
 
 export type PlayerInput = Omit<Player, 'player_id' | 'deleted'>
@@ -101,6 +110,9 @@ export interface Division {
 export type DivisionInput = Omit<Division, 'division_id' | 'deleted'>
 export type DivisionUpdateInput = DivisionInput & { update_existing_matches?: boolean }
 
+/** [max rating difference, higher-rated weight, lower-rated weight]; the last row's max is null. */
+export type WeightBracket = [number | null, number, number]
+
 export interface Session {
     session_id: number
     name: string
@@ -110,6 +122,8 @@ export interface Session {
     dues: number
     active: boolean
     deleted: boolean
+    /** Per-session match weights; null uses the league default table */
+    weight_brackets?: WeightBracket[] | null
 }
 
 export type SessionInput = Omit<Session, 'session_id' | 'start_date' | 'end_date' | 'deleted'>
@@ -120,6 +134,12 @@ export interface PlayerScore {
     score: number
 }
 
+/** One page of a keyset-paginated list; nextCursor is null on the last page. */
+export interface Page<T> {
+    items: T[]
+    nextCursor: string | null
+}
+
 export interface Message {
     message_id: number
     subject: string
@@ -131,6 +151,9 @@ export interface Message {
     is_read: boolean
 }
 
+// Inbox listings omit the body; it is loaded per message
+export type MessageHeader = Omit<Message, 'body'>
+
 export interface MessageInput {
     subject: string
     body: string
@@ -17,10 +17,13 @@ import { useCallback, useEffect, useMemo, useState } from 'react'
 
 import { MatchAccordion, MatchCard, MatchFilters } from '~/components/matches'
 import type { CompletionFilter } from '~/components/matches/match-filters'
-import { useMarkIncompletedMatch, useMatches, usePlayers } from '~/lib/react-query'
+import { useInfiniteMatches, useMarkIncompletedMatch, usePlayers } from '~/lib/react-query'
 import type { Player } from '~/lib/types'
 import { toLocalDateString } from '~/lib/utils'
 
+// A year of one player's matches, or a busy week league-wide, loads in pages
+const MATCH_PAGE_SIZE = 100
+
 const MatchesPage: React.FC = () => {
     const theme = useTheme()
     const isMobile = useMediaQuery(theme.breakpoints.down('md'))
@@ -130,10 +133,14 @@ const MatchesPage: React.FC = () => {
     }, [dateRange, selectedPlayer, sessionId, divisionId, completionFilter])
 
     const {
-        data: matches,
+        data: matchPages,
         isLoading: matchesLoading,
         error: matchesError,
-    } = useMatches(matchParams)
+        hasNextPage,
+        fetchNextPage,
+        isFetchingNextPage,
+    } = useInfiniteMatches(matchParams, MATCH_PAGE_SIZE)
+    const matches = useMemo(() => matchPages?.pages.flatMap((page) => page.items), [matchPages])
     const { data: players, isLoading: playersLoading } = usePlayers()
 
     const isLoading = matchesLoading || playersLoading
@@ -278,6 +285,13 @@ const MatchesPage: React.FC = () => {
                             />
                         ),
                     )}
+                    {hasNextPage && (
+                        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                            <Button disabled={isFetchingNextPage} onClick={() => fetchNextPage()}>
+                                {isFetchingNextPage ? 'Loading...' : 'Load more matches'}
+                            </Button>
+                        </Box>
+                    )}
                 </Box>
             )}
         </Box>
@@ -33,14 +33,16 @@ import {
     useCreateMessage,
     useDeleteMessage,
     useDivisions,
+    useInfiniteMessages,
     useMarkMessageRead,
-    useMessages,
+    useMessage,
     usePlayers,
 } from '~/lib/react-query'
 import type { MessageInput, Player } from '~/lib/types'
 
 export const MessageCenter: React.FC = () => {
-    const { data: messages, isLoading } = useMessages()
+    const { data, isLoading, hasNextPage, fetchNextPage, isFetchingNextPage } = useInfiniteMessages()
+    const messages = data?.pages.flatMap((page) => page.items)
     const markRead = useMarkMessageRead()
     const deleteMessage = useDeleteMessage()
     const { user } = useAuth()
@@ -136,9 +138,7 @@ export const MessageCenter: React.FC = () => {
                     <Collapse in={expandedId === msg.message_id}>
                         <Divider />
                         <CardContent>
-                            <Box sx={{ '& p': { mt: 0 } }}>
-                                <Markdown>{msg.body}</Markdown>
-                            </Box>
+                            {expandedId === msg.message_id && <MessageBody messageId={msg.message_id} />}
                             {user?.is_admin && (
                                 <Box sx={{ display: 'flex', justifyContent: 'flex-end', mt: 1 }}>
                                     <Button
@@ -155,11 +155,33 @@ export const MessageCenter: React.FC = () => {
                 </Card>
             ))}
 
+            {hasNextPage && (
+                <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                    <Button disabled={isFetchingNextPage} onClick={() => fetchNextPage()}>
+                        {isFetchingNextPage ? 'Loading...' : 'Load older messages'}
+                    </Button>
+                </Box>
+            )}
+
             <ComposeDialog open={composeOpen} onClose={() => setComposeOpen(false)} />
         </Box>
     )
 }
 
+function MessageBody({ messageId }: { messageId: number }) {
+    const { data: message, isLoading } = useMessage(messageId)
+
+    if (isLoading) {
+        return <CircularProgress size={20} />
+    }
+
+    return (
+        <Box sx={{ '& p': { mt: 0 } }}>
+            <Markdown>{message?.body ?? ''}</Markdown>
+        </Box>
+    )
+}
+
 function ComposeDialog({ open, onClose }: { open: boolean; onClose: () => void }) {
     const [subject, setSubject] = useState('')
     const [body, setBody] = useState('')